@@ -5,6 +5,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import make_pipeline
+import joblib
 
 # Load the dataset
 df = pd.read_csv('backend/Features&Labels.csv')
@@ -58,4 +60,7 @@ print(f"Test set accuracy: {test_accuracy:.4f}")
 # The model calculates a weighted sum of inputs and passes it 
 # through a 'Softmax' function to output probabilities for all 4 classes.
 # The class with the highest probability (e.g., 0.85 for 'Healthy') is the prediction.
-# It's more linear and usually less optimal for multivariate problems with more complex relations
\ No newline at end of file
+# It's more linear and usually less optimal for multivariate problems with more complex relations
+
+# Save scaler + model as one pipeline for the serving registry (?model=logreg)
+joblib.dump(make_pipeline(scaler, logreg_model), 'backend/tree_health_logreg_model.pkl')
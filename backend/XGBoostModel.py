@@ -66,4 +66,7 @@ print(f"Test Accuracy: {test_acc:.4f}")
 for feature, importance in zip(features, xgb_model.feature_importances_):
     print(f"{feature}: {importance:.4f}")
     
-# Risks->Because each subsequent tree tries to fix the errors of the tree before it, likely to overfit
\ No newline at end of file
+# Risks->Because each subsequent tree tries to fix the errors of the tree before it, likely to overfit
+
+# Save in XGBoost's native JSON format for the serving registry (?model=xgb)
+xgb_model.save_model('backend/tree_health_xgb_model.json')
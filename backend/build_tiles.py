@@ -0,0 +1,287 @@
+"""
+Precompute national survivability tiles: run the feature pipeline and the model over a regular
+lat/lon lattice covering the contiguous US, then write an XYZ tile pyramid that
+services/tiles.py serves at /api/tiles/{layer}/{z}/{x}/{y} (ETag / 304):
+  survivability/{z}/{x}/{y}.png   colour bands as in the results card, for direct map overlays
+  data/{z}/{x}/{y}.bin            gzip'd 5×256×256 uint8: survivability + class probabilities
+
+Features come through services/fetch.py exactly as for /api/scan-area, so local sources are
+used where configured (ELEVATION_DEM_DIR, SOIL_GRID_DIR) and a persistent feature cache
+(FEATURE_CACHE_PATH) makes re-runs reuse everything already fetched; only misses go upstream,
+with multi-point requests. The scored lattice is saved as lattice.npz next to the tiles, so
+the pyramid can be re-cut (other zooms) with --from-lattice without fetching again.
+
+Cells at exactly 0 m elevation from the elevation source are treated as sea and left
+transparent (--keep-sea disables this). Cells where any model feature fell back to its default
+(upstream failed or rate limited, no local grid) are left empty too rather than painted with
+median-soil scores; their counts are printed and recorded in metadata.json, and the build
+aborts when more than --max-fallback of the land cells are affected (e.g. a CONUS run without
+SOIL_GRID_DIR, where SoilGrids' 5 requests/min leave almost every cell on default soil).
+
+Usage (from project root):
+    python -m backend.build_tiles                                  # CONUS, 0.1° lattice, z3-8
+    python -m backend.build_tiles --step-deg 0.05 --max-zoom 9 --fast
+    python -m backend.build_tiles --bbox -123 37 -121 38.5 --step-deg 0.01
+    python -m backend.build_tiles --from-lattice backend/tiles/lattice.npz --max-zoom 10
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import math
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from backend.services.features import API, DEFAULT, FEATURE_NAMES, model_columns
+    from backend.services.fetch import fetch_feature_matrix
+    from backend.services.http_client import close_client
+    from backend.services.predict import CLASS_LABELS, predict_features
+    from backend.services.registry import get_model, model_feature_names, resolve_name
+    from backend.services.tiles import (
+        DATA_CHANNELS, DATA_SCALE, METADATA_FILE, NO_DATA, TILE_SIZE, TILES_DIR, tile_path,
+    )
+except ImportError:
+    from services.features import API, DEFAULT, FEATURE_NAMES, model_columns
+    from services.fetch import fetch_feature_matrix
+    from services.http_client import close_client
+    from services.predict import CLASS_LABELS, predict_features
+    from services.registry import get_model, model_feature_names, resolve_name
+    from services.tiles import DATA_CHANNELS, DATA_SCALE, METADATA_FILE, NO_DATA, TILE_SIZE, TILES_DIR, tile_path
+
+# [min_lon, min_lat, max_lon, max_lat] of the contiguous US
+CONUS_BBOX = [-125.0, 24.4, -66.9, 49.4]
+# Lattice points per fetch + score round
+CHUNK = 2000
+# Survivability bands (upper bound, RGB), matching the frontend results card
+_BANDS = [
+    (0.25, (0xE7, 0x4C, 0x3C)),
+    (0.50, (0xE0, 0xCF, 0x38)),
+    (0.75, (0x55, 0xEB, 0x30)),
+    (1.01, (0x04, 0xFD, 0xE4)),
+]
+# Overlay opacity of data pixels in the PNG layer
+_ALPHA = 200
+_ELEVATION = FEATURE_NAMES.index("Elevation")
+
+
+def lattice_axes(bbox: list[float], step: float) -> tuple[np.ndarray, np.ndarray]:
+    """Cell-centre latitudes and longitudes of a step-degree lattice over bbox."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    n_lat = max(1, math.ceil((max_lat - min_lat) / step - 1e-9))
+    n_lon = max(1, math.ceil((max_lon - min_lon) / step - 1e-9))
+    return min_lat + (np.arange(n_lat) + 0.5) * step, min_lon + (np.arange(n_lon) + 0.5) * step
+
+
+async def _score_lattice(points: list[tuple[float, float]], model: str, keep_sea: bool):
+    """
+    (channels, N) uint8 grid for points, plus counts: sea cells and, per model feature, land
+    cells that fell back to its default (those cells stay NO_DATA).
+    """
+    grid = np.full((len(DATA_CHANNELS), len(points)), NO_DATA, dtype=np.uint8)
+    channels = [CLASS_LABELS[c] for c in sorted(CLASS_LABELS)]
+    feature_names = model_feature_names(get_model(model))
+    columns = model_columns(feature_names)
+    sea_cells = fallback_cells = 0
+    fallback_by_feature = np.zeros(len(columns), dtype=np.int64)
+    start = time.perf_counter()
+    try:
+        for lo in range(0, len(points), CHUNK):
+            X, sources = await fetch_feature_matrix(points[lo:lo + CHUNK])
+            land = np.ones(len(X), dtype=bool)
+            if not keep_sea:
+                land = ~((X[:, _ELEVATION] == 0) & (sources[:, _ELEVATION] == API))
+            defaults = (sources[:, columns] == DEFAULT) & land[:, None]
+            keep = land & ~defaults.any(axis=1)
+            sea_cells += int((~land).sum())
+            fallback_cells += int((land & ~keep).sum())
+            fallback_by_feature += defaults.sum(axis=0)
+            predictions = predict_features(X[keep], model)
+            values = np.array(
+                [[p["survivability"]] + [p["probabilities"].get(c, 0.0) for c in channels] for p in predictions]
+            ).reshape(-1, len(DATA_CHANNELS))
+            grid[:, lo + np.flatnonzero(keep)] = np.rint(values.T * DATA_SCALE).astype(np.uint8)
+            done = min(lo + CHUNK, len(points))
+            print(
+                f"  {done}/{len(points)} cells, {fallback_cells} left empty on default features "
+                f"({time.perf_counter() - start:.0f}s)",
+                file=sys.stderr,
+            )
+    finally:
+        await close_client()
+    fallback = {
+        "cells": fallback_cells,
+        "by_feature": {name: int(n) for name, n in zip(feature_names, fallback_by_feature) if n},
+    }
+    return grid, sea_cells, fallback
+
+
+def tile_range(bbox: list[float], z: int) -> tuple[range, range]:
+    """XYZ tile columns and rows intersecting bbox at zoom z."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    n = 1 << z
+
+    def x_of(lon: float) -> int:
+        return min(n - 1, max(0, int((lon + 180.0) / 360.0 * n)))
+
+    def y_of(lat: float) -> int:
+        lat = max(-85.0511, min(85.0511, lat))
+        y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+        return min(n - 1, max(0, int(y)))
+
+    return range(x_of(min_lon), x_of(max_lon) + 1), range(y_of(max_lat), y_of(min_lat) + 1)
+
+
+def render_tile(grid: np.ndarray, lats: np.ndarray, lons: np.ndarray, step: float, z: int, x: int, y: int):
+    """(channels, 256, 256) uint8 for tile z/x/y by nearest lattice cell, or None when it has no data."""
+    n = TILE_SIZE << z
+    pixels = np.arange(TILE_SIZE) + 0.5
+    lon = (x * TILE_SIZE + pixels) / n * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * (y * TILE_SIZE + pixels) / n))))
+    i = np.floor((lat - (lats[0] - step / 2)) / step).astype(np.intp)
+    j = np.floor((lon - (lons[0] - step / 2)) / step).astype(np.intp)
+    rows = (i >= 0) & (i < len(lats))
+    cols = (j >= 0) & (j < len(lons))
+    if not rows.any() or not cols.any():
+        return None
+    tile = grid[:, np.clip(i, 0, len(lats) - 1)][:, :, np.clip(j, 0, len(lons) - 1)]
+    tile[:, ~(rows[:, None] & cols[None, :])] = NO_DATA
+    if (tile[0] == NO_DATA).all():
+        return None
+    return tile
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Minimal 8-bit RGBA PNG (no filtering), so tiles need no imaging dependency."""
+    height, width, _ = rgba.shape
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)]).tobytes()
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+def colorize(survivability: np.ndarray) -> np.ndarray:
+    """(H, W, 4) RGBA bands for survivability bytes; NO_DATA pixels are transparent."""
+    rgba = np.zeros(survivability.shape + (4,), dtype=np.uint8)
+    value = survivability / DATA_SCALE
+    lower = -1.0
+    for upper, rgb in _BANDS:
+        band = (value >= lower) & (value < upper)
+        rgba[band, :3] = rgb
+        lower = upper
+    rgba[..., 3] = np.where(survivability == NO_DATA, 0, _ALPHA)
+    return rgba
+
+
+def write_pyramid(grid, lats, lons, step: float, bbox: list[float], zooms: range, out: Path) -> int:
+    written = 0
+    for z in zooms:
+        xs, ys = tile_range(bbox, z)
+        for x in xs:
+            for y in ys:
+                tile = render_tile(grid, lats, lons, step, z, x, y)
+                if tile is None:
+                    continue
+                png = tile_path(out, "survivability", z, x, y)
+                png.parent.mkdir(parents=True, exist_ok=True)
+                png.write_bytes(encode_png(colorize(tile[0])))
+                data = tile_path(out, "data", z, x, y)
+                data.parent.mkdir(parents=True, exist_ok=True)
+                # mtime=0: identical tiles give identical bytes, so their ETags survive rebuilds
+                data.write_bytes(gzip.compress(tile.tobytes(), compresslevel=9, mtime=0))
+                written += 1
+        print(f"  z{z}: {len(xs) * len(ys)} tiles in range, {written} written so far", file=sys.stderr)
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--bbox", type=float, nargs=4, default=CONUS_BBOX, metavar=("MIN_LON", "MIN_LAT", "MAX_LON", "MAX_LAT")
+    )
+    parser.add_argument("--step-deg", type=float, default=0.1, help="lattice spacing in degrees")
+    parser.add_argument("--min-zoom", type=int, default=3)
+    parser.add_argument("--max-zoom", type=int, default=8)
+    parser.add_argument("--model", default=None, help="registered model name (default: DEFAULT_MODEL)")
+    parser.add_argument("--fast", action="store_true", help="score with the distilled forest")
+    parser.add_argument("--keep-sea", action="store_true", help="score 0 m elevation cells too")
+    parser.add_argument(
+        "--max-fallback", type=float, default=0.05,
+        help="abort when more than this fraction of land cells have a default-valued feature",
+    )
+    parser.add_argument("--out", type=Path, default=TILES_DIR)
+    parser.add_argument("--from-lattice", type=Path, default=None, help="re-cut tiles from a saved lattice.npz")
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.min_zoom <= args.max_zoom <= 16:
+        sys.exit("Zooms must satisfy 0 <= --min-zoom <= --max-zoom <= 16")
+    start = time.perf_counter()
+    args.out.mkdir(parents=True, exist_ok=True)
+
+    if args.from_lattice:
+        saved = np.load(args.from_lattice)
+        grid, bbox, step = saved["grid"], saved["bbox"].tolist(), float(saved["step"])
+        model = str(saved["model"])
+        # Lattices saved before fallback cells were counted carry no record of them
+        fallback = json.loads(str(saved["fallback"])) if "fallback" in saved else None
+        lats, lons = lattice_axes(bbox, step)
+    else:
+        if args.step_deg <= 0:
+            sys.exit("--step-deg must be positive")
+        bbox, step = list(args.bbox), args.step_deg
+        model = resolve_name(args.model, args.fast)
+        lats, lons = lattice_axes(bbox, step)
+        points = [(round(float(lat), 6), round(float(lon), 6)) for lat in lats for lon in lons]
+        print(f"Scoring {len(points)} cells ({len(lats)}×{len(lons)}) with {model}", file=sys.stderr)
+        flat, sea_cells, fallback = asyncio.run(_score_lattice(points, model, args.keep_sea))
+        land_cells = len(points) - sea_cells
+        print(
+            f"{fallback['cells']}/{land_cells} land cells left empty on default features {fallback['by_feature']}",
+            file=sys.stderr,
+        )
+        if land_cells and fallback["cells"] / land_cells > args.max_fallback:
+            sys.exit(
+                f"{fallback['cells'] / land_cells:.0%} of land cells fell back to default features "
+                f"(above --max-fallback {args.max_fallback:.0%}); configure local sources "
+                "(SOIL_GRID_DIR, ELEVATION_DEM_DIR) or check upstreams, then re-run"
+            )
+        grid = flat.reshape(len(DATA_CHANNELS), len(lats), len(lons))
+        np.savez_compressed(
+            args.out / "lattice.npz", grid=grid, bbox=np.array(bbox), step=step, model=model,
+            fallback=json.dumps(fallback),
+        )
+
+    written = write_pyramid(grid, lats, lons, step, bbox, range(args.min_zoom, args.max_zoom + 1), args.out)
+    metadata = {
+        "bounds": bbox,
+        "minzoom": args.min_zoom,
+        "maxzoom": args.max_zoom,
+        "step_deg": step,
+        "model": model,
+        "cells": int((grid[0] != NO_DATA).sum()),
+        "fallback": fallback,
+        "tiles": written,
+        "data_channels": DATA_CHANNELS,
+        "data_scale": DATA_SCALE,
+        "no_data": NO_DATA,
+        "built": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    (args.out / METADATA_FILE).write_text(json.dumps(metadata, indent=2) + "\n")
+    print(f"Wrote {written} tiles per layer to {args.out} in {time.perf_counter() - start:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Distill tree_health_rf_model.pkl into a small forest for latency-critical scoring (map hover
+previews, ?fast=true). Students of increasing size are trained on the full forest's labels
+(the train split plus jittered copies of it, so the student learns the teacher's decision
+surface rather than the noisy ground truth); each node's class distribution is then refit to the
+teacher's mean probabilities there, so survivability tracks the full forest too, not just labels.
+The first student whose label agreement with the teacher on the validation split reaches
+--min-agreement is exported compiled to backend/tree_health_rf_fast.joblib, where
+services/registry.py serves it as "rf_fast".
+
+Usage (from project root, after RandomForestModel.py):
+    python -m backend.distill_forest
+    python -m backend.distill_forest --min-agreement 0.975
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+try:
+    from backend.export_forest import check_parity
+    from backend.services.forest import CompiledForest, compile_forest
+    from backend.train import FEATURES, RANDOM_STATE, load_dataset, split_indices
+except ImportError:
+    from export_forest import check_parity
+    from services.forest import CompiledForest, compile_forest
+    from train import FEATURES, RANDOM_STATE, load_dataset, split_indices
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# Student sizes tried in order (n_estimators, max_depth); the first within the agreement threshold wins
+STUDENTS = [(5, 6), (10, 8), (20, 8), (20, 10), (30, 12), (60, 12)]
+# Jittered copies of each training row, and their noise as a fraction of each feature's std
+AUGMENT_COPIES = 9
+AUGMENT_NOISE = 0.1
+# Rows timed per single-row latency measurement, and rows per batch measurement (best of 3)
+LATENCY_ROWS = 200
+BATCH_ROWS = 1000
+
+
+def augmented_inputs(X: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Training rows plus AUGMENT_COPIES jittered copies (Gaussian, AUGMENT_NOISE × feature std)."""
+    noise = rng.normal(0.0, AUGMENT_NOISE, size=(AUGMENT_COPIES * len(X), X.shape[1])) * X.std(axis=0)
+    return np.vstack([X, np.tile(X, (AUGMENT_COPIES, 1)) + noise])
+
+
+def soft_leaves(student, arrays: dict, X_fit: pd.DataFrame, teacher) -> None:
+    """Set every node's class distribution (arrays["value"]) to the teacher's mean proba over the rows reaching it."""
+    proba = teacher.predict_proba(X_fit)
+    # Student columns follow its own classes_ (a class the teacher never predicts is absent)
+    proba = proba[:, np.searchsorted(teacher.classes_, student.classes_)]
+    proba /= proba.sum(axis=1, keepdims=True)
+    X = X_fit.to_numpy(dtype=np.float32)
+    for i, tree in enumerate(student.estimators_):
+        paths = tree.decision_path(X)
+        counts = np.asarray(paths.sum(axis=0)).ravel()
+        sums = paths.T @ proba
+        reached = counts > 0
+        value = arrays["value"][i, :len(counts)]
+        value[reached] = sums[reached] / counts[reached, None]
+
+
+def row_latency_ms(model, X: np.ndarray) -> float:
+    """Median single-row predict_proba time."""
+    model.predict_proba(X[:1])
+    times = []
+    for i in range(min(LATENCY_ROWS, len(X))):
+        start = time.perf_counter()
+        model.predict_proba(X[i:i + 1])
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def batch_row_us(model, X: np.ndarray) -> float:
+    """Per-row predict_proba time in a BATCH_ROWS batch."""
+    batch = X[np.arange(BATCH_ROWS) % len(X)]
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        model.predict_proba(batch)
+        best = min(best, time.perf_counter() - start)
+    return best / BATCH_ROWS * 1e6
+
+
+def survivability(proba: np.ndarray, classes: np.ndarray) -> np.ndarray:
+    # Probability of healthy (2) or very_healthy (3), as in services/predict.py
+    return proba[:, np.isin(classes, (2, 3))].sum(axis=1)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=BACKEND_DIR / "tree_health_rf_model.pkl")
+    parser.add_argument("--data", type=Path, default=BACKEND_DIR / "Features&Labels.csv")
+    parser.add_argument("--cache-dir", type=Path, default=BACKEND_DIR / ".train_cache")
+    parser.add_argument("--out", type=Path, default=BACKEND_DIR / "tree_health_rf_fast.joblib")
+    parser.add_argument(
+        "--min-agreement", type=float, default=0.97,
+        help="fraction of validation rows where the student's label must match the full forest's",
+    )
+    args = parser.parse_args(argv)
+
+    teacher = joblib.load(args.model)
+    x_path, y_path = load_dataset(args.data, args.cache_dir)
+    X = np.load(x_path)
+    train, val, _ = split_indices(np.load(y_path))
+    X_val = pd.DataFrame(X[val], columns=FEATURES)
+
+    rng = np.random.default_rng(RANDOM_STATE)
+    X_fit = pd.DataFrame(augmented_inputs(X[train], rng), columns=FEATURES)
+    y_fit = teacher.predict(X_fit)
+    teacher_val = teacher.predict_proba(X_val)
+    teacher_labels = teacher.classes_[teacher_val.argmax(axis=1)]
+    teacher_compiled = CompiledForest(compile_forest(teacher))
+    print(
+        f"Teacher: {len(teacher.estimators_)} trees, {row_latency_ms(teacher_compiled, X[val]):.3f} ms/row, "
+        f"{batch_row_us(teacher_compiled, X[val]):.1f} µs/row batched (compiled)"
+    )
+
+    for n_estimators, max_depth in STUDENTS:
+        # All features at every split: the labels are noise-free, so smaller trees fit them best
+        student = RandomForestClassifier(
+            n_estimators=n_estimators, max_depth=max_depth, max_features=None, random_state=RANDOM_STATE, n_jobs=-1
+        )
+        student.fit(X_fit, y_fit)
+        arrays = compile_forest(student)
+        try:
+            check_parity(student, CompiledForest(arrays), X_val)
+        except ValueError as e:
+            sys.exit(f"Parity check failed: {e}")
+        soft_leaves(student, arrays, X_fit, teacher)
+        compiled = CompiledForest(arrays)
+        proba = compiled.predict_proba(X[val])
+        agreement = float((compiled.classes_[proba.argmax(axis=1)] == teacher_labels).mean())
+        surv_error = float(np.abs(
+            survivability(proba, compiled.classes_) - survivability(teacher_val, teacher.classes_)
+        ).mean())
+        print(
+            f"  {n_estimators:>3} trees depth {max_depth:>2}: agreement {agreement:.4f}, "
+            f"mean |Δ survivability| {surv_error:.4f}, {row_latency_ms(compiled, X[val]):.3f} ms/row, "
+            f"{batch_row_us(compiled, X[val]):.1f} µs/row batched"
+        )
+        if agreement >= args.min_agreement:
+            break
+    else:
+        sys.exit(f"No student reached {args.min_agreement:.2%} agreement; nothing saved")
+
+    joblib.dump(arrays, args.out)
+    size_kb = args.out.stat().st_size / 1024
+    print(f"Saved {n_estimators} trees (depth {max_depth}) to {args.out} ({size_kb:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Export tree_health_rf_model.pkl into the compiled array format served by predict.py
+(backend/tree_health_rf_compiled.joblib), after checking it reproduces model.predict_proba
+on every row of Features&Labels.csv.
+
+Usage (from project root, after RandomForestModel.py):
+    python -m backend.export_forest
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+try:
+    from backend.services.forest import CompiledForest, compile_forest
+except ImportError:
+    from services.forest import CompiledForest, compile_forest
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# Max |compiled - sklearn| probability difference accepted (only summation order differs)
+PARITY_TOLERANCE = 1e-9
+
+
+def check_parity(model, compiled: CompiledForest, X: np.ndarray) -> float:
+    """Max absolute predict_proba difference; raises if above tolerance or any label differs."""
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    max_diff = float(np.abs(expected - actual).max())
+    if max_diff > PARITY_TOLERANCE:
+        raise ValueError(f"Compiled forest differs from sklearn by {max_diff:.3g}")
+    if not np.array_equal(model.classes_[expected.argmax(axis=1)], compiled.predict(X)):
+        raise ValueError("Compiled forest predicts different labels than sklearn")
+    return max_diff
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=BACKEND_DIR / "tree_health_rf_model.pkl")
+    parser.add_argument("--data", type=Path, default=BACKEND_DIR / "Features&Labels.csv")
+    parser.add_argument("--out", type=Path, default=BACKEND_DIR / "tree_health_rf_compiled.joblib")
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model)
+    arrays = compile_forest(model)
+    compiled = CompiledForest(arrays)
+
+    df = pd.read_csv(args.data)
+    X = df[list(model.feature_names_in_)].to_numpy(dtype=np.float64)
+    try:
+        max_diff = check_parity(model, compiled, X)
+    except ValueError as e:
+        sys.exit(f"Parity check failed: {e}")
+    print(f"Parity OK on {len(X)} rows (max |diff| {max_diff:.2g})")
+
+    joblib.dump(arrays, args.out)
+    size_mb = args.out.stat().st_size / 1e6
+    print(f"Saved {compiled.n_estimators} trees x {compiled.n_nodes} nodes to {args.out} ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
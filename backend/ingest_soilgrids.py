@@ -0,0 +1,105 @@
+"""
+Precompute depth-averaged SoilGrids nitrogen + SOC means over a region into an on-disk grid
+that the backend serves offline (set SOIL_GRID_DIR to the output directory).
+
+SoilGrids allows ~5 requests/min, so a region takes (cells / 5) minutes. The run saves as it
+goes and resumes where it stopped when re-run with the same arguments.
+
+Usage (from project root):
+    python -m backend.ingest_soilgrids --bbox -123 37 -121 39 --step 0.05 --out backend/soil_grid
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+try:
+    from backend.services.soil import soil_layer_means
+except ImportError:
+    from services.soil import soil_layer_means
+
+SOILGRIDS_URL = "https://rest.isric.org/soilgrids/v2.0/properties/query"
+
+
+def _open_grid(out: Path, min_lat: float, min_lon: float, step: float, shape: tuple[int, int]):
+    """Create the grid files, or reopen them if a previous run used the same layout."""
+    meta = {"min_lat": min_lat, "min_lon": min_lon, "step_deg": step, "shape": list(shape)}
+    meta_path = out / "meta.json"
+    if meta_path.exists():
+        if json.loads(meta_path.read_text()) != meta:
+            raise SystemExit(f"{out} holds a grid with a different layout; use another --out")
+    else:
+        out.mkdir(parents=True, exist_ok=True)
+        for name, dtype, fill in (("nitrogen", np.float32, np.nan), ("soc", np.float32, np.nan), ("done", np.uint8, 0)):
+            arr = np.lib.format.open_memmap(out / f"{name}.npy", mode="w+", dtype=dtype, shape=shape)
+            arr[:] = fill
+            arr.flush()
+        meta_path.write_text(json.dumps(meta))
+    return tuple(
+        np.lib.format.open_memmap(out / f"{name}.npy", mode="r+") for name in ("nitrogen", "soc", "done")
+    )
+
+
+def _fetch_cell(client: httpx.Client, lat: float, lon: float) -> tuple[float | None, float | None] | None:
+    """(nitrogen, soc) layer means for one cell, or None when it failed (retried on the next run)."""
+    params = {"lat": round(lat, 6), "lon": round(lon, 6), "property": ["nitrogen", "soc"]}
+    try:
+        r = client.get(SOILGRIDS_URL, params=params)
+        if r.status_code == 429:
+            # Throttled: back off a full minute
+            print("Rate limited; sleeping 60 s", file=sys.stderr)
+            time.sleep(60)
+            return None
+        r.raise_for_status()
+        return soil_layer_means(r.json())
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"({lat:.4f}, {lon:.4f}) failed: {e}", file=sys.stderr)
+        return None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bbox", type=float, nargs=4, required=True, metavar=("MIN_LON", "MIN_LAT", "MAX_LON", "MAX_LAT"))
+    parser.add_argument("--step", type=float, default=0.05, help="grid spacing in degrees (SoilGrids native is ~0.0025)")
+    parser.add_argument("--out", type=Path, default=Path("backend/soil_grid"))
+    parser.add_argument("--rate", type=float, default=5.0, help="max SoilGrids requests per minute")
+    args = parser.parse_args(argv)
+
+    min_lon, min_lat, max_lon, max_lat = args.bbox
+    shape = (
+        int(round((max_lat - min_lat) / args.step)) + 1,
+        int(round((max_lon - min_lon) / args.step)) + 1,
+    )
+    nitrogen, soc, done = _open_grid(args.out, min_lat, min_lon, args.step, shape)
+    todo = np.argwhere(done == 0)
+    print(f"Grid {shape[0]}x{shape[1]}: {len(todo)} cells left (~{len(todo) / args.rate:.0f} min)")
+
+    interval = 60.0 / args.rate
+    with httpx.Client(timeout=30.0) as client:
+        for n, (i, j) in enumerate(todo, 1):
+            started = time.monotonic()
+            lat = min_lat + i * args.step
+            lon = min_lon + j * args.step
+            means = _fetch_cell(client, lat, lon)
+            if means is not None:
+                n_mean, soc_mean = means
+                nitrogen[i, j] = np.nan if n_mean is None else n_mean
+                soc[i, j] = np.nan if soc_mean is None else soc_mean
+                done[i, j] = 1
+            if n % 10 == 0 or n == len(todo):
+                for arr in (nitrogen, soc, done):
+                    arr.flush()
+                print(f"{n}/{len(todo)} cells")
+            # Pace every cell, failed ones included, so an outage doesn't burst past --rate
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    for arr in (nitrogen, soc, done):
+        arr.flush()
+
+
+if __name__ == "__main__":
+    main()
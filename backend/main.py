@@ -1,23 +1,72 @@
 """
-FastAPI app: CORS, /api/fetch-features, /api/predict.
+FastAPI app: CORS, zstd/gzip compression, /api/fetch-features (+ /stream), /api/predict, /api/predict/batch, /api/models, /api/scan-area, /api/tiles, /metrics.
 """
+import asyncio
+import json
 import os
-import requests
+from contextlib import asynccontextmanager, suppress
+
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
 try:
-    from backend.services.fetch import fetch_features_for_point
-    from backend.services.predict import predict
+    from backend.services.compression import CompressionMiddleware
+    from backend.services.encoding import GEOJSON, JSON, available_media_types, encode_table, negotiate
+    from backend.services.fetch import fetch_features_for_point, prefetch_loop, stream_features_for_point
+    from backend.services.http_client import close_client, start_client
+    from backend.services.inference import InferenceOverloaded, start as start_inference, stop as stop_inference
+    from backend.services.location_card import location_card
+    from backend.services.metrics import MetricsMiddleware, render as render_metrics
+    from backend.services.predict import predict, predict_batch, predict_columns, predict_table, warm_up
+    from backend.services.registry import DEFAULT_MODEL, UnknownModelError, available_models, resolve_name, shadow_stats
+    from backend.services.scan import grid_cells, scan_area, scan_area_table, scan_geojson
+    from backend.services.tiles import TILE_MAX_AGE, etag_matches, metadata as tiles_metadata, read_tile
+    from backend.services.upstream import upstream_status
 except ImportError:
-    from services.fetch import fetch_features_for_point
-    from services.predict import predict
+    from services.compression import CompressionMiddleware
+    from services.encoding import GEOJSON, JSON, available_media_types, encode_table, negotiate
+    from services.fetch import fetch_features_for_point, prefetch_loop, stream_features_for_point
+    from services.http_client import close_client, start_client
+    from services.inference import InferenceOverloaded, start as start_inference, stop as stop_inference
+    from services.location_card import location_card
+    from services.metrics import MetricsMiddleware, render as render_metrics
+    from services.predict import predict, predict_batch, predict_columns, predict_table, warm_up
+    from services.registry import DEFAULT_MODEL, UnknownModelError, available_models, resolve_name, shadow_stats
+    from services.scan import grid_cells, scan_area, scan_area_table, scan_geojson
+    from services.tiles import TILE_MAX_AGE, etag_matches, metadata as tiles_metadata, read_tile
+    from services.upstream import upstream_status
+
+
+# Keep weather warm for the PREFETCH_TOP_K most-requested cells (0 disables)
+PREFETCH_TOP_K = int(os.getenv("PREFETCH_TOP_K", "200"))
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "600"))
+
 
-app = FastAPI(title="GrowWiseAI API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model (memory-mapped) before taking traffic; logs and carries on if none is trained
+    await asyncio.to_thread(warm_up)
+    # Opt-in inference worker processes (INFERENCE_WORKERS, default 0), each mapping the same model arrays
+    await asyncio.to_thread(start_inference)
+    # One pooled, keep-alive upstream client per worker
+    await start_client()
+    prefetch = None
+    if PREFETCH_TOP_K > 0:
+        prefetch = asyncio.create_task(prefetch_loop(PREFETCH_TOP_K, PREFETCH_INTERVAL))
+    yield
+    if prefetch is not None:
+        prefetch.cancel()
+        with suppress(asyncio.CancelledError):
+            await prefetch
+    await close_client()
+    await asyncio.to_thread(stop_inference)
+
+
+app = FastAPI(title="GrowWiseAI API", version="0.1.0", lifespan=lifespan)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ENV_PATH = os.path.join(BASE_DIR, "..", "googlies.env")
@@ -25,16 +74,19 @@ load_dotenv(ENV_PATH)
 MAPS_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 GEMINI_KEY = os.getenv("GEMINI_API_KEY")
 
-if GEMINI_KEY:
-    genai.configure(api_key=GEMINI_KEY)
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser devtools show the Server-Timing breakdown cross-origin
+    expose_headers=["Server-Timing"],
 )
+# zstd/gzip for responses over COMPRESS_MIN_BYTES (streams compressed chunk by chunk)
+app.add_middleware(CompressionMiddleware)
+# Per-route latency histogram + Server-Timing header (upstream calls, inference, total)
+app.add_middleware(MetricsMiddleware)
 
 
 async def _get_fetch_features_impl(lat: float, lon: float):
@@ -57,16 +109,60 @@ async def get_fetch_features_alias(lat: float, lon: float):
     return await _get_fetch_features_impl(lat, lon)
 
 
+def _stream_event(event: str, data: dict, sse: bool) -> str:
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, **data}) + "\n"
+
+
+async def _feature_events(lat: float, lon: float, model: str, sse: bool):
+    async for group, payload in stream_features_for_point(lat, lon):
+        if group != "features":
+            yield _stream_event(group, payload, sse)
+            continue
+        try:
+            prediction = await asyncio.to_thread(predict, payload, model)
+        except Exception as e:
+            yield _stream_event("error", {"detail": str(e), "features": payload}, sse)
+        else:
+            yield _stream_event("prediction", {"features": payload, "prediction": prediction}, sse)
+
+
+@app.get("/api/fetch-features/stream")
+async def get_fetch_features_stream(
+    request: Request, lat: float, lon: float, model: str | None = None, format: str | None = None
+):
+    """
+    Progressive fetch-features: one event per feature group (elevation, weather, fire_risk,
+    soil) as its upstream answers, then a final "prediction" event with the full feature
+    response and the model output. NDJSON by default; Server-Sent Events with
+    format=sse or Accept: text/event-stream.
+    """
+    try:
+        model = resolve_name(model)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    sse = format == "sse" or (format is None and "text/event-stream" in request.headers.get("accept", ""))
+    return StreamingResponse(
+        _feature_events(lat, lon, model, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        # Stop proxies from buffering the stream (which would defeat the early events)
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 class PredictRequest(BaseModel):
     features: dict
 
 
 @app.post("/api/predict")
-def post_predict(request: PredictRequest):
+def post_predict(request: PredictRequest, model: str | None = None, explain: bool = True, fast: bool = False):
     """
     Run prediction on provided features.
     Expects keys matching model (e.g. Elevation, Temperature, ...).
     Accepts snake_case keys and normalizes to model names.
+    ?model=rf|xgb|logreg selects the model (default DEFAULT_MODEL); ?explain=false drops
+    key_factors/contributions/similar; ?fast=true scores with the distilled forest (map previews).
     """
     raw = request.features or {}
     # Normalize: accept both PascalCase and snake_case
@@ -89,75 +185,167 @@ def post_predict(request: PredictRequest):
         if snake in features and pascal not in features:
             features[pascal] = features[snake]
     try:
-        return predict(features)
+        return predict(features, model, explain, fast)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class PredictBatchRequest(BaseModel):
+    rows: list[dict] | None = None
+    columns: dict[str, list] | None = None
+
+
+def _negotiated(accept: str | None, geojson: bool = False) -> str:
+    """Response media type for an Accept header (services/encoding.py); 406 if none can be produced."""
+    media_type = negotiate(accept, geojson)
+    if media_type is None:
+        types = available_media_types()
+        if geojson:
+            types = [GEOJSON] + types
+        raise HTTPException(status_code=406, detail=f"Acceptable response types: {', '.join(types)}")
+    return media_type
+
+
+@app.post("/api/predict/batch")
+def post_predict_batch(
+    request: PredictBatchRequest,
+    model: str | None = None,
+    explain: bool = True,
+    fast: bool = False,
+    accept: str | None = Header(default=None),
+):
+    """
+    Run prediction on many feature rows in one model call.
+    Body is either {"rows": [{...}, ...]} (same keys as /api/predict)
+    or columnar {"columns": {"elevation": [...], "temperature": [...], ...}}.
+    ?model=rf|xgb|logreg selects the model (default DEFAULT_MODEL); ?explain and ?fast as for /api/predict.
+    Accept: application/vnd.apache.arrow.stream or application/msgpack returns columns instead of JSON rows.
+    """
+    if request.rows is None and request.columns is None:
+        raise HTTPException(status_code=422, detail="Provide either 'rows' or 'columns'")
+    media_type = _negotiated(accept)
+    try:
+        if media_type != JSON:
+            table = predict_table(request.rows, request.columns, model, explain, fast)
+            return Response(encode_table(table, media_type), media_type=media_type, headers={"Vary": "Accept"})
+        if request.rows is not None:
+            predictions = predict_batch(request.rows, model, explain, fast)
+        else:
+            predictions = predict_columns(request.columns, model, explain, fast)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    # Predictions are plain JSON types already; skip FastAPI's per-value jsonable_encoder pass
+    return JSONResponse({"count": len(predictions), "predictions": predictions}, headers={"Vary": "Accept"})
+
+
+@app.get("/api/models")
+def get_models():
+    """Registered models with an artifact on disk, the default, and shadow-scoring stats."""
+    return {"default": DEFAULT_MODEL, "available": available_models(), "shadow": shadow_stats()}
+
+
+class ScanAreaRequest(BaseModel):
+    lat: float | None = None
+    lon: float | None = None
+    radius_km: float | None = None
+    bbox: list[float] | None = None  # [min_lon, min_lat, max_lon, max_lat]
+    step_km: float = 1.0
+    fast: bool = False  # score with the distilled forest
+
+
+@app.post("/api/scan-area")
+async def post_scan_area(request: ScanAreaRequest, accept: str | None = Header(default=None)):
+    """
+    Score a lattice of cells over a circle (lat, lon, radius_km, as sent by buildPayload)
+    or a bbox. Streams a GeoJSON FeatureCollection of survivability points, or returns
+    lat/lon plus score columns for an Arrow or MessagePack Accept header.
+    """
+    media_type = _negotiated(accept, geojson=True)
+    try:
+        cells = grid_cells(
+            lat=request.lat,
+            lon=request.lon,
+            radius_km=request.radius_km,
+            bbox=request.bbox,
+            step_km=request.step_km,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # Fetch and score before the response starts, so model and pool errors get a real status code
+    try:
+        if media_type != JSON:
+            table = await scan_area_table(cells, request.fast)
+        else:
+            predictions = await scan_area(cells, request.fast)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if media_type != JSON:
+        return Response(encode_table(table, media_type), media_type=media_type, headers={"Vary": "Accept"})
+    return StreamingResponse(
+        scan_geojson(cells, predictions, request.step_km), media_type=GEOJSON, headers={"Vary": "Accept"}
+    )
+
+
+@app.get("/api/tiles")
+def get_tiles_metadata():
+    """Bounds, zoom range, model and data layout of the precomputed tiles (see build_tiles.py)."""
+    meta = tiles_metadata()
+    if meta is None:
+        raise HTTPException(status_code=404, detail="No tiles built; run python -m backend.build_tiles")
+    return meta
+
+
+@app.get("/api/tiles/{layer}/{z}/{x}/{y}")
+def get_tile(layer: str, z: int, x: int, y: str, request: Request):
+    """
+    Precomputed tile; y may carry the layer's extension (e.g. 3/1/2.png). 204 for tiles outside
+    the built coverage, 304 when If-None-Match has the current ETag.
+    """
+    try:
+        tile = read_tile(layer, z, x, int(y.split(".", 1)[0]), request.headers.get("accept-encoding", ""))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown tile layer '{layer}'")
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Tile row must be an integer")
+    if tile is None:
+        return Response(status_code=204)
+    headers = {"ETag": tile.etag, "Cache-Control": f"public, max-age={TILE_MAX_AGE}", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), tile.etag):
+        return Response(status_code=304, headers=headers)
+    if tile.encoding:
+        headers["Content-Encoding"] = tile.encoding
+    return Response(tile.body, media_type=tile.media_type, headers=headers)
 
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    # Circuit-breaker state per upstream: "closed" (healthy), "open" (failing fast) or "half_open"
+    return {"status": "ok", "upstreams": upstream_status()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text format: upstream latency/errors, cache stats, inference time, source fallbacks."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 
 @app.get("/api/location-card")
-def get_location_card(lat: float, lon: float):
+async def get_location_card(lat: float, lon: float):
     if not MAPS_KEY or not GEMINI_KEY:
         raise HTTPException(
             status_code=500,
             detail="Missing GOOGLE_MAPS_API_KEY or GEMINI_API_KEY in backend/.env"
         )
-
-    # Places API: try nearby first (1.2 km), then fall back to 20 km
-    types = ["park", "famous_natural_feature", "tourist_attraction", "well_known_green_space",
-             "well_known_national_forest", "well_known_conservation_areas"]
-    place = None
-
-    for radius_m in (1200, 5_000):  # 1.2 km, then 5 km
-        for t in types:
-            url = (
-                "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-                f"?location={lat},{lon}&radius={radius_m}&type={t}&key={MAPS_KEY}"
-            )
-            data = requests.get(url, timeout=10).json()
-            results = data.get("results", [])
-            if results:
-                place = results[0]
-                break
-        if place is not None:
-            break
-
-    place_name = (place or {}).get("name", f"{lat:.5f}, {lon:.5f}")
-
-    # For Gemini: describe location without coords when we have a place name
-    location_for_prompt = place_name if place else "No named place found for this point."
-
-    photos = []
-    for p in (place or {}).get("photos", [])[:8]:
-        ref = p.get("photo_reference")
-        if ref:
-            photos.append(
-                "https://maps.googleapis.com/maps/api/place/photo"
-                f"?maxwidth=800&photoreference={ref}&key={MAPS_KEY}"
-            )
-
-    # Gemini description: no coords in prompt or in output
-    model = genai.GenerativeModel("models/gemini-2.0-flash")
-    prompt = f"""
-Location: {location_for_prompt}
-Do not start the paragraph with "Here is a description of the location..." or anything like that.
-Do not include latitude, longitude, or coordinates in your description.
-Write 2-4 sentences describing the environment and list 5 common trees likely in this region as well as 3 common factors affecting this region.
-Common trees: tree1, tree2, tree3, tree4, tree5
-Add paragraph break here.
-Common factors that may affect the trees in the future: factor1, factor2, factor3 (don't use ands in each factor)
-"""
-    resp = model.generate_content(prompt)
-    description = getattr(resp, "text", None) or str(resp)
-
-    return {
-        "lat": lat,
-        "lon": lon,
-        "placeName": place_name,
-        "photos": photos,
-        "description": description,
-    }
-
+    return await location_card(lat, lon, MAPS_KEY, GEMINI_KEY)
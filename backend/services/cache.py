@@ -0,0 +1,215 @@
+"""
+Feature cache: size-bounded LRU with per-entry TTL, sharded locks, optional SQLite persistence.
+Values must be JSON-serializable (dicts of floats/None) so they survive the on-disk backend.
+"""
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for "not cached" (None is a valid cached value)
+MISS = object()
+
+# Queued SQLite writes committed per transaction by the writer thread
+_DB_BATCH = 500
+
+
+class _Shard:
+    __slots__ = ("lock", "entries", "hits", "misses", "evictions")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (value, stored_at, expires_at); order = recency (oldest first)
+        self.entries: OrderedDict[str, tuple[object, float, float]] = OrderedDict()
+        # Counted under the shard's lock; FeatureCache sums them
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class FeatureCache:
+    """
+    LRU cache split into shards, each with its own short-held lock (no awaits inside),
+    so lookups for different keys never serialize behind one global lock.
+    Entries expire after their TTL. With `path`, the newest unexpired rows are loaded from SQLite
+    at construction, so a restarted worker comes up warm, and writes are queued to a writer
+    thread (the event loop never waits on the database). The table is kept to max_entries rows
+    by stored_at, with expired rows purged as it is trimmed.
+    """
+
+    def __init__(self, max_entries: int = 50_000, shards: int = 16, path: str | None = None):
+        self.max_entries = max(1, max_entries)
+        self._per_shard = max(1, self.max_entries // shards)
+        self._shards = [_Shard() for _ in range(shards)]
+        self._db = None
+        self._db_queue: queue.Queue = queue.Queue()
+        self._db_writer: threading.Thread | None = None
+        # Trim the table every this many writes, so it stays within ~1.1 × max_entries rows
+        self._trim_every = max(1, self.max_entries // 10)
+        if path:
+            self._open_db(path)
+
+    def _open_db(self, path: str) -> None:
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "k TEXT PRIMARY KEY, v TEXT NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache (stored_at)")
+        self._db = db
+        self._trim()
+        rows = db.execute(
+            "SELECT k, v, stored_at, expires_at FROM cache WHERE expires_at > ? ORDER BY stored_at DESC LIMIT ?",
+            (time.time(), self.max_entries),
+        ).fetchall()
+        # Oldest first, so the newest rows end up most recently used
+        for skey, value, stored_at, expires_at in reversed(rows):
+            self._put(self._shard(skey), skey, (json.loads(value), stored_at, expires_at))
+        self._db_writer = threading.Thread(target=self._write_db, name="feature-cache-writer", daemon=True)
+        self._db_writer.start()
+        # Let CLI runs (build_tiles, benchmarks) persist what is still queued when they exit
+        atexit.register(self.close)
+
+    def _shard(self, skey: str) -> _Shard:
+        return self._shards[hash(skey) % len(self._shards)]
+
+    @property
+    def hits(self) -> int:
+        return sum(s.hits for s in self._shards)
+
+    @property
+    def misses(self) -> int:
+        return sum(s.misses for s in self._shards)
+
+    @property
+    def evictions(self) -> int:
+        return sum(s.evictions for s in self._shards)
+
+    @staticmethod
+    def _skey(namespace: str, key) -> str:
+        return f"{namespace}:{key}"
+
+    def get(self, namespace: str, key):
+        """Return the cached value, or MISS if absent/expired."""
+        hit = self.get_with_age(namespace, key)
+        return hit if hit is MISS else hit[0]
+
+    def get_with_age(self, namespace: str, key):
+        """Return (value, age in seconds), or MISS if absent/expired."""
+        skey = self._skey(namespace, key)
+        now = time.time()
+        shard = self._shard(skey)
+        with shard.lock:
+            entry = shard.entries.get(skey)
+            if entry is not None:
+                if entry[2] > now:
+                    shard.entries.move_to_end(skey)
+                    shard.hits += 1
+                    return entry[0], now - entry[1]
+                del shard.entries[skey]
+            shard.misses += 1
+        return MISS
+
+    def set(self, namespace: str, key, value, ttl: float) -> None:
+        skey = self._skey(namespace, key)
+        now = time.time()
+        entry = (value, now, now + ttl)
+        self._put(self._shard(skey), skey, entry)
+        self._db_set(skey, entry)
+
+    def _put(self, shard: _Shard, skey: str, entry: tuple[object, float, float]) -> None:
+        with shard.lock:
+            shard.entries[skey] = entry
+            shard.entries.move_to_end(skey)
+            while len(shard.entries) > self._per_shard:
+                shard.entries.popitem(last=False)
+                shard.evictions += 1
+
+    def _db_set(self, skey: str, entry: tuple[object, float, float]) -> None:
+        if self._db_writer is not None:
+            self._db_queue.put(("set", (skey, json.dumps(entry[0]), entry[1], entry[2])))
+
+    def _write_db(self) -> None:
+        """Writer thread: commit queued operations in batches, trimming the table as it grows."""
+        writes = 0
+        while True:
+            ops = [self._db_queue.get()]
+            while len(ops) < _DB_BATCH:
+                try:
+                    ops.append(self._db_queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            rows = []
+            try:
+                self._db.execute("BEGIN")
+                for op in ops:
+                    if op is None:
+                        stop = True
+                    elif op[0] == "set":
+                        rows.append(op[1])
+                    else:  # "clear": earlier writes first, then wipe
+                        self._flush_rows(rows)
+                        self._db.execute("DELETE FROM cache")
+                self._flush_rows(rows)
+                self._db.execute("COMMIT")
+                writes += sum(op is not None and op[0] == "set" for op in ops)
+                if writes >= self._trim_every:
+                    writes = 0
+                    self._trim()
+            except sqlite3.Error:
+                logger.exception("feature cache write to SQLite failed")
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+            finally:
+                for _ in ops:
+                    self._db_queue.task_done()
+            if stop:
+                return
+
+    def _flush_rows(self, rows: list[tuple]) -> None:
+        if rows:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO cache (k, v, stored_at, expires_at) VALUES (?, ?, ?, ?)", rows
+            )
+            rows.clear()
+
+    def _trim(self) -> None:
+        """Drop expired rows, then all but the max_entries most recently stored."""
+        self._db.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        self._db.execute(
+            "DELETE FROM cache WHERE k IN (SELECT k FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def flush(self) -> None:
+        """Block until every queued SQLite write is committed."""
+        if self._db_writer is not None:
+            self._db_queue.join()
+
+    def close(self) -> None:
+        """Commit queued writes and stop the writer thread (the in-memory cache keeps working)."""
+        writer, self._db_writer = self._db_writer, None
+        if writer is not None:
+            self._db_queue.put(None)
+            writer.join()
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return sum(len(s.entries) for s in self._shards)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+        if self._db_writer is not None:
+            self._db_queue.put(("clear",))
@@ -0,0 +1,145 @@
+"""
+Response compression middleware: zstd when the client accepts it and the zstandard package is
+installed, else gzip, for bodies of at least COMPRESS_MIN_BYTES. Streamed responses (NDJSON,
+SSE, GeoJSON scans) are compressed chunk by chunk with a flush after each, so events still
+reach the client as they are produced. Responses that already carry a Content-Encoding
+(gzip-stored data tiles) or compressed media (PNG tiles) pass through untouched.
+"""
+import os
+import zlib
+from functools import lru_cache
+
+# Smallest single-body response worth compressing (streams are always compressed)
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+# zstd level 3 and gzip level 6: each library's default speed/ratio trade-off
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+# Media types that are compressed already
+_PRECOMPRESSED = ("image/", "application/gzip", "application/zstd", "application/zip")
+
+
+@lru_cache(maxsize=1)
+def _zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """'zstd', 'gzip' or None for an Accept-Encoding header (q=0 excludes a coding)."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    wildcard = accepted.get("*", 0.0)
+    if accepted.get("zstd", wildcard) > 0 and _zstd_available():
+        return "zstd"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            import zstandard
+
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            # wbits 16 + MAX_WBITS: gzip container rather than raw zlib
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._sync = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._obj.compress(data)
+        return out + (self._obj.flush() if final else self._obj.flush(self._sync))
+
+
+class CompressionMiddleware:
+    """ASGI middleware applying choose_encoding() to HTTP responses (see module docstring)."""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"accept-encoding"), "")
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: _Compressor | None = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if compressor is None:
+                start, start_message = start_message, None
+                headers = {k.lower(): v for k, v in start.get("headers", [])}
+                media_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    b"content-encoding" in headers
+                    or media_type.startswith(_PRECOMPRESSED)
+                    or (not more and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                data = compressor.compress(body, final=not more)
+                await send({**start, "headers": _compressed_headers(start.get("headers", []), encoding, data, more)})
+                await send({"type": "http.response.body", "body": data, "more_body": more})
+                return
+            data = compressor.compress(body, final=not more)
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _compressed_headers(headers, encoding: str, data: bytes, more: bool) -> list[tuple[bytes, bytes]]:
+    out = []
+    vary = None
+    for key, value in headers:
+        name = key.lower()
+        if name == b"content-length":
+            continue
+        if name == b"vary":
+            vary = value
+            continue
+        if name == b"etag" and not value.startswith(b"W/"):
+            # The compressed body is a different representation: only weakly equal to the original
+            value = b"W/" + value
+        out.append((key, value))
+    out.append((b"content-encoding", encoding.encode("latin-1")))
+    if vary is None:
+        vary = b"Accept-Encoding"
+    elif b"accept-encoding" not in vary.lower():
+        vary += b", Accept-Encoding"
+    out.append((b"vary", vary))
+    if not more:
+        out.append((b"content-length", str(len(data)).encode("latin-1")))
+    return out
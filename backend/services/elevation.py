@@ -0,0 +1,96 @@
+"""
+Local elevation provider: SRTM-style .hgt tiles read through memory-mapped arrays,
+with vectorized bilinear sampling. Used before the Open-Elevation HTTP API.
+
+Tiles are named by their south-west corner (e.g. N37W122.hgt covers lat 37..38,
+lon -122..-121) and hold a square big-endian int16 grid (1201² for 3", 3601² for 1"),
+row 0 at the north edge. GeoTIFF DEMs can be converted with
+`gdal_translate -of SRTMHGT in.tif N37W122.hgt`.
+"""
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+# SRTM no-data marker
+_VOID = -32768
+
+
+def tile_name(lat0: int, lon0: int) -> str:
+    """File name of the 1°×1° tile whose south-west corner is (lat0, lon0)."""
+    ns = "N" if lat0 >= 0 else "S"
+    ew = "E" if lon0 >= 0 else "W"
+    return f"{ns}{abs(lat0):02d}{ew}{abs(lon0):03d}.hgt"
+
+
+def write_tile(directory: str | Path, lat0: int, lon0: int, grid: np.ndarray) -> Path:
+    """Write a square elevation grid (row 0 = north edge) as an .hgt tile; returns its path."""
+    grid = np.asarray(grid)
+    if grid.ndim != 2 or grid.shape[0] != grid.shape[1] or grid.shape[0] < 2:
+        raise ValueError("Tile grid must be square and at least 2×2")
+    path = Path(directory) / tile_name(lat0, lon0)
+    np.round(grid).astype(">i2").tofile(path)
+    return path
+
+
+class DemTileStore:
+    """Directory of .hgt tiles, memory-mapped on first use (pages shared across workers)."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self._tiles: dict[tuple[int, int], np.ndarray | None] = {}
+
+    def _tile(self, lat0: int, lon0: int) -> np.ndarray | None:
+        key = (lat0, lon0)
+        if key not in self._tiles:
+            path = self.directory / tile_name(lat0, lon0)
+            tile = None
+            if path.exists():
+                side = math.isqrt(path.stat().st_size // 2)
+                if side * side * 2 == path.stat().st_size and side >= 2:
+                    tile = np.memmap(path, dtype=">i2", mode="r", shape=(side, side))
+            self._tiles[key] = tile
+        return self._tiles[key]
+
+    def sample(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Bilinear elevation (m) at each point; NaN where no tile covers it or data is void."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        out = np.full(lats.shape, np.nan)
+        lat0s = np.floor(lats).astype(np.int64)
+        lon0s = np.floor(lons).astype(np.int64)
+        tile_ids = np.stack([lat0s, lon0s], axis=-1).reshape(-1, 2)
+        for lat0, lon0 in np.unique(tile_ids, axis=0):
+            tile = self._tile(int(lat0), int(lon0))
+            if tile is None:
+                continue
+            idx = np.nonzero((lat0s == lat0) & (lon0s == lon0))
+            n = tile.shape[0] - 1
+            row = (lat0 + 1 - lats[idx]) * n
+            col = (lons[idx] - lon0) * n
+            r0 = np.clip(np.floor(row).astype(np.int64), 0, n - 1)
+            c0 = np.clip(np.floor(col).astype(np.int64), 0, n - 1)
+            fr = row - r0
+            fc = col - c0
+            corners = np.stack([tile[r0, c0], tile[r0, c0 + 1], tile[r0 + 1, c0], tile[r0 + 1, c0 + 1]]).astype(np.float64)
+            weights = np.stack([(1 - fr) * (1 - fc), (1 - fr) * fc, fr * (1 - fc), fr * fc])
+            # A void corner only voids the sample if it contributes (points on a valid node stay valid)
+            void = corners == _VOID
+            values = (np.where(void, 0.0, corners) * weights).sum(axis=0)
+            values[(void & (weights > 0)).any(axis=0)] = np.nan
+            out[idx] = values
+        return out
+
+
+_DEM_DIR = os.getenv("ELEVATION_DEM_DIR")
+_store = DemTileStore(_DEM_DIR) if _DEM_DIR else None
+
+
+def local_elevations(points: list[tuple[float, float]]) -> list[float | None]:
+    """Elevation from local DEM tiles for each (lat, lon); None where unavailable (or no ELEVATION_DEM_DIR)."""
+    if _store is None or not points:
+        return [None] * len(points)
+    lats, lons = zip(*points)
+    values = _store.sample(np.array(lats), np.array(lons))
+    return [None if np.isnan(v) else round(float(v), 2) for v in values]
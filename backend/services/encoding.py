@@ -0,0 +1,135 @@
+"""
+Columnar response encodings for bulk endpoints, picked from the request's Accept header:
+- application/json (default): the usual per-row objects.
+- application/vnd.apache.arrow.stream: Arrow IPC stream with one record batch; float32 score
+  columns, dictionary-encoded text columns. Needs pyarrow.
+- application/msgpack: {"count": N, "columns": {name: column}}. Numeric columns are
+  {"dtype": "<f4", "data": <bin>} (np.frombuffer(data, dtype) on the client); text columns are
+  {"codes": <numeric column>, "categories": [...]}. Needs msgpack.
+Formats whose package is not installed are not offered (a request for only those gets 406).
+
+A table is a dict of column name -> 1-D numpy array, or Categorical for label-like text.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+JSON = "application/json"
+ARROW = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+# Served as the JSON format by endpoints whose JSON body is GeoJSON (negotiate(..., geojson=True))
+GEOJSON = "application/geo+json"
+
+# Accepted spellings -> canonical media type
+_ALIASES = {
+    JSON: JSON,
+    ARROW: ARROW,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+
+class Categorical:
+    """Text column as integer codes into categories (labels repeat across millions of rows)."""
+
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes: np.ndarray, categories: list[str]):
+        self.codes = codes
+        self.categories = categories
+
+
+@lru_cache(maxsize=None)
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def available_media_types() -> list[str]:
+    """Media types this server can produce, JSON first."""
+    required = {ARROW: "pyarrow", MSGPACK: "msgpack"}
+    return [JSON] + [media for media, module in required.items() if _installed(module)]
+
+
+def negotiate(accept: str | None, geojson: bool = False) -> str | None:
+    """
+    Media type to answer with for an Accept header, None when nothing acceptable can be produced
+    (406). Each available type takes the q of its most specific matching range (exact type, then
+    application/*, then */*), so "application/json;q=0, */*" excludes JSON. The highest q wins;
+    ties go to the range listed first, then to available_media_types() order (JSON first).
+    A missing header means JSON. With geojson, application/geo+json counts as JSON.
+    """
+    if not accept:
+        return JSON
+    ranges: dict[str, tuple[float, int]] = {}
+    for position, part in enumerate(accept.split(",")):
+        media, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media = media.lower()
+        if geojson and media == GEOJSON:
+            media = JSON
+        ranges.setdefault(_ALIASES.get(media, media), (q, position))
+    best = None
+    for rank, media in enumerate(available_media_types()):
+        q, position = next((ranges[r] for r in (media, "application/*", "*/*") if r in ranges), (0.0, 0))
+        if q > 0 and (best is None or (-q, position, rank) < best[0]):
+            best = ((-q, position, rank), media)
+    return best[1] if best else None
+
+
+def encode_table(table: dict[str, object], media_type: str) -> bytes:
+    """Serialize a table as ARROW or MSGPACK."""
+    if media_type == ARROW:
+        return _arrow(table)
+    if media_type == MSGPACK:
+        return _msgpack(table)
+    raise ValueError(f"Unsupported table media type '{media_type}'")
+
+
+def _arrow(table: dict[str, object]) -> bytes:
+    import pyarrow as pa
+
+    arrays = [
+        pa.DictionaryArray.from_arrays(pa.array(col.codes), pa.array(col.categories))
+        if isinstance(col, Categorical) else pa.array(col)
+        for col in table.values()
+    ]
+    batch = pa.record_batch(arrays, names=list(table))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def _typed(values: np.ndarray) -> dict:
+    # dtype.str carries the byte order ("<f4"), so any client can rebuild the array
+    return {"dtype": values.dtype.str, "data": np.ascontiguousarray(values).tobytes()}
+
+
+def _msgpack(table: dict[str, object]) -> bytes:
+    import msgpack
+
+    columns = {
+        name: {"codes": _typed(col.codes), "categories": list(col.categories)}
+        if isinstance(col, Categorical) else _typed(col)
+        for name, col in table.items()
+    }
+    return msgpack.packb({"count": _rows(table), "columns": columns}, use_bin_type=True)
+
+
+def _rows(table: dict[str, object]) -> int:
+    first = next(iter(table.values()), None)
+    if first is None:
+        return 0
+    return len(first.codes if isinstance(first, Categorical) else first)
@@ -0,0 +1,212 @@
+"""
+Prediction explanations, cheap enough to include in every /api/predict response:
+- key_factors: path attribution of survivability through the RandomForest (each split on the
+  way to a leaf credits its feature with the change in P(healthy or very_healthy)), vectorized
+  over the compiled forest arrays; no per-request SHAP.
+- similar: the k nearest training samples (standardized 7-feature space, KD-tree over
+  Features&Labels.csv) and their health classes. The index is built once and cached on disk.
+  Queries are clipped to the training range first (live soil proxies sit far outside it and
+  would otherwise pick the neighbors alone), and rows whose nearest sample is still farther than
+  the neighbor distance limit get none.
+"""
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+try:
+    from backend.services.forest import CompiledForest, compile_forest
+except ImportError:
+    from services.forest import CompiledForest, compile_forest
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+_TRAINING_CSV = _BACKEND_DIR / "Features&Labels.csv"
+# Standardized training matrix + KD-tree; rebuilt when the CSV is newer
+_INDEX_PATH = Path(os.getenv("NEIGHBOR_INDEX_PATH", str(_BACKEND_DIR / "tree_health_neighbors.joblib")))
+
+# Training samples returned per prediction (0 disables the neighbor lookup)
+NEIGHBORS_K = int(os.getenv("EXPLAIN_NEIGHBORS", "5"))
+# Standardized distance beyond which a row has no similar samples; unset uses the index's own
+# limit (the largest distance from any training sample to its nearest other sample)
+_MAX_DISTANCE = os.getenv("EXPLAIN_NEIGHBORS_MAX_DISTANCE")
+NEIGHBORS_MAX_DISTANCE = float(_MAX_DISTANCE) if _MAX_DISTANCE else None
+# key_factors entries per prediction, and the smallest |contribution| worth mentioning
+TOP_FACTORS = 3
+_MIN_CONTRIBUTION = 0.005
+
+_INDEX_FEATURES = ["elevation", "temperature", "humidity", "soil_TN", "soil_TP", "soil_AP", "soil_AN"]
+# Bumped when the cached index layout changes, so older caches are rebuilt
+_INDEX_VERSION = 2
+
+# Display name and unit for key_factors text
+_DISPLAY = {
+    "elevation": ("Elevation", " m"),
+    "temperature": ("Temperature", " °C"),
+    "humidity": ("Humidity", "%"),
+    "soil_TN": ("Soil total nitrogen", ""),
+    "soil_TP": ("Soil total phosphorus", ""),
+    "soil_AP": ("Soil available phosphorus", ""),
+    "soil_AN": ("Soil available nitrogen", ""),
+}
+
+_index: dict | None = None
+_index_lock = threading.Lock()
+# model name -> (CompiledForest, per-node survivability path attributions) or None when the
+# model is not a forest
+_attribution: dict[str, tuple[CompiledForest, np.ndarray] | None] = {}
+
+
+def _build_index() -> dict:
+    import pandas as pd
+    from scipy.spatial import cKDTree
+
+    df = pd.read_csv(_TRAINING_CSV)
+    X = df[_INDEX_FEATURES].to_numpy(dtype=np.float64)
+    mean = X.mean(axis=0)
+    std = X.std(axis=0)
+    std[std == 0] = 1.0
+    tree = cKDTree((X - mean) / std)
+    # k=2: the first hit is the sample itself
+    nearest = tree.query(tree.data, k=2)[0][:, 1]
+    return {
+        "version": _INDEX_VERSION,
+        "features": list(_INDEX_FEATURES),
+        "mean": mean,
+        "std": std,
+        "min": X.min(axis=0),
+        "max": X.max(axis=0),
+        "max_distance": float(nearest.max()),
+        "X": X,
+        "health_class": df["health_class"].to_numpy(dtype=np.int64),
+        "tree": tree,
+    }
+
+
+def _load_index() -> dict | None:
+    """Cached index, loading or (re)building it on first use; None if there is no training CSV."""
+    global _index
+    if _index is not None or not _TRAINING_CSV.exists():
+        return _index
+    with _index_lock:
+        if _index is None:
+            if _INDEX_PATH.exists() and _INDEX_PATH.stat().st_mtime >= _TRAINING_CSV.stat().st_mtime:
+                try:
+                    cached = joblib.load(_INDEX_PATH)
+                except Exception as e:
+                    logger.warning("Ignoring unreadable neighbor index at %s: %s", _INDEX_PATH, e)
+                else:
+                    if isinstance(cached, dict) and cached.get("version") == _INDEX_VERSION:
+                        _index = cached
+            if _index is None:
+                _index = _build_index()
+                _save_index(_index)
+    return _index
+
+
+def _save_index(index: dict) -> None:
+    """Write the cache via a temp file in the same directory + os.replace, so concurrent workers
+    never load a half-written file; a read-only tree just means the index is rebuilt per process."""
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=_INDEX_PATH.parent, prefix=_INDEX_PATH.name + ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            joblib.dump(index, f)
+        os.replace(tmp, _INDEX_PATH)
+    except OSError as e:
+        logger.warning("Could not cache neighbor index at %s: %s", _INDEX_PATH, e)
+        if tmp is not None and os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def warm_up() -> None:
+    _load_index()
+
+
+def similar_samples(X: np.ndarray, feature_names: list[str], labels: dict[int, str]) -> list[list[dict]]:
+    """
+    For each row, the NEIGHBORS_K closest training samples (health class, distance, features),
+    or [] when even the nearest is farther than the distance limit (nothing comparable to show).
+    """
+    index = _load_index() if NEIGHBORS_K > 0 else None
+    if index is None:
+        return [[] for _ in range(len(X))]
+    columns = [feature_names.index(name) for name in index["features"]]
+    query = (np.clip(X[:, columns], index["min"], index["max"]) - index["mean"]) / index["std"]
+    k = min(NEIGHBORS_K, len(index["X"]))
+    distances, rows = index["tree"].query(query, k=k)
+    distances = distances.reshape(len(X), k)
+    rows = rows.reshape(len(X), k)
+    limit = NEIGHBORS_MAX_DISTANCE if NEIGHBORS_MAX_DISTANCE is not None else index["max_distance"]
+    class_labels, samples = _sample_payloads(index, labels)
+    return [
+        [
+            {"label": class_labels[j], "distance": round(d, 4), "features": samples[j]}
+            for d, j in zip(dist, idx)
+        ]
+        if dist[0] <= limit else []
+        for dist, idx in zip(distances.tolist(), rows.tolist())
+    ]
+
+
+def _sample_payloads(index: dict, labels: dict[int, str]) -> tuple[list[str], list[dict]]:
+    # Built once per process; the feature dicts are shared between responses (read-only)
+    if "samples" not in index:
+        index["class_labels"] = [labels.get(c, f"class_{c}") for c in index["health_class"].tolist()]
+        index["samples"] = [dict(zip(index["features"], row)) for row in index["X"].tolist()]
+    return index["class_labels"], index["samples"]
+
+
+def _forest_attribution(model, name: str, surv_classes: list[int]):
+    if name not in _attribution:
+        forest = model
+        if not isinstance(forest, CompiledForest):
+            estimators = getattr(model, "estimators_", None)
+            forest = (
+                CompiledForest(compile_forest(model))
+                if estimators and all(hasattr(e, "tree_") for e in estimators)
+                else None
+            )
+        _attribution[name] = (
+            None if forest is None
+            else (forest, forest.path_contributions(forest.value[..., surv_classes].sum(axis=-1).reshape(-1)))
+        )
+    return _attribution[name]
+
+
+def contributions(model, name: str, X: np.ndarray, surv_classes: list[int]) -> np.ndarray | None:
+    """(N, F) survivability contribution per model feature, or None for non-forest models."""
+    attribution = _forest_attribution(model, name, surv_classes)
+    if attribution is None:
+        return None
+    forest, path = attribution
+    return forest.contributions(X, path)
+
+
+def key_factors(
+    X: np.ndarray, contrib: np.ndarray, feature_names: list[str], imputed: np.ndarray | None = None
+) -> list[list[str]]:
+    """
+    Top TOP_FACTORS features by |contribution| per row, as short sentences. Cells marked in
+    imputed (N×F bool, filled with training medians) are quoted as defaults, not as inputs.
+    """
+    if imputed is None:
+        imputed = np.zeros(X.shape, dtype=bool)
+    out = []
+    for row, scores, defaults in zip(X.tolist(), contrib.tolist(), imputed.tolist()):
+        order = sorted(range(len(scores)), key=lambda j: -abs(scores[j]))
+        factors = []
+        for j in order[:TOP_FACTORS]:
+            if abs(scores[j]) < _MIN_CONTRIBUTION:
+                break
+            label, unit = _DISPLAY.get(feature_names[j], (feature_names[j], ""))
+            value = f"(not given; default {row[j]:.4g}{unit})" if defaults[j] else f"{row[j]:.4g}{unit}"
+            direction = "raises" if scores[j] > 0 else "lowers"
+            factors.append(f"{label} {value} {direction} survivability ({scores[j] * 100:+.0f} pts)")
+        out.append(factors)
+    return out
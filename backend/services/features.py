@@ -0,0 +1,170 @@
+"""
+Columnar feature assembly: turn arrays of raw upstream values (NaN = missing) into the
+N×12 feature matrix (FEATURE_NAMES order) plus an N×12 source-code matrix in one pass.
+Proxies and medians match the per-point rules used for /api/fetch-features exactly,
+including Python's round(x, 4), so responses built from here are identical.
+"""
+import numpy as np
+
+# Feature names matching model (exact casing)
+FEATURE_NAMES = [
+    "Slope",
+    "Elevation",
+    "Temperature",
+    "Humidity",
+    "Soil_TN",
+    "Soil_TP",
+    "Soil_AP",
+    "Soil_AN",
+    "Menhinick_Index",
+    "Gleason_Index",
+    "Disturbance_Level",
+    "Fire_Risk_Index",
+]
+
+# Medians from forest_health_data_with_target.csv (for default/fallback)
+MEDIANS = {
+    "Slope": 21.808936091032585,
+    "Elevation": 1503.5730226128198,
+    "Temperature": 21.754533316862897,
+    "Humidity": 59.614943703539744,
+    "Soil_TN": 0.5113024573782637,
+    "Soil_TP": 0.24975360936595653,
+    "Soil_AP": 0.24747083523271096,
+    "Soil_AN": 0.24380308068303527,
+    "Menhinick_Index": 1.7524116930921474,
+    "Gleason_Index": 2.9693736440949037,
+    "Disturbance_Level": 0.5230227736391104,
+    "Fire_Risk_Index": 0.5164885287315552,
+}
+
+# Source codes in the source matrix
+API, DEFAULT, PROXY = 0, 1, 2
+SOURCE_LABELS = ("api", "default", "proxy")
+
+# snake_case response key per column, and the response's key order
+RESPONSE_KEYS = [name.lower() for name in FEATURE_NAMES]
+_RESPONSE_ORDER = [
+    "elevation", "temperature", "humidity", "soil_tn", "soil_tp", "soil_ap", "soil_an",
+    "fire_risk_index", "slope", "menhinick_index", "gleason_index", "disturbance_level",
+]
+_COLUMN = {key: i for i, key in enumerate(RESPONSE_KEYS)}
+_RESPONSE_COLUMNS = [(key, _COLUMN[key]) for key in _RESPONSE_ORDER]
+_MEDIAN_ROW = np.array([MEDIANS[name] for name in FEATURE_NAMES], dtype=np.float64)
+
+# Baseline for nitrogen amplification; factor 10 preserves gradient while making ~0.01 visible
+_NITROGEN_BASELINE = 0.51
+_NITROGEN_AMPLIFY = 10
+
+
+def round4(values: np.ndarray) -> np.ndarray:
+    """Elementwise round(x, 4) with Python's result: np.round, re-done in Python near .5 ties."""
+    out = np.round(values, 4)
+    scaled = values * 1e4
+    near_tie = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in near_tie:
+        out.flat[i] = round(float(values.flat[i]), 4)
+    return out
+
+
+def _or_median(values: np.ndarray, name: str) -> np.ndarray:
+    return np.where(np.isnan(values), MEDIANS[name], values)
+
+
+def _clip(values: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    # + 0.0 turns -0.0 into 0.0, as max(0, -0.0) does in the scalar rules
+    return np.clip(values, lo, hi) + 0.0
+
+
+def climate_nitrogen_proxy(
+    elevation: np.ndarray, temperature: np.ndarray, humidity: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Estimate soil TN and AN from climate when SoilGrids returns null.
+    Warmer/wetter → higher N (more mineralization, organic matter).
+    Higher elevation → lower N (cooler, less vegetation).
+    Returns (soil_tn, soil_an) in training range [0.01, 0.22].
+    """
+    elev = _clip(_or_median(elevation, "Elevation"), 0, 5000)
+    temp = _clip(_or_median(temperature, "Temperature"), -20, 50)
+    humid = _clip(_or_median(humidity, "Humidity"), 0, 100)
+    # Base ~0.08; +temp/humidity; -elevation. Output in training range [0.01, 0.22].
+    soil_tn = 0.08 + 0.003 * (temp - 15) + 0.001 * (humid - 50) - 0.00001 * elev
+    soil_tn = round4(np.clip(soil_tn, 0.01, 0.22))
+    soil_an = round4(soil_tn * 0.033)  # AN/TN ~0.033 from training
+    return soil_tn, soil_an
+
+
+def amplify_nitrogen(raw_tn: np.ndarray) -> np.ndarray:
+    """Amplify small nitrogen differences for visible variation; preserve gradient. Clamp to [0.1, 1.0]."""
+    amplified = _NITROGEN_BASELINE + (raw_tn - _NITROGEN_BASELINE) * _NITROGEN_AMPLIFY
+    return round4(np.clip(amplified, 0.1, 1.0))
+
+
+def fire_risk_proxy(temperature: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """Simple proxy: (1 - humidity/100) * min(1, temp/40), normalized to [0,1]."""
+    h = _clip(_or_median(humidity, "Humidity"), 0, 100) / 100.0
+    t = _clip(_or_median(temperature, "Temperature"), 0, 50) / 40.0
+    raw = (1.0 - h) * np.minimum(1.0, t)
+    return round4(np.clip(raw, 0.0, 1.0))
+
+
+def assemble_features(
+    elevation: np.ndarray,
+    temperature: np.ndarray,
+    humidity: np.ndarray,
+    soil_tn: np.ndarray,
+    soil_tp: np.ndarray,
+    soil_ap: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (N×12 feature matrix, N×12 uint8 source codes) from raw upstream arrays, NaN = missing.
+    Missing soil TN gets the climate proxy; soil AN is always TN × 0.033 (AN/TN from training);
+    other missing values get training medians.
+    """
+    elevation, temperature, humidity, soil_tn, soil_tp, soil_ap = (
+        np.asarray(a, dtype=np.float64) for a in (elevation, temperature, humidity, soil_tn, soil_tp, soil_ap)
+    )
+    n = len(elevation)
+    X = np.tile(_MEDIAN_ROW, (n, 1))
+    sources = np.full((n, len(FEATURE_NAMES)), DEFAULT, dtype=np.uint8)
+
+    for key, values in (
+        ("elevation", elevation), ("temperature", temperature), ("humidity", humidity),
+        ("soil_tp", soil_tp), ("soil_ap", soil_ap),
+    ):
+        present = ~np.isnan(values)
+        X[present, _COLUMN[key]] = values[present]
+        sources[present, _COLUMN[key]] = API
+
+    # Climate-based nitrogen fallback when SoilGrids returns null (location-varying)
+    climate = np.isnan(soil_tn)
+    tn = soil_tn.copy()
+    if climate.any():
+        tn[climate] = climate_nitrogen_proxy(elevation[climate], temperature[climate], humidity[climate])[0]
+    X[:, _COLUMN["soil_tn"]] = tn
+    X[:, _COLUMN["soil_an"]] = round4(tn * 0.033)
+    for key in ("soil_tn", "soil_an"):
+        sources[:, _COLUMN[key]] = np.where(climate, PROXY, API)
+
+    X[:, _COLUMN["fire_risk_index"]] = fire_risk_proxy(temperature, humidity)
+    sources[:, _COLUMN["fire_risk_index"]] = PROXY
+    return X, sources
+
+
+def model_columns(feature_names: list[str]) -> list[int]:
+    """Column index in the assembled matrix for each model feature name (e.g. soil_TN)."""
+    return [_COLUMN[name.lower()] for name in feature_names]
+
+
+def responses(X: np.ndarray, sources: np.ndarray, degraded: list[list[str]] | None = None) -> list[dict]:
+    """Per-row /api/fetch-features response dicts (snake_case values, 'source' map, 'degraded')."""
+    rows = X.tolist()
+    codes = sources.tolist()
+    out = []
+    for i, (row, code) in enumerate(zip(rows, codes)):
+        response = {key: row[j] for key, j in _RESPONSE_COLUMNS}
+        response["source"] = {key: SOURCE_LABELS[c] for key, c in zip(RESPONSE_KEYS, code)}
+        response["degraded"] = list(degraded[i]) if degraded else []
+        out.append(response)
+    return out
@@ -1,44 +1,39 @@
 """
 Auto-fetch service: Open-Meteo, Open-Elevation, SoilGrids, fire proxy, medians.
-Cache by (round(lat, 2), round(lon, 2)).
+Each upstream result is cached separately under a geohash cell sized to that source's resolution
+(SOURCE_PRECISION), with its own TTL; a point's features are composed from its three cells.
 """
 import asyncio
-from functools import lru_cache
-from pathlib import Path
+import os
+from collections import Counter
 
 import httpx
-
-# Feature names matching model (exact casing)
-FEATURE_NAMES = [
-    "Slope",
-    "Elevation",
-    "Temperature",
-    "Humidity",
-    "Soil_TN",
-    "Soil_TP",
-    "Soil_AP",
-    "Soil_AN",
-    "Menhinick_Index",
-    "Gleason_Index",
-    "Disturbance_Level",
-    "Fire_Risk_Index",
-]
-
-# Medians from forest_health_data_with_target.csv (for default/fallback)
-MEDIANS = {
-    "Slope": 21.808936091032585,
-    "Elevation": 1503.5730226128198,
-    "Temperature": 21.754533316862897,
-    "Humidity": 59.614943703539744,
-    "Soil_TN": 0.5113024573782637,
-    "Soil_TP": 0.24975360936595653,
-    "Soil_AP": 0.24747083523271096,
-    "Soil_AN": 0.24380308068303527,
-    "Menhinick_Index": 1.7524116930921474,
-    "Gleason_Index": 2.9693736440949037,
-    "Disturbance_Level": 0.5230227736391104,
-    "Fire_Risk_Index": 0.5164885287315552,
-}
+import numpy as np
+
+try:
+    from backend.services import geohash
+    from backend.services.cache import MISS, FeatureCache
+    from backend.services.elevation import local_elevations
+    from backend.services.features import (  # noqa: F401 (FEATURE_NAMES, MEDIANS re-exported)
+        FEATURE_NAMES, MEDIANS, RESPONSE_KEYS, SOURCE_LABELS, assemble_features, responses,
+    )
+    from backend.services.http_client import get_client
+    from backend.services.metrics import FEATURE_RESPONSES, FEATURE_SOURCES, register_cache
+    from backend.services.singleflight import SingleFlight
+    from backend.services.soil import local_soil, soil_features_from_means, soil_layer_means
+    from backend.services.upstream import UPSTREAMS
+except ImportError:
+    from services import geohash
+    from services.cache import MISS, FeatureCache
+    from services.elevation import local_elevations
+    from services.features import (  # noqa: F401 (FEATURE_NAMES, MEDIANS re-exported)
+        FEATURE_NAMES, MEDIANS, RESPONSE_KEYS, SOURCE_LABELS, assemble_features, responses,
+    )
+    from services.http_client import get_client
+    from services.metrics import FEATURE_RESPONSES, FEATURE_SOURCES, register_cache
+    from services.singleflight import SingleFlight
+    from services.soil import local_soil, soil_features_from_means, soil_layer_means
+    from services.upstream import UPSTREAMS
 
 # Keys that come from APIs (snake_case in response)
 API_KEYS = [
@@ -53,267 +48,549 @@ API_KEYS = [
 ]
 
 
-def _cache_key(lat: float, lon: float) -> tuple[float, float]:
-    return (round(lat, 3), round(lon, 3))
+# Model features whose source tag is counted (fire_risk_index is always a proxy)
+_MODEL_SOURCE_KEYS = ("elevation", "temperature", "humidity", "soil_tn", "soil_tp", "soil_ap", "soil_an")
+
+
+def _record_sources(response: dict) -> None:
+    fallback = False
+    for feature in _MODEL_SOURCE_KEYS:
+        source = response["source"][feature]
+        FEATURE_SOURCES.inc(feature=feature, source=source)
+        fallback = fallback or source != "api"
+    FEATURE_RESPONSES.inc(fallback=str(fallback).lower())
+
+
+def _record_source_codes(sources: np.ndarray) -> None:
+    """_record_sources for a whole source-code matrix (one row per response)."""
+    if len(sources) == 0:
+        return
+    columns = [RESPONSE_KEYS.index(feature) for feature in _MODEL_SOURCE_KEYS]
+    codes = sources[:, columns]
+    for feature, column in zip(_MODEL_SOURCE_KEYS, codes.T):
+        for code, count in enumerate(np.bincount(column, minlength=len(SOURCE_LABELS))):
+            if count:
+                FEATURE_SOURCES.inc(int(count), feature=feature, source=SOURCE_LABELS[code])
+    fallback = int((codes != 0).any(axis=1).sum())
+    FEATURE_RESPONSES.inc(fallback, fallback="true")
+    FEATURE_RESPONSES.inc(len(codes) - fallback, fallback="false")
+
+
+# Geohash precision each source is cached at, matched to the data: Open-Meteo's grid is
+# kilometres (5 ≈ 4.9 km), SoilGrids is 250 m (7 ≈ 153 m), elevation ~30 m (8 ≈ 38 × 19 m).
+# Nearby points share the coarse weather/soil cells and only miss on elevation.
+SOURCE_PRECISION = {
+    "weather": 5,
+    "elevation": 8,
+    "soil": 7,
+}
+_POINT_PRECISION = max(SOURCE_PRECISION.values())
+
 
+def _source_keys(lat: float, lon: float) -> tuple[str, dict[str, str]]:
+    """(point key at the finest precision, {source: geohash cell}); cells nest, so one encode gives all."""
+    point = geohash.encode(float(lat), float(lon), _POINT_PRECISION)
+    return point, {source: point[:precision] for source, precision in SOURCE_PRECISION.items()}
+
+
+# Per-source cache keyed by geohash cell (upstreams are queried at the cell center, so a cached
+# value is the same whichever point missed first). Bounded LRU; set FEATURE_CACHE_PATH to a
+# SQLite file to keep entries across restarts (loaded at import, written behind, same bound).
+_feature_cache = FeatureCache(
+    max_entries=int(os.getenv("FEATURE_CACHE_MAX_ENTRIES", "50000")),
+    path=os.getenv("FEATURE_CACHE_PATH") or None,
+)
+register_cache("features", _feature_cache)
+
+# Max seconds each source is served from cache: weather changes daily, elevation and soil are static
+SOURCE_TTLS = {
+    "weather": 24 * 3600,
+    "elevation": 30 * 86400,
+    "soil": 30 * 86400,
+}
+# Stale-while-revalidate: past this age a cached value is still returned, and refreshed in the background
+SOURCE_REFRESH_AFTER = {
+    "weather": 3 * 3600,
+}
+# Failed lookups (values carrying "error") are cached briefly so a down upstream is retried soon
+FAILURE_TTL = 300
 
-# In-memory cache for fetch results keyed by (lat, lon) rounded to 0.001° (~100m)
-_fetch_cache: dict[tuple[float, float], dict] = {}
-_cache_lock = asyncio.Lock()
+# Concurrent misses on the same point, or the same (source, cell), share one in-flight fetch
+_point_flights = SingleFlight()
+_source_flights = SingleFlight()
 
+# Background refresh tasks (referenced so they are not garbage-collected mid-flight)
+_background: set[asyncio.Task] = set()
 
-async def _open_meteo(client: httpx.AsyncClient, lat: float, lon: float) -> tuple[float | None, float | None]:
-    """Fetch temperature (°C) and relative humidity (%). Uses daily max temp (expected high) for better desert/daytime representation; falls back to current. Humidity from current."""
-    url = "https://api.open-meteo.com/v1/forecast"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
+# Point-lookup frequency per weather cell, for the prefetch worker (decayed every prefetch round,
+# and whenever a new cell would push it past _MAX_TRACKED_CELLS, so it is bounded without prefetch)
+_access_counts: Counter[str] = Counter()
+_MAX_TRACKED_CELLS = 10_000
+
+
+_OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+_OPEN_ELEVATION_URL = "https://api.open-elevation.com/api/v1/lookup"
+
+# Max coordinates per multi-point request (keeps URLs well under upstream length limits)
+OPEN_METEO_BATCH = 100
+OPEN_ELEVATION_BATCH = 100
+
+
+def _open_meteo_params(lats: str, lons: str) -> dict:
+    return {
+        "latitude": lats,
+        "longitude": lons,
         "current": "temperature_2m,relative_humidity_2m",
         "daily": "temperature_2m_max,temperature_2m_mean",
         "timezone": "auto",
         "forecast_days": 1,
     }
-    try:
-        r = await client.get(url, params=params, timeout=6.0)
-        r.raise_for_status()
-        data = r.json()
-        # Prefer daily max (expected high for the day) so desert/daytime heat is represented
-        daily = data.get("daily") or {}
-        max_temps = daily.get("temperature_2m_max") or []
-        temp = float(max_temps[0]) if max_temps else None
-        if temp is None:
-            cur = data.get("current") or {}
-            temp = cur.get("temperature_2m")
-            temp = float(temp) if temp is not None else None
+
+
+def _parse_open_meteo(data: dict) -> tuple[float | None, float | None]:
+    """(temperature, humidity) from one Open-Meteo location object."""
+    # Prefer daily max (expected high for the day) so desert/daytime heat is represented
+    daily = data.get("daily") or {}
+    max_temps = daily.get("temperature_2m_max") or []
+    temp = float(max_temps[0]) if max_temps and max_temps[0] is not None else None
+    if temp is None:
         cur = data.get("current") or {}
-        humidity = cur.get("relative_humidity_2m")
-        humidity = float(humidity) if humidity is not None else None
-        return (temp, humidity)
-    except Exception:
-        return (None, None)
+        temp = cur.get("temperature_2m")
+        temp = float(temp) if temp is not None else None
+    cur = data.get("current") or {}
+    humidity = cur.get("relative_humidity_2m")
+    humidity = float(humidity) if humidity is not None else None
+    return (temp, humidity)
 
 
-async def _open_elevation(client: httpx.AsyncClient, lat: float, lon: float) -> float | None:
-    """Fetch elevation (m) for a point."""
-    url = "https://api.open-elevation.com/api/v1/lookup"
-    params = {"locations": f"{lat},{lon}"}
-    try:
-        r = await client.get(url, params=params, timeout=6.0)
-        r.raise_for_status()
-        data = r.json()
-        results = data.get("results") or []
-        if results:
-            return float(results[0].get("elevation", 0))
-        return None
-    except Exception:
-        return None
+async def _open_meteo(client: httpx.AsyncClient, points: list[tuple[float, float]]) -> list[dict]:
+    """
+    Fetch temperature (°C) and relative humidity (%) for many points: comma-separated coordinate
+    lists, one request per chunk. Uses daily max temp (expected high) for better desert/daytime
+    representation; falls back to current. Humidity from current.
+    Returns one weather dict per point; failed chunks carry "error".
+    """
+    async def chunk(pts: list[tuple[float, float]]) -> list[dict]:
+        params = _open_meteo_params(
+            ",".join(str(la) for la, _ in pts), ",".join(str(lo) for _, lo in pts)
+        )
+        try:
+            r = await UPSTREAMS["open_meteo"].get(client, _OPEN_METEO_URL, params=params)
+            data = r.json()
+            # A single coordinate comes back as an object, several as a list in request order
+            items = data if isinstance(data, list) else [data]
+            if len(items) != len(pts):
+                raise ValueError("Open-Meteo returned a different number of locations")
+            return [dict(zip(("temperature", "humidity"), _parse_open_meteo(item))) for item in items]
+        except Exception as e:
+            return [{"temperature": None, "humidity": None, "error": str(e)} for _ in pts]
+
+    results = await asyncio.gather(*(chunk(c) for c in _chunks(points, OPEN_METEO_BATCH)))
+    return [value for part in results for value in part]
+
+
+async def _open_elevation(client: httpx.AsyncClient, points: list[tuple[float, float]]) -> list[dict]:
+    """
+    Fetch elevation (m) for many points: `locations` joined with '|', one request per chunk.
+    Returns one elevation dict per point; failed chunks carry "error".
+    """
+    async def chunk(pts: list[tuple[float, float]]) -> list[dict]:
+        params = {"locations": "|".join(f"{la},{lo}" for la, lo in pts)}
+        try:
+            r = await UPSTREAMS["open_elevation"].get(client, _OPEN_ELEVATION_URL, params=params)
+            results = r.json().get("results") or []
+            if len(results) != len(pts):
+                raise ValueError("Open-Elevation returned a different number of locations")
+            return [{"elevation": float(item.get("elevation", 0))} for item in results]
+        except Exception as e:
+            return [{"elevation": None, "error": str(e)} for _ in pts]
+
+    results = await asyncio.gather(*(chunk(c) for c in _chunks(points, OPEN_ELEVATION_BATCH)))
+    return [value for part in results for value in part]
+
+
+async def _elevations(client: httpx.AsyncClient, points: list[tuple[float, float]]) -> list[dict]:
+    """Elevation from local DEM tiles (ELEVATION_DEM_DIR) first; Open-Elevation only for uncovered points."""
+    out: list[dict | None] = [None if v is None else {"elevation": v} for v in local_elevations(points)]
+    todo = [i for i, v in enumerate(out) if v is None]
+    if todo:
+        fetched = await _open_elevation(client, [points[i] for i in todo])
+        for i, v in zip(todo, fetched):
+            out[i] = v
+    return out
+
+
+def _chunks(items: list, size: int) -> list[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
 
 
 def _parse_soilgrids_response(data: dict) -> tuple[dict, float | None]:
     """Parse SoilGrids response; return (out dict, soc_g_kg for fallbacks)."""
-    out = {"soil_tn": None, "soil_tp": None, "soil_ap": None, "soil_an": None}
-    soc_g_kg = None
-    props = data.get("properties") or {}
-    layers = props.get("layers") or []
-    for layer in layers:
-        name = (layer.get("name") or "").lower()
-        depths = layer.get("depths") or []
-        vals = []
-        for d in depths:
-            values = d.get("values") or {}
-            v = values.get("mean") or values.get("Q0.5")
-            if v is not None:
-                vals.append(float(v))
-        if not vals:
-            continue
-        mean_val = sum(vals) / len(vals)
-        if "nitrogen" in name or "n_total" in name:
-            # SoilGrids N is cg/kg; mean_val/100 = g/kg. Map to training range [0.01, 0.25].
-            # Training soil_TN ~0.01–0.22; 100 cg/kg ≈ 0.1 in training scale.
-            raw_g_kg = mean_val / 100.0
-            soil_tn = min(0.25, max(0.01, raw_g_kg * 0.12))
-            out["soil_tn"] = round(soil_tn, 4)
-            out["soil_an"] = round(soil_tn * 0.033, 4)  # AN/TN ~0.033 from training
-        elif "soc" in name or "organic_carbon" in name:
-            soc_g_kg = mean_val / 10.0
-            soil_p = min(1.0, max(0.05, soc_g_kg * 0.012))
-            out["soil_tp"] = round(soil_p, 4)
-            out["soil_ap"] = round(soil_p * 0.95, 4)
-    if out["soil_tn"] is None and soc_g_kg is not None and soc_g_kg > 0:
-        # SOC g/kg; C:N ~10:1 so N ≈ soc/10 g/kg. Map to training range [0.01, 0.25].
-        soil_tn_proxy = min(0.25, max(0.01, soc_g_kg * 0.002))
-        out["soil_tn"] = round(soil_tn_proxy, 4)
-        out["soil_an"] = round(soil_tn_proxy * 0.033, 4)
-    return out, soc_g_kg
+    return soil_features_from_means(*soil_layer_means(data))
 
 
 async def _soilgrids(client: httpx.AsyncClient, lat: float, lon: float) -> dict[str, float | None]:
-    """Fetch SoilGrids nitrogen + SOC. Single call (5/min limit)."""
+    """Fetch SoilGrids nitrogen + SOC. Single call (5/min limit); failures carry "error"."""
     url = "https://rest.isric.org/soilgrids/v2.0/properties/query"
     out = {"soil_tn": None, "soil_tp": None, "soil_ap": None, "soil_an": None}
     try:
         params = {"lat": lat, "lon": lon, "property": ["nitrogen", "soc"]}
-        r = await client.get(url, params=params, timeout=10.0)
-        r.raise_for_status()
+        r = await UPSTREAMS["soilgrids"].get(client, url, params=params)
         data = r.json()
         parsed, _ = _parse_soilgrids_response(data)
         out.update(parsed)
-    except Exception:
-        pass
+    except Exception as e:
+        out["error"] = str(e)
     return out
 
 
-def _climate_nitrogen_proxy(
-    elevation: float | None,
-    temperature: float | None,
-    humidity: float | None,
-) -> tuple[float, float]:
+async def _soil(client: httpx.AsyncClient, lat: float, lon: float) -> dict[str, float | None]:
+    """Soil from the offline grid (SOIL_GRID_DIR) when it covers the point, else SoilGrids."""
+    local = local_soil([(lat, lon)])[0]
+    if local is not None:
+        return local
+    return await _soilgrids(client, lat, lon)
+
+
+async def _weather(client: httpx.AsyncClient, lat: float, lon: float) -> dict[str, float | None]:
+    return (await _open_meteo(client, [(lat, lon)]))[0]
+
+
+async def _elevation(client: httpx.AsyncClient, lat: float, lon: float) -> dict[str, float | None]:
+    return (await _elevations(client, [(lat, lon)]))[0]
+
+
+_SOURCE_FETCHERS = {
+    "weather": _weather,
+    "elevation": _elevation,
+    "soil": _soil,
+}
+
+
+# Upstream behind each source, reported in a response's "degraded" list when it failed
+_SOURCE_UPSTREAMS = {
+    "weather": "open_meteo",
+    "elevation": "open_elevation",
+    "soil": "soilgrids",
+}
+
+
+def _cache_source(source: str, key: str, value: dict) -> None:
+    failed = "error" in value
+    _feature_cache.set(source, key, value, FAILURE_TTL if failed else SOURCE_TTLS[source])
+
+
+_NAN = float("nan")
+
+
+def _raw_columns(values: list[dict[str, dict]]) -> tuple[list, ...]:
+    """Per-source dicts for many points -> raw value lists (NaN = missing) for assemble_features."""
+    def col(source: str, key: str) -> list[float]:
+        out = []
+        for v in values:
+            x = v[source].get(key)
+            out.append(_NAN if x is None else x)
+        return out
+
+    return (
+        col("elevation", "elevation"),
+        col("weather", "temperature"),
+        col("weather", "humidity"),
+        col("soil", "soil_tn"),
+        col("soil", "soil_tp"),
+        col("soil", "soil_ap"),
+    )
+
+
+def _responses_from_sources(values: list[dict[str, dict]]) -> list[dict]:
     """
-    Estimate soil TN and AN from climate when SoilGrids returns null.
-    Warmer/wetter → higher N (more mineralization, organic matter).
-    Higher elevation → lower N (cooler, less vegetation).
-    Returns (soil_tn, soil_an) in training range [0.01, 0.22].
+    Derive proxies and assemble snake_case API responses (+ 'source' map) for many points at once.
+    'degraded' lists upstreams that failed or were short-circuited, so their values are defaults/proxies.
     """
-    elev = elevation if elevation is not None else MEDIANS["Elevation"]
-    temp = temperature if temperature is not None else MEDIANS["Temperature"]
-    humid = humidity if humidity is not None else MEDIANS["Humidity"]
-    elev = max(0, min(5000, elev))
-    temp = max(-20, min(50, temp))
-    humid = max(0, min(100, humid))
-    # Base ~0.08; +temp/humidity; -elevation. Output in training range [0.01, 0.22].
-    soil_tn = 0.08 + 0.003 * (temp - 15) + 0.001 * (humid - 50) - 0.00001 * elev
-    soil_tn = round(min(0.22, max(0.01, soil_tn)), 4)
-    soil_an = round(soil_tn * 0.033, 4)  # AN/TN ~0.033 from training
-    return (soil_tn, soil_an)
-
-
-# Baseline for nitrogen amplification; factor 10 preserves gradient while making ~0.01 visible
-_NITROGEN_BASELINE = 0.51
-_NITROGEN_AMPLIFY = 10
-
-
-def _amplify_nitrogen(raw_tn: float) -> float:
-    """Amplify small nitrogen differences for visible variation; preserve gradient. Clamp to [0.1, 1.0]."""
-    diff = raw_tn - _NITROGEN_BASELINE
-    amplified = _NITROGEN_BASELINE + diff * _NITROGEN_AMPLIFY
-    return round(min(1.0, max(0.1, amplified)), 4)
-
-
-def _fire_risk_proxy(temperature: float | None, humidity: float | None) -> float:
-    """Simple proxy: (1 - humidity/100) * min(1, temp/40), normalized to [0,1]."""
-    if temperature is None:
-        temperature = MEDIANS["Temperature"]
-    if humidity is None:
-        humidity = MEDIANS["Humidity"]
-    h = max(0, min(100, humidity)) / 100.0
-    t = max(0, min(50, temperature)) / 40.0
-    raw = (1.0 - h) * min(1.0, t)
-    return round(min(1.0, max(0.0, raw)), 4)
-
-
-def _model_feature_dict(
-    elevation: float | None,
-    temperature: float | None,
-    humidity: float | None,
-    soil: dict[str, float | None],
-    fire_risk: float,
-) -> dict[str, float]:
-    """Build full feature dict for the model (all 12 features)."""
-    features = dict(MEDIANS)
-    if elevation is not None:
-        features["Elevation"] = elevation
-    if temperature is not None:
-        features["Temperature"] = temperature
-    if humidity is not None:
-        features["Humidity"] = humidity
-    features["Fire_Risk_Index"] = fire_risk
-    if soil.get("soil_tn") is not None:
-        features["Soil_TN"] = soil["soil_tn"]
-    if soil.get("soil_tp") is not None:
-        features["Soil_TP"] = soil["soil_tp"]
-    if soil.get("soil_ap") is not None:
-        features["Soil_AP"] = soil["soil_ap"]
-    if soil.get("soil_an") is not None:
-        features["Soil_AN"] = soil["soil_an"]
-    return features
-
-
-def _source_dict(
-    elevation: float | None,
-    temperature: float | None,
-    humidity: float | None,
-    soil: dict[str, float | None],
-    climate_nitrogen: bool = False,
-) -> dict[str, str]:
-    """Which source each feature came from: 'api', 'default', or 'proxy'."""
-    source = {}
-    for k in FEATURE_NAMES:
-        key_lower = k.lower().replace("_", "")
-        if k == "Elevation":
-            source["elevation"] = "api" if elevation is not None else "default"
-        elif k == "Temperature":
-            source["temperature"] = "api" if temperature is not None else "default"
-        elif k == "Humidity":
-            source["humidity"] = "api" if humidity is not None else "default"
-        elif k in ("Soil_TN", "Soil_TP", "Soil_AP", "Soil_AN"):
-            sk = k.lower()
-            if climate_nitrogen and k in ("Soil_TN", "Soil_AN"):
-                source[sk] = "proxy"
-            else:
-                source[sk] = "api" if (soil.get(sk) is not None) else "default"
-        elif k == "Fire_Risk_Index":
-            source["fire_risk_index"] = "proxy"
-        else:
-            source[k.lower()] = "default"
-    return source
+    X, sources = assemble_features(*_raw_columns(values))
+    degraded = [
+        [_SOURCE_UPSTREAMS[source] for source, value in v.items() if "error" in value] for v in values
+    ]
+    return responses(X, sources, degraded)
+
+
+async def _fetch_source(client: httpx.AsyncClient, source: str, key: str) -> dict:
+    """Fetch one source cell (at its center) via single-flight, so simultaneous misses send one upstream request."""
+    async def load() -> dict:
+        value = await _SOURCE_FETCHERS[source](client, *geohash.decode(key))
+        _cache_source(source, key, value)
+        return value
+
+    return await _source_flights.do((source, key), load)
+
+
+async def _refresh_source(source: str, key: str) -> dict:
+    """Re-fetch a source cell; a failed refresh keeps the (stale) cached value instead of overwriting it."""
+    async def load() -> dict:
+        value = await _SOURCE_FETCHERS[source](get_client(), *geohash.decode(key))
+        if "error" not in value:
+            _cache_source(source, key, value)
+        return value
+
+    return await _source_flights.do((source, key), load)
+
+
+def _schedule_refresh(source: str, key: str) -> None:
+    if (source, key) in _source_flights:
+        return
+    task = asyncio.create_task(_refresh_source(source, key))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def _cached(source: str, key: str):
+    """Cached value for (source, key) or MISS; schedules a background refresh once it is past SOURCE_REFRESH_AFTER."""
+    hit = _feature_cache.get_with_age(source, key)
+    if hit is MISS:
+        return MISS
+    value, age = hit
+    refresh_after = SOURCE_REFRESH_AFTER.get(source)
+    if refresh_after is not None and age > refresh_after and "error" not in value:
+        _schedule_refresh(source, key)
+    return value
+
+
+def _response_from_sources(values: dict[str, dict]) -> dict:
+    return _responses_from_sources([values])[0]
+
+
+async def _fetch_point(keys: dict[str, str]) -> dict:
+    values = {source: _cached(source, keys[source]) for source in _SOURCE_FETCHERS}
+    missing = [source for source, value in values.items() if value is MISS]
+
+    if missing:
+        client = get_client()
+        fetched = await asyncio.gather(
+            *(_fetch_source(client, source, keys[source]) for source in missing)
+        )
+        values.update(zip(missing, fetched))
+
+    return _response_from_sources(values)
 
 
 async def fetch_features_for_point(lat: float, lon: float) -> dict:
     """
-    Fetch all features for (lat, lon). Uses cache key (round(lat,2), round(lon,2)).
+    Fetch all features for (lat, lon). Weather, elevation and soil are cached independently
+    per geohash cell (SOURCE_PRECISION); only missing/expired sources hit their upstream.
+    Concurrent calls for the same point cell share one in-flight fetch.
     Returns dict with snake_case keys for API response + 'source' map.
     """
-    key = _cache_key(lat, lon)
-    async with _cache_lock:
-        if key in _fetch_cache:
-            return _fetch_cache[key].copy()
-
-    async with httpx.AsyncClient() as client:
-        meteo_task = _open_meteo(client, lat, lon)
-        elev_task = _open_elevation(client, lat, lon)
-        soil_task = _soilgrids(client, lat, lon)
-        (temp, humidity), elevation, soil = await asyncio.gather(meteo_task, elev_task, soil_task)
-
-    # Climate-based nitrogen fallback when SoilGrids returns null (location-varying)
-    climate_nitrogen_used = soil.get("soil_tn") is None
-    if climate_nitrogen_used:
-        soil["soil_tn"], soil["soil_an"] = _climate_nitrogen_proxy(elevation, temp, humidity)
-    # Ensure soil_an = soil_tn * 0.033 when we have soil_tn (AN/TN from training)
-    if soil.get("soil_tn") is not None:
-        soil["soil_an"] = round(soil["soil_tn"] * 0.033, 4)
-
-    fire_risk = _fire_risk_proxy(temp, humidity)
-    features = _model_feature_dict(elevation, temp, humidity, soil, fire_risk)
-    source = _source_dict(elevation, temp, humidity, soil, climate_nitrogen=climate_nitrogen_used)
-
-    # Response: snake_case for JSON, plus source
-    response = {
-        "elevation": features["Elevation"],
-        "temperature": features["Temperature"],
-        "humidity": features["Humidity"],
-        "soil_tn": features["Soil_TN"],
-        "soil_tp": features["Soil_TP"],
-        "soil_ap": features["Soil_AP"],
-        "soil_an": features["Soil_AN"],
-        "fire_risk_index": features["Fire_Risk_Index"],
-        "slope": features["Slope"],
-        "menhinick_index": features["Menhinick_Index"],
-        "gleason_index": features["Gleason_Index"],
-        "disturbance_level": features["Disturbance_Level"],
-        "source": source,
+    point, keys = _source_keys(lat, lon)
+    _record_access(keys["weather"])
+    response = await _point_flights.do(point, lambda: _fetch_point(keys))
+    _record_sources(response)
+    return {**response, "source": dict(response["source"]), "degraded": list(response["degraded"])}
+
+
+# Feature groups emitted by stream_features_for_point: response keys, and the sources each needs
+# (soil needs weather and elevation for the climate nitrogen proxy)
+STREAM_GROUPS = {
+    "elevation": (["elevation"], ("elevation",)),
+    "weather": (["temperature", "humidity"], ("weather",)),
+    "fire_risk": (["fire_risk_index"], ("weather",)),
+    "soil": (["soil_tn", "soil_tp", "soil_ap", "soil_an"], ("soil", "weather", "elevation")),
+}
+
+# Stand-ins for sources that have not arrived yet (only used for groups that do not depend on them)
+_PENDING_SOURCES = {
+    "weather": {"temperature": None, "humidity": None},
+    "elevation": {"elevation": None},
+    "soil": {},
+}
+
+
+def _stream_group(group: str, values: dict[str, dict]) -> dict:
+    keys, needs = STREAM_GROUPS[group]
+    response = _response_from_sources(
+        {source: _PENDING_SOURCES[source] if value is MISS else value for source, value in values.items()}
+    )
+    return {
+        **{k: response[k] for k in keys},
+        "source": {k: response["source"][k] for k in keys},
+        "degraded": [_SOURCE_UPSTREAMS[source] for source in needs if "error" in values[source]],
     }
 
-    async with _cache_lock:
-        _fetch_cache[key] = response.copy()
 
-    return response
+async def stream_features_for_point(lat: float, lon: float):
+    """
+    Async generator of (group, payload) as each feature group becomes available: elevation,
+    weather, fire_risk and soil (order depends on which upstream answers first; cached sources
+    are emitted immediately). Ends with ("features", full response), the same dict
+    fetch_features_for_point returns. Uses the same per-source cache and single-flight.
+    """
+    _, keys = _source_keys(lat, lon)
+    _record_access(keys["weather"])
+    values = {source: _cached(source, keys[source]) for source in _SOURCE_FETCHERS}
+    client = get_client()
+    tasks = {
+        asyncio.ensure_future(_fetch_source(client, source, keys[source])): source
+        for source, value in values.items()
+        if value is MISS
+    }
+    emitted: set[str] = set()
+    try:
+        pending = set(tasks)
+        while True:
+            for group, (_, needs) in STREAM_GROUPS.items():
+                if group not in emitted and all(values[s] is not MISS for s in needs):
+                    emitted.add(group)
+                    yield group, _stream_group(group, values)
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                values[tasks[task]] = task.result()
+    finally:
+        # Only our waiters are cancelled; shared single-flight fetches still finish and fill the cache
+        for task in tasks:
+            task.cancel()
+    response = _response_from_sources(values)
+    _record_sources(response)
+    yield "features", response
+
+
+async def _values_for_points(
+    points: list[tuple[float, float]],
+) -> tuple[list[str], list[str], list[dict[str, dict]]]:
+    """
+    (point key per point, unique point keys, per-source values per unique point). Each source is
+    looked up once per distinct cell, so nearby points share weather and soil. Cache misses for
+    weather and elevation are fetched with multi-point requests (chunked to API limits) at the
+    cell centers and written back to the cache. Soil comes from the offline grid where it covers
+    a cell; SoilGrids has no multi-point query, so the rest goes cell by cell.
+    """
+    point_keys = [_source_keys(lat, lon) for lat, lon in points]
+    cells: dict[str, dict[str, str]] = {}
+    for point, keys in point_keys:
+        cells.setdefault(point, keys)
+    values: dict[str, dict[str, object]] = {source: {} for source in _SOURCE_FETCHERS}
+    for keys in cells.values():
+        for source, key in keys.items():
+            if key not in values[source]:
+                values[source][key] = _cached(source, key)
+    missing = {
+        source: [key for key, value in by_key.items() if value is MISS]
+        for source, by_key in values.items()
+    }
+
+    client = get_client()
+
+    async def weather() -> None:
+        todo = missing["weather"]
+        if todo:
+            fetched = await _open_meteo(client, [geohash.decode(k) for k in todo])
+            for key, value in zip(todo, fetched):
+                _cache_source("weather", key, value)
+                values["weather"][key] = value
+
+    async def elevation() -> None:
+        todo = missing["elevation"]
+        if todo:
+            fetched = await _elevations(client, [geohash.decode(k) for k in todo])
+            for key, value in zip(todo, fetched):
+                _cache_source("elevation", key, value)
+                values["elevation"][key] = value
+
+    async def soil() -> None:
+        todo = missing["soil"]
+        for key, local in zip(todo, local_soil([geohash.decode(k) for k in todo])):
+            if local is not None:
+                _cache_source("soil", key, local)
+                values["soil"][key] = local
+        todo = [key for key in todo if values["soil"][key] is MISS]
+        fetched = await asyncio.gather(*(_fetch_source(client, "soil", key) for key in todo))
+        values["soil"].update(zip(todo, fetched))
+
+    await asyncio.gather(weather(), elevation(), soil())
+    return (
+        [point for point, _ in point_keys],
+        list(cells),
+        [{source: values[source][keys[source]] for source in _SOURCE_FETCHERS} for keys in cells.values()],
+    )
+
+
+async def fetch_features_for_points(points: list[tuple[float, float]]) -> list[dict]:
+    """Fetch features for many (lat, lon) points, in input order (see _values_for_points)."""
+    keys, cells, values = await _values_for_points(points)
+    by_cell = dict(zip(cells, _responses_from_sources(values)))
+    for key in keys:
+        _record_sources(by_cell[key])
+    return [
+        {**by_cell[key], "source": dict(by_cell[key]["source"]), "degraded": list(by_cell[key]["degraded"])}
+        for key in keys
+    ]
+
+
+async def fetch_feature_matrix(points: list[tuple[float, float]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Like fetch_features_for_points, but as (N×12 feature matrix, N×12 source codes) in
+    features.FEATURE_NAMES column order, with no per-point response dicts (for area scoring).
+    """
+    keys, cells, values = await _values_for_points(points)
+    X, sources = assemble_features(*_raw_columns(values))
+    row = {key: i for i, key in enumerate(cells)}
+    index = np.fromiter((row[key] for key in keys), dtype=np.intp, count=len(keys))
+    sources = sources[index]
+    _record_source_codes(sources)
+    return X[index], sources
+
+
+async def prefetch_hot_cells(top_k: int) -> int:
+    """
+    Refresh weather for the top_k most-requested weather cells that are missing or past their
+    refresh age, with multi-point Open-Meteo requests. Counts are halved afterwards so popularity decays.
+    Returns the number of cells refreshed.
+    """
+    hot = [key for key, _ in _access_counts.most_common(top_k)]
+    refresh_after = SOURCE_REFRESH_AFTER["weather"]
+    todo = []
+    for key in hot:
+        hit = _feature_cache.get_with_age("weather", key)
+        # Refresh a little early so popular cells never cross the threshold between rounds
+        if hit is MISS or hit[1] > refresh_after * 0.8 or "error" in hit[0]:
+            todo.append(key)
+    refreshed = 0
+    if todo:
+        for key, value in zip(todo, await _open_meteo(get_client(), [geohash.decode(k) for k in todo])):
+            if "error" not in value:
+                _cache_source("weather", key, value)
+                refreshed += 1
+
+    _decay_access_counts(_MAX_TRACKED_CELLS)
+    return refreshed
+
+
+def _record_access(key: str) -> None:
+    if key not in _access_counts and len(_access_counts) >= _MAX_TRACKED_CELLS:
+        # Make room ahead of the next prefetch round (or when there is none: PREFETCH_TOP_K=0,
+        # scripts, benchmarks); halving the cap keeps this amortized over many new cells
+        _decay_access_counts(_MAX_TRACKED_CELLS // 2)
+    _access_counts[key] += 1
+
+
+def _decay_access_counts(limit: int) -> None:
+    """Halve every count, drop cells that reach zero, and keep at most the `limit` hottest."""
+    for key in list(_access_counts):
+        _access_counts[key] //= 2
+        if not _access_counts[key]:
+            del _access_counts[key]
+    if len(_access_counts) > limit:
+        keep = dict(_access_counts.most_common(limit))
+        _access_counts.clear()
+        _access_counts.update(keep)
+
+
+async def prefetch_loop(top_k: int, interval: float) -> None:
+    """Background worker (started from the app lifespan) that keeps the hottest cells' weather warm."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await prefetch_hot_cells(top_k)
+        except Exception:
+            # Never let a bad round kill the worker; next round retries
+            pass
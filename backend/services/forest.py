@@ -0,0 +1,134 @@
+"""
+Compiled forest: a RandomForestClassifier flattened into contiguous NumPy arrays and
+evaluated for a whole batch with level-by-level vectorized traversal. Serving from the
+compiled artifact needs only numpy + joblib (no sklearn import).
+
+Arrays (T trees padded to M nodes, C classes):
+    feature    int32   (T, M)     split feature per node (0 for leaves)
+    threshold  float64 (T, M)     go left when x[feature] <= threshold
+    left/right int32   (T, M)     child node index; leaves point to themselves
+    value      float64 (T, M, C)  class distribution at every node (rows sum to 1)
+    children   int64   (T*M*2,)   flat next-node table: children[2 * id + went_left], id = tree * M + node
+The artifact is saved uncompressed so it can be joblib.load(..., mmap_mode="r")-ed and its pages
+shared between worker processes; CompiledForest only takes views of these arrays.
+"""
+import numpy as np
+
+
+def compile_forest(model) -> dict:
+    """Flatten a fitted sklearn RandomForestClassifier into the array layout above."""
+    trees = [est.tree_ for est in model.estimators_]
+    n_trees = len(trees)
+    n_nodes = max(t.node_count for t in trees)
+    n_classes = len(model.classes_)
+
+    feature = np.zeros((n_trees, n_nodes), dtype=np.int32)
+    threshold = np.zeros((n_trees, n_nodes), dtype=np.float64)
+    left = np.tile(np.arange(n_nodes, dtype=np.int32), (n_trees, 1))
+    right = left.copy()
+    value = np.zeros((n_trees, n_nodes, n_classes), dtype=np.float64)
+
+    for i, t in enumerate(trees):
+        n = t.node_count
+        internal = t.children_left[:n] != -1
+        feature[i, :n] = np.where(internal, t.feature[:n], 0)
+        threshold[i, :n] = t.threshold[:n]
+        left[i, :n] = np.where(internal, t.children_left[:n], np.arange(n))
+        right[i, :n] = np.where(internal, t.children_right[:n], np.arange(n))
+        counts = t.value[:n, 0, :]
+        value[i, :n] = counts / counts.sum(axis=1, keepdims=True)
+
+    offsets = (np.arange(n_trees, dtype=np.int64) * n_nodes).repeat(n_nodes)
+    children = np.stack([right.reshape(-1) + offsets, left.reshape(-1) + offsets], axis=1).reshape(-1)
+
+    return {
+        "feature": feature,
+        "threshold": threshold,
+        "left": left,
+        "right": right,
+        "value": value,
+        "children": children,
+        "max_depth": np.int32(max(t.max_depth for t in trees)),
+        "classes": np.asarray(model.classes_),
+        "feature_names": np.asarray(getattr(model, "feature_names_in_", []), dtype=str),
+    }
+
+
+class CompiledForest:
+    """predict_proba-compatible stand-in for the sklearn forest, built from compile_forest() arrays."""
+
+    def __init__(self, arrays: dict):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.max_depth = int(arrays["max_depth"])
+        self.classes_ = np.asarray(arrays["classes"])
+        self.feature_names_in_ = np.asarray(arrays["feature_names"], dtype=object)
+        self.n_estimators, self.n_nodes = self.feature.shape
+
+        # Global node ids (tree * M + node) so each level is a few 1-D gathers; reshapes are
+        # views, so a memory-mapped artifact stays shared instead of being copied per worker
+        self._roots = np.arange(self.n_estimators, dtype=np.intp)[:, None] * self.n_nodes
+        self._feature = self.feature.reshape(-1)
+        self._threshold = self.threshold.reshape(-1)
+        self._children = arrays.get("children")
+        if self._children is None:
+            # Artifacts exported before the flat table was stored
+            offsets = (np.arange(self.n_estimators, dtype=np.int64) * self.n_nodes).repeat(self.n_nodes)
+            self._children = np.stack(
+                [self.right.reshape(-1) + offsets, self.left.reshape(-1) + offsets], axis=1
+            ).reshape(-1)
+        self._value = self.value.reshape(self.n_estimators * self.n_nodes, -1)
+
+    def _apply_global(self, X: np.ndarray) -> np.ndarray:
+        # sklearn compares float32-cast inputs against float64 thresholds; do the same for parity
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        x_flat = X.reshape(-1)
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[None, :]
+        node = np.repeat(self._roots, n_rows, axis=1)
+        for _ in range(self.max_depth):
+            went_left = x_flat[row_offsets + self._feature[node]] <= self._threshold[node]
+            node = self._children[2 * node + went_left]
+        return node
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf index reached in every tree for every row: (T, N)."""
+        return self._apply_global(X) - self._roots
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self._value[self._apply_global(X)].mean(axis=0)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def path_contributions(self, node_score: np.ndarray) -> np.ndarray:
+        """
+        Path attribution of a per-node score (e.g. P(healthy) at every node, shape (T*M,)),
+        precomputed for every node: (T*M, F) where row n sums, per feature, the score change of
+        each split from the root down to n. Leaf rows averaged over trees plus the mean root
+        score give the model's score, so explaining a batch is one gather (see contributions()).
+        """
+        n_features = len(self.feature_names_in_) or int(self.feature.max()) + 1
+        path = np.zeros((self.n_estimators * self.n_nodes, n_features), dtype=np.float64)
+        frontier = self._roots.reshape(-1)
+        for _ in range(self.max_depth):
+            # Leaves point to themselves in the children table
+            parents = frontier[self._children[2 * frontier] != frontier]
+            if len(parents) == 0:
+                break
+            split = self._feature[parents]
+            next_frontier = []
+            for went_left in (0, 1):
+                child = self._children[2 * parents + went_left]
+                path[child] = path[parents]
+                path[child, split] += node_score[child] - node_score[parents]
+                next_frontier.append(child)
+            frontier = np.concatenate(next_frontier)
+        return path
+
+    def contributions(self, X: np.ndarray, path: np.ndarray) -> np.ndarray:
+        """(N, F) per-feature contributions for each row, from path_contributions() output."""
+        return path[self._apply_global(X)].mean(axis=0)
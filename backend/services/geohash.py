@@ -0,0 +1,62 @@
+"""
+Geohash encode/decode for spatial cache keys. Cells nest: a hash's prefixes are the coarser
+cells containing it, so one encode at the finest precision gives every coarser key by slicing.
+
+Approximate cell size by precision (mid-latitudes): 5 ≈ 4.9 × 4.9 km, 6 ≈ 1.2 × 0.6 km,
+7 ≈ 153 × 153 m, 8 ≈ 38 × 19 m, 9 ≈ 4.8 × 4.8 m.
+"""
+from functools import lru_cache
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+MAX_PRECISION = 12
+
+
+def _spread(v: int) -> int:
+    # Move bit i of a 32-bit value to bit 2i (Morton interleave)
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    return (v | (v << 1)) & 0x5555555555555555
+
+
+def _compact(v: int) -> int:
+    # Inverse of _spread: keep the even bits
+    v &= 0x5555555555555555
+    v = (v | (v >> 1)) & 0x3333333333333333
+    v = (v | (v >> 2)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v >> 4)) & 0x00FF00FF00FF00FF
+    v = (v | (v >> 8)) & 0x0000FFFF0000FFFF
+    return (v | (v >> 16)) & 0x00000000FFFFFFFF
+
+
+def encode(lat: float, lon: float, precision: int) -> str:
+    """Geohash of (lat, lon) with `precision` characters (1..12)."""
+    if not 1 <= precision <= MAX_PRECISION:
+        raise ValueError(f"precision must be 1..{MAX_PRECISION}")
+    bits = 5 * precision
+    # Encode with the same number of lon and lat bits, then drop the trailing lat bit if odd
+    half = (bits + 1) // 2
+    scale = 1 << half
+    lat_i = min(max(int((lat + 90.0) / 180.0 * scale), 0), scale - 1)
+    lon_i = min(max(int((lon + 180.0) / 360.0 * scale), 0), scale - 1)
+    code = ((_spread(lon_i) << 1) | _spread(lat_i)) >> (2 * half - bits)
+    return "".join(_BASE32[(code >> shift) & 31] for shift in range(bits - 5, -1, -5))
+
+
+@lru_cache(maxsize=65536)
+def decode(geohash: str) -> tuple[float, float]:
+    """Center (lat, lon) of a geohash cell."""
+    code = 0
+    for c in geohash:
+        code = (code << 5) | _DECODE[c]
+    bits = 5 * len(geohash)
+    half = (bits + 1) // 2
+    code <<= 2 * half - bits
+    lat_bits = bits // 2
+    lat_i = _compact(code) >> (half - lat_bits)
+    lon_i = _compact(code >> 1)
+    lat = (lat_i + 0.5) * 180.0 / (1 << lat_bits) - 90.0
+    lon = (lon_i + 0.5) * 360.0 / (1 << half) - 180.0
+    return (lat, lon)
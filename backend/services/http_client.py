@@ -0,0 +1,83 @@
+"""
+Shared upstream HTTP client: one pooled, keep-alive httpx.AsyncClient per worker,
+opened and closed by the FastAPI lifespan. HTTP/2 is used when the `h2` package is installed.
+"""
+import asyncio
+import os
+
+import httpx
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+# Connection pool limits (shared across all upstream hosts)
+POOL_LIMITS = httpx.Limits(
+    max_connections=int(_env_float("HTTP_MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=int(_env_float("HTTP_MAX_KEEPALIVE", 20)),
+    keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", 30.0),
+)
+
+# Per-upstream timeouts (seconds): total read budget + a shorter connect timeout
+UPSTREAM_TIMEOUTS = {
+    "open_meteo": httpx.Timeout(_env_float("OPEN_METEO_TIMEOUT", 6.0), connect=3.0),
+    "open_elevation": httpx.Timeout(_env_float("OPEN_ELEVATION_TIMEOUT", 6.0), connect=3.0),
+    "soilgrids": httpx.Timeout(_env_float("SOILGRIDS_TIMEOUT", 10.0), connect=3.0),
+    "google_places": httpx.Timeout(_env_float("GOOGLE_PLACES_TIMEOUT", 5.0), connect=3.0),
+}
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=POOL_LIMITS,
+        http2=_http2_available(),
+        timeout=httpx.Timeout(10.0, connect=3.0),
+    )
+
+
+def upstream_timeout(name: str) -> httpx.Timeout:
+    return UPSTREAM_TIMEOUTS[name]
+
+
+async def start_client() -> httpx.AsyncClient:
+    """Open the shared client (called from the app lifespan)."""
+    global _client, _client_loop
+    if _client is None or _client.is_closed:
+        _client = _new_client()
+        _client_loop = asyncio.get_running_loop()
+    return _client
+
+
+async def close_client() -> None:
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared client. Outside the app lifespan (scripts, one-off asyncio.run calls)
+    a client is created lazily and replaced if the event loop changed, since pooled
+    connections cannot be reused across loops.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = _new_client()
+        _client_loop = loop
+    return _client
@@ -0,0 +1,249 @@
+"""
+Inference executor: predict_proba in a pool of worker processes, so scoring runs off the
+serving process's GIL and its threadpool, and throughput scales with cores. Request threads
+enqueue their rows; a batcher thread coalesces queued requests (per model) into one
+predict_proba call in a worker, then fans the probability rows back out to each caller. While
+other batches are in flight it waits up to INFERENCE_BATCH_WINDOW_MS for more requests to join;
+an idle pool takes only what is already queued, so a lone request pays no window. Workers load models through services/registry.py,
+so forest arrays are memory-mapped and shared through the OS page cache.
+
+Backpressure: at most one batch per worker is in flight; everything else waits in a queue
+bounded by INFERENCE_MAX_QUEUE requests, past which InferenceOverloaded is raised (HTTP 503).
+The pool is opt-in (INFERENCE_WORKERS > 0) and started by the app lifespan; without it (scripts, training, benchmarks calling the
+services directly) predict_proba runs in-process as before.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+try:
+    from backend.services.metrics import CallbackMetric, Counter, Histogram
+    from backend.services.registry import UnknownModelError, get_model, model_proba
+except ImportError:
+    from services.metrics import CallbackMetric, Counter, Histogram
+    from services.registry import UnknownModelError, get_model, model_proba
+
+logger = logging.getLogger(__name__)
+
+# Worker processes (0, the default, keeps inference in the serving process; the pool trades
+# startup time, since the lifespan waits for every worker to load the model, for throughput)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+# How long a batch waits for more requests under load, and the rows it merges at most
+BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "2"))
+MAX_BATCH_ROWS = int(os.getenv("INFERENCE_MAX_BATCH_ROWS", "4096"))
+# Requests allowed to wait for a worker before new ones are rejected
+MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "256"))
+
+INFERENCE_BATCH_ROWS = Histogram(
+    "inference_batch_rows", "Rows per predict_proba call in the worker pool", ("model",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+INFERENCE_BATCH_REQUESTS = Histogram(
+    "inference_batch_requests", "Requests coalesced into one worker call", ("model",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+INFERENCE_QUEUE_WAIT = Histogram(
+    "inference_queue_wait_seconds", "Time a request waited before its batch was sent to a worker", ("model",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+INFERENCE_REJECTED = Counter("inference_rejected_total", "Requests rejected because the inference queue was full")
+
+
+class InferenceOverloaded(RuntimeError):
+    """The inference queue is full; the caller should retry later."""
+
+
+def _worker_init() -> None:
+    # Load the default model before the first batch arrives (errors resurface per batch)
+    try:
+        get_model()
+    except UnknownModelError:
+        pass  # No trained model yet: the serving process already logged it at warm-up
+    except Exception:
+        logger.exception("inference worker could not preload the default model")
+
+
+def _worker_proba(name: str, X: np.ndarray) -> np.ndarray:
+    return np.asarray(model_proba(get_model(name), X), dtype=np.float64)
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+class _Request:
+    __slots__ = ("name", "X", "future", "queued_at")
+
+    def __init__(self, name: str, X: np.ndarray):
+        self.name = name
+        self.X = X
+        self.future: Future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        workers: int,
+        window_ms: float = BATCH_WINDOW_MS,
+        max_batch_rows: int = MAX_BATCH_ROWS,
+        max_queue: int = MAX_QUEUE,
+    ):
+        self.workers = workers
+        self.window = window_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self.max_queue = max_queue
+        self._queue: queue.Queue[_Request | None] = queue.Queue()
+        # One in-flight batch per worker; the rest queue here, where depth is visible
+        self._slots = threading.Semaphore(workers)
+        self._in_flight = 0
+        self._pool_lock = threading.Lock()
+        self._pool = self._new_pool()
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that already runs threads (uvicorn, the batcher) is unsafe
+        return ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_worker_init
+        )
+
+    def start(self) -> None:
+        """Start the batcher and wait until every worker has started and loaded the default model."""
+        self._thread.start()
+        for future in [self._pool.submit(_worker_ready) for _ in range(self.workers)]:
+            future.result()
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def predict_proba(self, name: str, X: np.ndarray) -> np.ndarray:
+        """Probabilities for X from model name, computed in a worker (blocks the calling thread)."""
+        if self._queue.qsize() >= self.max_queue:
+            INFERENCE_REJECTED.inc()
+            raise InferenceOverloaded(f"Inference queue full ({self.max_queue} requests waiting); retry shortly")
+        request = _Request(name, X)
+        self._queue.put(request)
+        return request.future.result()
+
+    def _run(self) -> None:
+        while True:
+            self._slots.acquire()
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, rows = [first], len(first.X)
+            # Idle pool: send what is already queued right away; under load, wait for more
+            window = self.window if self._in_flight else 0.0
+            deadline = time.perf_counter() + window
+            while rows < self.max_batch_rows:
+                timeout = deadline - time.perf_counter()
+                try:
+                    request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    # Stop after dispatching what was already collected
+                    self._queue.put(None)
+                    break
+                batch.append(request)
+                rows += len(request.X)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[_Request]) -> None:
+        groups: dict[str, list[_Request]] = {}
+        for request in batch:
+            groups.setdefault(request.name, []).append(request)
+        for i, (name, requests) in enumerate(groups.items()):
+            if i:
+                self._slots.acquire()
+            self._submit(name, requests)
+
+    def _submit(self, name: str, requests: list[_Request]) -> None:
+        now = time.perf_counter()
+        for request in requests:
+            INFERENCE_QUEUE_WAIT.observe(now - request.queued_at, model=name)
+        X = requests[0].X if len(requests) == 1 else np.vstack([r.X for r in requests])
+        INFERENCE_BATCH_ROWS.observe(len(X), model=name)
+        INFERENCE_BATCH_REQUESTS.observe(len(requests), model=name)
+        with self._pool_lock:
+            pool = self._pool
+            self._in_flight += 1
+        try:
+            future = pool.submit(_worker_proba, name, X)
+        except Exception as e:
+            self._fail(pool, requests, e)
+            return
+        future.add_done_callback(lambda f: self._fan_out(pool, f, requests))
+
+    def _fan_out(self, pool: ProcessPoolExecutor, future: Future, requests: list[_Request]) -> None:
+        try:
+            proba = future.result()
+        except BaseException as e:
+            self._fail(pool, requests, e)
+            return
+        self._release()
+        offset = 0
+        for request in requests:
+            request.future.set_result(proba[offset:offset + len(request.X)])
+            offset += len(request.X)
+
+    def _release(self) -> None:
+        with self._pool_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _fail(self, pool: ProcessPoolExecutor, requests: list[_Request], error: BaseException) -> None:
+        if isinstance(error, BrokenProcessPool):
+            # A worker died (e.g. OOM-killed): replace the pool so later batches recover
+            with self._pool_lock:
+                if self._pool is pool:
+                    logger.error("inference worker pool broke; restarting it")
+                    self._pool = self._new_pool()
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._release()
+        for request in requests:
+            request.future.set_exception(error)
+
+
+_executor: InferenceExecutor | None = None
+
+CallbackMetric(
+    "inference_queue_depth", "Requests waiting for an inference worker", (),
+    lambda: {(): _executor.depth() if _executor is not None else 0},
+)
+
+
+def start(workers: int = INFERENCE_WORKERS) -> None:
+    """Start the worker pool (no-op for workers <= 0, or if already running)."""
+    global _executor
+    if workers > 0 and _executor is None:
+        executor = InferenceExecutor(workers)
+        executor.start()
+        _executor = executor
+
+
+def stop() -> None:
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.stop()
+
+
+def predict_proba(model, name: str, X: np.ndarray) -> np.ndarray:
+    """model.predict_proba(X), in the worker pool when it is running (model is the same registered name)."""
+    executor = _executor
+    if executor is None:
+        return model_proba(model, X)
+    return executor.predict_proba(name, X)
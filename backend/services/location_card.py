@@ -0,0 +1,211 @@
+"""
+Location card: nearest named place (Google Places Nearby Search) plus a Gemini description.
+Place-type queries run concurrently; place lookups are cached by rounded coordinates and
+descriptions by place id, both with a TTL, and concurrent misses share one upstream call.
+"""
+import asyncio
+import logging
+import os
+import time
+
+try:
+    from backend.services.cache import MISS, FeatureCache
+    from backend.services.http_client import get_client
+    from backend.services.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY, record_timing, register_cache
+    from backend.services.singleflight import SingleFlight
+    from backend.services.upstream import UPSTREAMS, UpstreamError
+except ImportError:
+    from services.cache import MISS, FeatureCache
+    from services.http_client import get_client
+    from services.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY, record_timing, register_cache
+    from services.singleflight import SingleFlight
+    from services.upstream import UPSTREAMS, UpstreamError
+
+# Overridable so a local stub server can stand in for Google (see benchmarks/location_card_stub.py)
+PLACES_NEARBY_URL = os.getenv(
+    "PLACES_NEARBY_URL", "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+)
+PLACES_PHOTO_URL = "https://maps.googleapis.com/maps/api/place/photo"
+GEMINI_MODEL = "models/gemini-2.0-flash"
+
+# Searched in priority order: the first type with a result wins, nearer radius before farther
+PLACE_TYPES = [
+    "park",
+    "famous_natural_feature",
+    "tourist_attraction",
+    "well_known_green_space",
+    "well_known_national_forest",
+    "well_known_conservation_areas",
+]
+RADII_M = (1200, 5_000)  # 1.2 km, then 5 km
+
+PLACE_TTL = float(os.getenv("LOCATION_CARD_PLACE_TTL", str(7 * 24 * 3600)))
+DESCRIPTION_TTL = float(os.getenv("LOCATION_CARD_DESCRIPTION_TTL", str(30 * 24 * 3600)))
+# A lookup where some query failed may have missed a better place; retry it soon
+FAILURE_TTL = 300
+# Nearby Search statuses that are answers rather than errors
+_PLACES_OK = ("OK", "ZERO_RESULTS")
+
+logger = logging.getLogger(__name__)
+
+_card_cache = FeatureCache(max_entries=int(os.getenv("LOCATION_CARD_CACHE_MAX_ENTRIES", "10000")))
+register_cache("location_card", _card_cache)
+_place_flights = SingleFlight()
+_description_flights = SingleFlight()
+_gemini_model = None
+
+
+def _cache_key(lat: float, lon: float) -> tuple[float, float]:
+    # Same ~100 m cells as the feature cache
+    return (round(float(lat), 3) + 0.0, round(float(lon), 3) + 0.0)
+
+
+async def _nearby(
+    lat: float, lon: float, radius_m: int, place_type: str, maps_key: str, errors: list[str]
+) -> dict | None:
+    """First Nearby Search result for one type, or None (no result; failures are appended to errors)."""
+    params = {"location": f"{lat},{lon}", "radius": radius_m, "type": place_type, "key": maps_key}
+    try:
+        r = await UPSTREAMS["google_places"].get(get_client(), PLACES_NEARBY_URL, params=params)
+        data = r.json()
+    except (UpstreamError, ValueError) as e:
+        logger.warning("Places %s lookup failed: %s", place_type, e)
+        errors.append(str(e))
+        return None
+    status = data.get("status", "OK")
+    if status not in _PLACES_OK:
+        # REQUEST_DENIED / OVER_QUERY_LIMIT / INVALID_REQUEST arrive as HTTP 200 with no results
+        logger.warning("Places %s lookup failed: %s %s", place_type, status, data.get("error_message", ""))
+        UPSTREAM_ERRORS.inc(upstream="google_places", kind="api_status")
+        errors.append(f"google_places: {status}")
+        return None
+    results = data.get("results", [])
+    return results[0] if results else None
+
+
+async def _first_hit(coros: list) -> dict | None:
+    """
+    Run coros concurrently and return the result of the earliest one (by list position) that is
+    not None. As soon as a hit arrives, lower-priority queries are cancelled; higher-priority
+    ones are still awaited so the answer matches a sequential scan.
+    """
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    best = len(tasks)
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                i = tasks.index(task)
+                if i < best and task.result() is not None:
+                    best = i
+            for task in tasks[best + 1:]:
+                task.cancel()
+            if all(t.done() for t in tasks[:best]):
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+    return tasks[best].result() if best < len(tasks) else None
+
+
+def _place_summary(place: dict) -> dict:
+    """The part of a Places result the card uses (keeps cached entries small)."""
+    return {
+        "name": place.get("name"),
+        "place_id": place.get("place_id"),
+        "photo_refs": [p["photo_reference"] for p in place.get("photos", [])[:8] if p.get("photo_reference")],
+    }
+
+
+async def _find_place(lat: float, lon: float, maps_key: str) -> dict | None:
+    key = _cache_key(lat, lon)
+    cached = _card_cache.get("place", key)
+    if cached is not MISS:
+        return cached
+
+    async def load() -> dict | None:
+        place = None
+        errors: list[str] = []
+        # Radii stay sequential: the 5 km queries are only worth paying for when 1.2 km finds nothing
+        for radius_m in RADII_M:
+            place = await _first_hit([_nearby(lat, lon, radius_m, t, maps_key, errors) for t in PLACE_TYPES])
+            if place is not None:
+                break
+        summary = _place_summary(place) if place is not None else None
+        _card_cache.set("place", key, summary, FAILURE_TTL if errors else PLACE_TTL)
+        return summary
+
+    return await _place_flights.do(key, load)
+
+
+def _get_gemini_model(gemini_key: str):
+    """Import and configure the Gemini SDK on first use (it is slow to import)."""
+    global _gemini_model
+    if _gemini_model is None:
+        import google.generativeai as genai
+
+        genai.configure(api_key=gemini_key)
+        _gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+    return _gemini_model
+
+
+def _prompt(location_for_prompt: str) -> str:
+    return f"""
+Location: {location_for_prompt}
+Do not start the paragraph with "Here is a description of the location..." or anything like that.
+Do not include latitude, longitude, or coordinates in your description.
+Write 2-4 sentences describing the environment and list 5 common trees likely in this region as well as 3 common factors affecting this region.
+Common trees: tree1, tree2, tree3, tree4, tree5
+Add paragraph break here.
+Common factors that may affect the trees in the future: factor1, factor2, factor3 (don't use ands in each factor)
+"""
+
+
+async def _generate_description(location_for_prompt: str, gemini_key: str) -> str:
+    resp = await _get_gemini_model(gemini_key).generate_content_async(_prompt(location_for_prompt))
+    return getattr(resp, "text", None) or str(resp)
+
+
+async def _describe(place: dict | None, lat: float, lon: float, gemini_key: str) -> str:
+    # The prompt only depends on the place name, so one description serves every point near it
+    key = place["place_id"] if place and place.get("place_id") else _cache_key(lat, lon)
+    cached = _card_cache.get("description", key)
+    if cached is not MISS:
+        return cached
+
+    async def load() -> str:
+        # Describe location without coords when we have a place name
+        location_for_prompt = place["name"] if place else "No named place found for this point."
+        start = time.perf_counter()
+        try:
+            description = await _generate_description(location_for_prompt, gemini_key)
+        except Exception as e:
+            kind = "timeout" if isinstance(e, (TimeoutError, asyncio.TimeoutError)) else "error"
+            UPSTREAM_ERRORS.inc(upstream="gemini", kind=kind)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            UPSTREAM_LATENCY.observe(elapsed, upstream="gemini")
+            record_timing("gemini", elapsed)
+        _card_cache.set("description", key, description, DESCRIPTION_TTL)
+        return description
+
+    return await _description_flights.do(key, load)
+
+
+async def location_card(lat: float, lon: float, maps_key: str, gemini_key: str) -> dict:
+    """placeName, photos and description for the point; see /api/location-card."""
+    place = await _find_place(lat, lon, maps_key)
+    description = await _describe(place, lat, lon, gemini_key)
+    photos = [
+        f"{PLACES_PHOTO_URL}?maxwidth=800&photoreference={ref}&key={maps_key}"
+        for ref in (place or {}).get("photo_refs", [])
+    ]
+    return {
+        "lat": lat,
+        "lon": lon,
+        "placeName": (place or {}).get("name") or f"{lat:.5f}, {lon:.5f}",
+        "photos": photos,
+        "description": description,
+    }
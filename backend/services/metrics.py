@@ -0,0 +1,236 @@
+"""
+Metrics: counters, histograms and scrape-time gauges rendered in the Prometheus text format
+(served at /metrics), plus per-request stage timings for the Server-Timing header.
+No client library needed; everything is process-local (one set of series per worker).
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from contextvars import ContextVar
+
+# Seconds; covers cached lookups (~ms) up to SoilGrids/Gemini timeouts (~10 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        return "\n".join([f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()])
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = _labels(self.labelnames, key, f'le="{_num(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Series read at scrape time from fn() -> {label values tuple: value} (e.g. cache counters)."""
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple[str, ...], fn: Callable[[], dict], kind: str = "gauge"
+    ):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self._fn = fn
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in sorted(self._fn().items())]
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(m.render() for m in _metrics) + "\n"
+
+
+# ---- Shared series ----
+
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds", "Upstream HTTP call latency (each attempt)", ("upstream",)
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_errors_total",
+    "Upstream calls that failed: timeout, connect, http_429, http_5xx, http_4xx, rate_limited, circuit_open, error",
+    ("upstream", "kind"),
+)
+INFERENCE_LATENCY = Histogram(
+    "model_inference_duration_seconds", "predict_proba time per batch", ("model",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+INFERENCE_ROWS = Counter("model_inference_rows_total", "Rows scored", ("model",))
+FEATURE_SOURCES = Counter(
+    "feature_source_total", "Model features served, by source (api/default/proxy)", ("feature", "source")
+)
+FEATURE_RESPONSES = Counter(
+    "feature_responses_total",
+    "Feature responses; fallback=true when any model feature is a default or proxy",
+    ("fallback",),
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to response start per route", ("method", "route", "status")
+)
+
+_caches: dict[str, object] = {}
+
+
+def _cache_stats() -> dict:
+    out = {}
+    for name, cache in list(_caches.items()):
+        out[(name, "hit")] = cache.hits
+        out[(name, "miss")] = cache.misses
+        out[(name, "eviction")] = cache.evictions
+    return out
+
+
+CallbackMetric(
+    "cache_operations_total", "Cache lookups (hit/miss) and LRU evictions", ("cache", "result"), _cache_stats,
+    kind="counter",
+)
+CallbackMetric(
+    "cache_entries", "Entries held in memory", ("cache",), lambda: {(n, ): len(c) for n, c in list(_caches.items())}
+)
+
+
+def register_cache(name: str, cache) -> None:
+    """Expose a FeatureCache's hits/misses/evictions and size under cache=name."""
+    _caches[name] = cache
+
+
+# ---- Server-Timing ----
+
+# Stage durations for the current request: name -> [total seconds, calls]
+_timings: ContextVar[dict[str, list] | None] = ContextVar("server_timings", default=None)
+
+
+def start_request_timing() -> dict[str, list]:
+    timings: dict[str, list] = {}
+    _timings.set(timings)
+    return timings
+
+
+def record_timing(stage: str, seconds: float) -> None:
+    """Add to the current request's Server-Timing stage (no-op outside a request)."""
+    timings = _timings.get()
+    if timings is not None:
+        entry = timings.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+def server_timing_header(timings: dict[str, list], total: float) -> str:
+    parts = [f"{stage};dur={seconds * 1000:.2f}" for stage, (seconds, _) in timings.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: times each HTTP request to response start (http_request_duration_seconds,
+    labelled by route template) and adds a Server-Timing header with the stages recorded
+    during the request (upstream calls, inference) plus the total.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        timings = start_request_timing()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                route = getattr(scope.get("route"), "path", "unmatched")
+                HTTP_LATENCY.observe(total, method=scope["method"], route=route, status=message["status"])
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(timings, total).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
@@ -1,16 +1,27 @@
 """
-Predict service: load tree_health_rf_model.pkl (RandomForestClassifier), predict, return survivability.
+Predict service: score feature rows with a registered model (RandomForest by default; see
+services/registry.py for xgb/logreg and shadow scoring), return survivability.
 """
-from pathlib import Path
+import logging
+import time
+from functools import lru_cache
 
-import joblib
 import numpy as np
 
-# Load model once at module import (model is raw RandomForestClassifier, saved from RandomForestModel.py)
-_BACKEND_DIR = Path(__file__).resolve().parent.parent
-_MODEL_PATH = _BACKEND_DIR / "tree_health_rf_model.pkl"
+try:
+    from backend.services import explain, inference
+    from backend.services.encoding import Categorical
+    from backend.services.features import model_columns
+    from backend.services.metrics import INFERENCE_LATENCY, INFERENCE_ROWS, record_timing
+    from backend.services.registry import UnknownModelError, get_model, resolve_name, submit_shadow
+except ImportError:
+    from services import explain, inference
+    from services.encoding import Categorical
+    from services.features import model_columns
+    from services.metrics import INFERENCE_LATENCY, INFERENCE_ROWS, record_timing
+    from services.registry import UnknownModelError, get_model, resolve_name, submit_shadow
 
-_model = None
+logger = logging.getLogger(__name__)
 
 # Class labels from RandomForestModel.py
 CLASS_LABELS = {
@@ -21,11 +32,22 @@ CLASS_LABELS = {
 }
 
 
-def _load_model():
-    global _model
-    if _model is None:
-        _model = joblib.load(_MODEL_PATH)
-    return _model
+def _load_model(name: str | None = None):
+    return get_model(name)
+
+
+def warm_up() -> None:
+    """
+    Load the model and neighbor index and score one median row so the first request does not pay
+    for it. Never raises: without a trained model the API still serves everything but predictions.
+    """
+    try:
+        explain.warm_up()
+        predict({})
+    except UnknownModelError as e:
+        logger.warning("Skipping model warm-up: %s", e)
+    except Exception:
+        logger.exception("Model warm-up failed; predictions load the model on first use")
 
 
 def get_feature_names():
@@ -37,84 +59,305 @@ def get_label_encoder():
     return None  # Model uses numeric classes; we map via CLASS_LABELS
 
 
-def predict(features_dict: dict) -> dict:
+# Map common incoming keys to model's lowercase names
+_KEY_MAP = {
+    "Elevation": "elevation",
+    "elevation": "elevation",
+    "Temperature": "temperature",
+    "temperature": "temperature",
+    "Humidity": "humidity",
+    "humidity": "humidity",
+    "Soil_TN": "soil_TN",
+    "soil_tn": "soil_TN",
+    "Soil_TP": "soil_TP",
+    "soil_tp": "soil_TP",
+    "Soil_AP": "soil_AP",
+    "soil_ap": "soil_AP",
+    "Soil_AN": "soil_AN",
+    "soil_an": "soil_AN",
+}
+
+# Incoming keys accepted for each model feature, in lookup order (built once instead of per call)
+_ALIASES: dict[str, list[str]] = {}
+for _k, _v in _KEY_MAP.items():
+    _ALIASES.setdefault(_v, []).append(_k)
+
+# Medians from training data (us_tree_health_realistic.csv style) for missing values
+_MEDIANS = {
+    "elevation": 1503.57,
+    "temperature": 21.75,
+    "humidity": 59.61,
+    "soil_TN": 0.511,
+    "soil_TP": 0.250,
+    "soil_AP": 0.247,
+    "soil_AN": 0.244,
+}
+
+
+@lru_cache(maxsize=16)
+def _aliases_for(feature_names: tuple[str, ...]) -> tuple[tuple[str, ...], ...]:
+    """Accepted incoming keys per model column, resolved once per model."""
+    return tuple(tuple(_ALIASES.get(name, [name])) for name in feature_names)
+
+
+@lru_cache(maxsize=16)
+def _median_row(feature_names: tuple[str, ...]) -> np.ndarray:
+    return np.array([_MEDIANS.get(name, 0.0) for name in feature_names], dtype=np.float64)
+
+
+def _rows_matrix(rows: list[dict], feature_names: list[str]) -> np.ndarray:
+    """Stack feature dicts into an N×F matrix; missing or non-numeric values become NaN."""
+    X = np.full((len(rows), len(feature_names)), np.nan, dtype=np.float64)
+    aliases = _aliases_for(tuple(feature_names))
+    for i, features_dict in enumerate(rows):
+        for j, keys in enumerate(aliases):
+            for k in keys:
+                value = features_dict.get(k)
+                if value is not None:
+                    try:
+                        X[i, j] = float(value)
+                    except (TypeError, ValueError):
+                        pass
+                    break
+    return X
+
+
+def _column_values(values: list) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.nan, dtype=np.float64)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def _columns_matrix(columns: dict[str, list], feature_names: list[str]) -> np.ndarray:
+    """Build an N×F matrix from columnar input ({feature: [values...]}); absent columns become NaN."""
+    lengths = {len(v) for v in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length")
+    n = lengths.pop() if lengths else 0
+    X = np.full((n, len(feature_names)), np.nan, dtype=np.float64)
+    for j, keys in enumerate(_aliases_for(tuple(feature_names))):
+        for k in keys:
+            if k in columns:
+                X[:, j] = _column_values(columns[k])
+                break
+    return X
+
+
+def _fill_medians(X: np.ndarray, feature_names: list[str]) -> np.ndarray:
+    """Replace NaN (missing) entries with the training median of their column."""
+    return np.where(np.isnan(X), _median_row(tuple(feature_names)), X)
+
+
+def _score_matrix(model, X: np.ndarray, name: str, feature_names: list[str], contributions: bool) -> dict:
+    """
+    Score an N×F matrix with a single predict_proba call; labels come from the argmax.
+    Returns proba, labels (class name per proba column), best (argmax), survivability and
+    confidence arrays, plus per-feature survivability contributions (forest models) if asked.
+    """
+    classes = [int(c) for c in getattr(model, "classes_", [])]
+    if len(X):
+        start = time.perf_counter()
+        # In the inference worker pool when the app started it (micro-batched with concurrent requests)
+        proba = np.asarray(inference.predict_proba(model, name, X), dtype=np.float64)
+        elapsed = time.perf_counter() - start
+        INFERENCE_LATENCY.observe(elapsed, model=name)
+        INFERENCE_ROWS.inc(len(X), model=name)
+        record_timing("inference", elapsed)
+        classes = classes or list(range(proba.shape[1]))
+    else:
+        elapsed = 0.0
+        proba = np.zeros((0, len(classes)))
+    labels = [CLASS_LABELS.get(c, f"class_{c}") for c in classes]
+    best = np.argmax(proba, axis=1)
+    # Survivability: probability of healthy or very_healthy
+    surv_cols = [i for i, label in enumerate(labels) if label in ("healthy", "very_healthy")]
+    if len(X):
+        submit_shadow(name, X, feature_names, np.asarray(classes)[best], elapsed * 1000)
+
+    contrib = None
+    if contributions and len(X):
+        start = time.perf_counter()
+        contrib = explain.contributions(model, name, X, surv_cols)
+        record_timing("explain", time.perf_counter() - start)
+    return {
+        "proba": proba,
+        "labels": labels,
+        "best": best,
+        "survivability": proba[:, surv_cols].sum(axis=1),
+        "confidence": proba[np.arange(len(best)), best],
+        "contributions": contrib,
+    }
+
+
+def _predict_matrix(
+    model,
+    X: np.ndarray,
+    name: str,
+    feature_names: list[str],
+    explained: bool = True,
+    imputed: np.ndarray | None = None,
+) -> list[dict]:
+    """
+    Per-row prediction dicts for an N×F matrix (one predict_proba call).
+    explained adds key_factors/contributions (forest models) and similar training samples;
+    imputed (N×F bool) marks median-filled cells, which key_factors labels as defaults.
+    """
+    if X.shape[0] == 0:
+        return []
+    scored = _score_matrix(model, X, name, feature_names, explained)
+    proba, labels, best = scored["proba"], scored["labels"], scored["best"]
+    survivability, confidence, contrib = scored["survivability"], scored["confidence"], scored["contributions"]
+
+    factors = similar = None
+    if explained:
+        start = time.perf_counter()
+        if contrib is not None:
+            factors = explain.key_factors(X, contrib, feature_names, imputed)
+        similar = explain.similar_samples(X, feature_names, CLASS_LABELS)
+        record_timing("explain", time.perf_counter() - start)
+
+    results = []
+    for i in range(X.shape[0]):
+        pred_class = labels[best[i]]
+        surv = float(survivability[i])
+        status = "healthy" if pred_class in ("healthy", "very_healthy") else "unhealthy"
+        explanation = f"Model predicts {pred_class} (survivability {surv:.0%})."
+        result = {
+            "status": status,
+            "label": pred_class,
+            "survivability": round(surv, 4),
+            "confidence": round(float(confidence[i]), 4),
+            "key_factors": factors[i] if factors else [],
+            "explanation": explanation,
+            "probabilities": {labels[c]: float(proba[i, c]) for c in range(len(labels))},
+        }
+        if contrib is not None:
+            result["contributions"] = {f: round(v, 4) for f, v in zip(feature_names, contrib[i].tolist())}
+        if similar and similar[i]:
+            n_healthy = sum(s["label"] in ("healthy", "very_healthy") for s in similar[i])
+            result["explanation"] = (
+                f"{explanation} {n_healthy} of the {len(similar[i])} most similar training sites are healthy."
+            )
+            result["similar"] = similar[i]
+        results.append(result)
+    return results
+
+
+def _table(scored: dict, feature_names: list[str]) -> dict[str, object]:
+    """Columnar predictions: label/status as Categorical codes, scores as float32 columns."""
+    labels, best = scored["labels"], scored["best"]
+    healthy = np.array([label in ("healthy", "very_healthy") for label in labels], dtype=bool)
+    table: dict[str, object] = {
+        "status": Categorical(healthy[best].astype(np.uint8), ["unhealthy", "healthy"]),
+        "label": Categorical(best.astype(np.uint8), labels),
+        "survivability": scored["survivability"].astype(np.float32),
+        "confidence": scored["confidence"].astype(np.float32),
+    }
+    for c, label in enumerate(labels):
+        table[f"prob_{label}"] = scored["proba"][:, c].astype(np.float32)
+    if scored["contributions"] is not None:
+        for j, feature in enumerate(feature_names):
+            table[f"contrib_{feature}"] = scored["contributions"][:, j].astype(np.float32)
+    return table
+
+
+def predict(features_dict: dict, model: str | None = None, explained: bool = True, fast: bool = False) -> dict:
     """
     Run prediction on a features dict.
     Model expects 7 features (lowercase): elevation, temperature, humidity, soil_TN, soil_TP, soil_AP, soil_AN.
     Accepts PascalCase/snake_case and normalizes to model names.
-    Returns: status, label, survivability, confidence, key_factors, explanation.
+    model selects a registered model ("rf", "xgb", "logreg"); default DEFAULT_MODEL.
+    Returns: status, label, survivability, confidence, key_factors, explanation, probabilities,
+    plus contributions (forest models) and similar training samples when explained.
+    fast serves the model's distilled variant ("rf" -> "rf_fast", once trained) without explanations,
+    for previews that need sub-millisecond scoring.
     """
-    model = _load_model()
-    feature_names = list(getattr(model, "feature_names_in_", []))
-
-    # Map common incoming keys to model's lowercase names
-    key_map = {
-        "Elevation": "elevation",
-        "elevation": "elevation",
-        "Temperature": "temperature",
-        "temperature": "temperature",
-        "Humidity": "humidity",
-        "humidity": "humidity",
-        "Soil_TN": "soil_TN",
-        "soil_tn": "soil_TN",
-        "Soil_TP": "soil_TP",
-        "soil_tp": "soil_TP",
-        "Soil_AP": "soil_AP",
-        "soil_ap": "soil_AP",
-        "Soil_AN": "soil_AN",
-        "soil_an": "soil_AN",
-    }
+    return predict_batch([features_dict], model, explained, fast)[0]
 
-    # Medians from training data (us_tree_health_realistic.csv style) for missing values
-    medians = {
-        "elevation": 1503.57,
-        "temperature": 21.75,
-        "humidity": 59.61,
-        "soil_TN": 0.511,
-        "soil_TP": 0.250,
-        "soil_AP": 0.247,
-        "soil_AN": 0.244,
-    }
 
-    row = {}
-    for name in feature_names:
-        value = None
-        for k, v in key_map.items():
-            if v == name and k in features_dict and features_dict[k] is not None:
-                value = features_dict[k]
-                break
-        if value is not None:
-            try:
-                row[name] = float(value)
-            except (TypeError, ValueError):
-                row[name] = medians.get(name, 0.0)
-        else:
-            row[name] = medians.get(name, 0.0)
-
-    X = np.array([[row[n] for n in feature_names]], dtype=np.float64)
-    pred_numeric = int(model.predict(X)[0])
-    pred_proba = model.predict_proba(X)[0]
-
-    pred_class = CLASS_LABELS.get(pred_numeric, f"class_{pred_numeric}")
-    proba_dict = {
-        CLASS_LABELS.get(i, f"class_{i}"): float(pred_proba[i])
-        for i in range(len(pred_proba))
-    }
+def predict_batch(
+    rows: list[dict], model: str | None = None, explained: bool = True, fast: bool = False
+) -> list[dict]:
+    """
+    Run prediction on a list of feature dicts (same keys as predict()).
+    Missing values are filled with training medians; the whole batch is scored in one model call.
+    explained and fast as for predict().
+    """
+    name = resolve_name(model, fast)
+    estimator = _load_model(name)
+    feature_names = list(getattr(estimator, "feature_names_in_", []))
+    X = _rows_matrix(rows, feature_names)
+    imputed = np.isnan(X)
+    X = _fill_medians(X, feature_names)
+    return _predict_matrix(estimator, X, name, feature_names, explained and not fast, imputed)
 
-    # Survivability: probability of healthy or very_healthy
-    survivability = float(
-        proba_dict.get("healthy", 0) + proba_dict.get("very_healthy", 0)
+
+def predict_columns(
+    columns: dict[str, list], model: str | None = None, explained: bool = True, fast: bool = False
+) -> list[dict]:
+    """
+    Run prediction on columnar input: {"elevation": [...], "temperature": [...], ...}.
+    Keys may be PascalCase/snake_case; absent columns and null entries use training medians.
+    explained and fast as for predict().
+    """
+    name = resolve_name(model, fast)
+    estimator = _load_model(name)
+    feature_names = list(getattr(estimator, "feature_names_in_", []))
+    X = _columns_matrix(columns, feature_names)
+    imputed = np.isnan(X)
+    X = _fill_medians(X, feature_names)
+    return _predict_matrix(estimator, X, name, feature_names, explained and not fast, imputed)
+
+
+def predict_features(
+    X: np.ndarray, model: str | None = None, explained: bool = False, fast: bool = False
+) -> list[dict]:
+    """
+    Run prediction on an assembled N×12 feature matrix (features.FEATURE_NAMES columns, no
+    missing values), e.g. from fetch_feature_matrix; the model's columns are selected by name.
+    Explanations are off by default here (area scans only map survivability and labels).
+    """
+    name = resolve_name(model, fast)
+    estimator = _load_model(name)
+    feature_names = list(getattr(estimator, "feature_names_in_", []))
+    return _predict_matrix(
+        estimator, X[:, model_columns(feature_names)], name, feature_names, explained and not fast
     )
-    confidence = float(np.max(pred_proba))
 
-    status = "healthy" if pred_class in ("healthy", "very_healthy") else "unhealthy"
 
-    return {
-        "status": status,
-        "label": pred_class,
-        "survivability": round(survivability, 4),
-        "confidence": round(confidence, 4),
-        "key_factors": [],
-        "explanation": f"Model predicts {pred_class} (survivability {survivability:.0%}).",
-        "probabilities": proba_dict,
-    }
+def predict_table(
+    rows: list[dict] | None = None,
+    columns: dict[str, list] | None = None,
+    model: str | None = None,
+    explained: bool = False,
+    fast: bool = False,
+) -> dict[str, object]:
+    """
+    Columnar predictions for bulk consumers (Arrow / MessagePack responses, see
+    services/encoding.py): rows as for predict_batch, or columns as for predict_columns, scored
+    in one call and returned as one array per field instead of a dict per row. explained adds
+    contrib_<feature> columns (forest models); text explanations and similar samples are JSON only.
+    """
+    name = resolve_name(model, fast)
+    estimator = _load_model(name)
+    feature_names = list(getattr(estimator, "feature_names_in_", []))
+    X = _rows_matrix(rows, feature_names) if rows is not None else _columns_matrix(columns or {}, feature_names)
+    X = _fill_medians(X, feature_names)
+    return _table(_score_matrix(estimator, X, name, feature_names, explained and not fast), feature_names)
+
+
+def predict_features_table(X: np.ndarray, model: str | None = None, fast: bool = False) -> dict[str, object]:
+    """predict_features as columns (see predict_table), for columnar area scans."""
+    name = resolve_name(model, fast)
+    estimator = _load_model(name)
+    feature_names = list(getattr(estimator, "feature_names_in_", []))
+    return _table(
+        _score_matrix(estimator, X[:, model_columns(feature_names)], name, feature_names, False), feature_names
+    )
@@ -0,0 +1,231 @@
+"""
+Model registry: the RandomForest, XGBoost and LogisticRegression artifacts behind one lookup,
+selected per request (?model=rf|xgb|logreg), the distilled small forest served for ?fast=true,
+plus optional shadow scoring of a candidate model on a background thread, logged for latency
+and agreement comparison.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+try:
+    from backend.services.forest import CompiledForest
+except ImportError:
+    from services.forest import CompiledForest
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+# RandomForestModel.py output (raw RandomForestClassifier)
+_MODEL_PATH = _BACKEND_DIR / "tree_health_rf_model.pkl"
+# Array-compiled forest written by backend/export_forest.py (served without importing sklearn)
+_COMPILED_PATH = _BACKEND_DIR / "tree_health_rf_compiled.joblib"
+# XGBoostModel.py output (XGBoost native JSON)
+_XGB_PATH = _BACKEND_DIR / "tree_health_xgb_model.json"
+# LogisticRegressionModel.py output (StandardScaler + LogisticRegression pipeline)
+_LOGREG_PATH = _BACKEND_DIR / "tree_health_logreg_model.pkl"
+# Small compiled forest distilled from the RandomForest by backend/distill_forest.py
+_FAST_PATH = _BACKEND_DIR / "tree_health_rf_fast.joblib"
+
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "rf")
+# Candidate scored in the background on every prediction (e.g. SHADOW_MODEL=xgb); unset disables
+SHADOW_MODEL = os.getenv("SHADOW_MODEL") or None
+# Shadow batches allowed to queue before new ones are dropped (keeps memory bounded under load)
+_SHADOW_MAX_PENDING = 32
+
+logger = logging.getLogger("growwise.shadow")
+
+
+class UnknownModelError(ValueError):
+    """Requested model name is not registered or its artifact is missing."""
+
+
+def _compiled_is_current() -> bool:
+    """Compiled artifact exists and is not older than the pickle it was exported from."""
+    if not _COMPILED_PATH.exists():
+        return False
+    return not _MODEL_PATH.exists() or _COMPILED_PATH.stat().st_mtime >= _MODEL_PATH.stat().st_mtime
+
+
+def _load_rf():
+    # mmap_mode="r": array data stays in the OS page cache, shared by all uvicorn workers
+    if _compiled_is_current():
+        return CompiledForest(joblib.load(_COMPILED_PATH, mmap_mode="r"))
+    return joblib.load(_MODEL_PATH, mmap_mode="r")
+
+
+def _fast_is_current() -> bool:
+    """Distilled forest is not older than the RandomForest pickle it was distilled from."""
+    return not _MODEL_PATH.exists() or _FAST_PATH.stat().st_mtime >= _MODEL_PATH.stat().st_mtime
+
+
+def _load_rf_fast():
+    return CompiledForest(joblib.load(_FAST_PATH, mmap_mode="r"))
+
+
+def _load_xgb():
+    from xgboost import XGBClassifier
+
+    model = XGBClassifier()
+    model.load_model(_XGB_PATH)
+    return model
+
+
+def _load_logreg():
+    return joblib.load(_LOGREG_PATH)
+
+
+# name -> (loader, artifact paths; any existing one makes the model available)
+_REGISTRY = {
+    "rf": (_load_rf, (_COMPILED_PATH, _MODEL_PATH)),
+    "rf_fast": (_load_rf_fast, (_FAST_PATH,)),
+    "xgb": (_load_xgb, (_XGB_PATH,)),
+    "logreg": (_load_logreg, (_LOGREG_PATH,)),
+}
+
+# Freshness check for artifacts derived from another model's; a stale one is treated as missing
+# (after retraining rf, ?fast=true falls back to rf until distill_forest is re-run)
+_CURRENT = {
+    "rf_fast": _fast_is_current,
+}
+
+# Model served instead when a request asks for fast scoring (used only once its artifact exists)
+FAST_VARIANTS = {
+    "rf": "rf_fast",
+}
+
+_models: dict[str, object] = {}
+_load_lock = threading.Lock()
+
+
+def available_models() -> list[str]:
+    return [name for name in _REGISTRY if _has_artifact(name)]
+
+
+def _has_artifact(name: str) -> bool:
+    if not any(p.exists() for p in _REGISTRY[name][1]):
+        return False
+    current = _CURRENT.get(name)
+    return current is None or current()
+
+
+def resolve_name(name: str | None, fast: bool = False) -> str:
+    """Registered model name for a request (default DEFAULT_MODEL); fast picks its FAST_VARIANTS entry if trained."""
+    name = name or DEFAULT_MODEL
+    if name not in _REGISTRY:
+        raise UnknownModelError(f"Unknown model '{name}'; choose one of {sorted(_REGISTRY)}")
+    variant = FAST_VARIANTS.get(name)
+    if fast and variant is not None and _has_artifact(variant):
+        return variant
+    return name
+
+
+def get_model(name: str | None = None):
+    """Loaded model for name (default DEFAULT_MODEL), loading it once on first use."""
+    name = resolve_name(name)
+    model = _models.get(name)
+    if model is None:
+        with _load_lock:
+            model = _models.get(name)
+            if model is None:
+                loader, _ = _REGISTRY[name]
+                if not _has_artifact(name):
+                    if any(p.exists() for p in _REGISTRY[name][1]):
+                        raise UnknownModelError(f"Model '{name}' is older than the model it was derived from; rebuild it")
+                    raise UnknownModelError(f"Model '{name}' has no artifact; train it first")
+                model = _models[name] = loader()
+    return model
+
+
+def model_feature_names(model) -> list[str]:
+    return list(getattr(model, "feature_names_in_", []))
+
+
+def model_proba(model, X: np.ndarray) -> np.ndarray:
+    """
+    model.predict_proba(X). Estimators fitted on a DataFrame (the logreg pipeline, the raw rf
+    pickle) get X with their column names, so sklearn does not warn on every call.
+    """
+    if isinstance(model, CompiledForest) or not len(model_feature_names(model)):
+        return model.predict_proba(X)
+    import pandas as pd
+
+    return model.predict_proba(pd.DataFrame(X, columns=model_feature_names(model)))
+
+
+# ---- Shadow scoring ----
+
+_shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+_shadow_lock = threading.Lock()
+_shadow_pending = 0
+_shadow_stats = {
+    "batches": 0,
+    "rows": 0,
+    "agreements": 0,
+    "dropped": 0,
+    "errors": 0,
+    "primary_ms": 0.0,
+    "shadow_ms": 0.0,
+}
+
+
+def submit_shadow(
+    primary: str, X: np.ndarray, feature_names: list[str], labels: np.ndarray, primary_ms: float
+) -> None:
+    """Queue SHADOW_MODEL scoring of the same rows; never blocks or fails the caller."""
+    global _shadow_pending
+    if SHADOW_MODEL is None or SHADOW_MODEL == primary or len(X) == 0:
+        return
+    with _shadow_lock:
+        if _shadow_pending >= _SHADOW_MAX_PENDING:
+            _shadow_stats["dropped"] += 1
+            return
+        _shadow_pending += 1
+    _shadow_executor.submit(_run_shadow, primary, X.copy(), list(feature_names), labels.copy(), primary_ms)
+
+
+def _run_shadow(primary: str, X: np.ndarray, feature_names: list[str], labels: np.ndarray, primary_ms: float) -> None:
+    global _shadow_pending
+    try:
+        model = get_model(SHADOW_MODEL)
+        # Reorder columns by name in case the candidate was trained with a different order
+        order = [feature_names.index(n) for n in model_feature_names(model)] or list(range(X.shape[1]))
+        start = time.perf_counter()
+        proba = model_proba(model, X[:, order])
+        shadow_ms = (time.perf_counter() - start) * 1000
+        shadow_labels = np.asarray(model.classes_)[np.argmax(proba, axis=1)]
+        agree = int(np.sum(shadow_labels == labels))
+        with _shadow_lock:
+            _shadow_stats["batches"] += 1
+            _shadow_stats["rows"] += len(X)
+            _shadow_stats["agreements"] += agree
+            _shadow_stats["primary_ms"] += primary_ms
+            _shadow_stats["shadow_ms"] += shadow_ms
+        logger.info(
+            "shadow %s vs %s: rows=%d agree=%.3f primary_ms=%.2f shadow_ms=%.2f",
+            SHADOW_MODEL, primary, len(X), agree / len(X), primary_ms, shadow_ms,
+        )
+    except Exception:
+        with _shadow_lock:
+            _shadow_stats["errors"] += 1
+        logger.exception("shadow scoring with %s failed", SHADOW_MODEL)
+    finally:
+        with _shadow_lock:
+            _shadow_pending -= 1
+
+
+def shadow_stats() -> dict:
+    with _shadow_lock:
+        stats = dict(_shadow_stats)
+    batches = stats["batches"] or 1
+    return {
+        "model": SHADOW_MODEL,
+        **stats,
+        "agreement": round(stats["agreements"] / stats["rows"], 4) if stats["rows"] else None,
+        "primary_ms_avg": round(stats["primary_ms"] / batches, 3),
+        "shadow_ms_avg": round(stats["shadow_ms"] / batches, 3),
+    }
@@ -0,0 +1,143 @@
+"""
+Area scan service: tile a circle (lat, lon, radius_km) or bbox into a lattice,
+fetch features for every cell, score the whole grid in one batched model call,
+and stream the result back as a GeoJSON FeatureCollection (or return it as columns
+for the binary formats in services/encoding.py).
+"""
+import asyncio
+import json
+import math
+from collections.abc import Iterator
+
+import numpy as np
+
+try:
+    from backend.services.fetch import fetch_feature_matrix
+    from backend.services.predict import predict_features, predict_features_table
+except ImportError:
+    from services.fetch import fetch_feature_matrix
+    from services.predict import predict_features, predict_features_table
+
+# km per degree of latitude (and of longitude at the equator)
+_KM_PER_DEG = 111.32
+
+# Upper bound on cells per scan; larger areas need a coarser step_km
+MAX_CELLS = 2500
+
+
+def grid_cells(
+    lat: float | None = None,
+    lon: float | None = None,
+    radius_km: float | None = None,
+    bbox: list[float] | None = None,
+    step_km: float = 1.0,
+) -> list[tuple[float, float]]:
+    """
+    Lattice of (lat, lon) cell centres spaced step_km apart.
+    Either a circle (lat, lon, radius_km) or bbox [min_lon, min_lat, max_lon, max_lat].
+    Raises ValueError on bad input or when the lattice exceeds MAX_CELLS.
+    """
+    if not math.isfinite(step_km) or step_km <= 0:
+        raise ValueError("step_km must be a positive number")
+
+    if bbox is not None:
+        if len(bbox) != 4:
+            raise ValueError("bbox must be [min_lon, min_lat, max_lon, max_lat]")
+        min_lon, min_lat, max_lon, max_lat = bbox
+        _check_lat_lon(min_lat, min_lon)
+        _check_lat_lon(max_lat, max_lon)
+        if min_lon >= max_lon or min_lat >= max_lat:
+            raise ValueError("bbox min values must be below max values")
+        center_lat = (min_lat + max_lat) / 2.0
+    elif lat is not None and lon is not None and radius_km is not None:
+        _check_lat_lon(lat, lon)
+        if not math.isfinite(radius_km) or radius_km <= 0:
+            raise ValueError("radius_km must be a positive number")
+        center_lat = lat
+    else:
+        raise ValueError("Provide either bbox or lat, lon and radius_km")
+
+    dlat = step_km / _KM_PER_DEG
+    dlon = step_km / (_KM_PER_DEG * max(0.01, math.cos(math.radians(center_lat))))
+    # Lattice size in floats (inf/nan once it overflows), checked before any int() or range()
+    if bbox is None:
+        # Centre the lattice on the clicked point so it is always a cell
+        k = (radius_km / step_km) // 1
+        n_lat = n_lon = 2 * k + 1
+    else:
+        n_lat = ((max_lat - min_lat) / dlat + 1e-9) // 1 + 1
+        n_lon = ((max_lon - min_lon) / dlon + 1e-9) // 1 + 1
+    if not n_lat * n_lon <= MAX_CELLS * 2:
+        # Circle keeps ~pi/4 of its bounding box; anything past 2x the cap cannot fit
+        raise ValueError(f"Scan area too large for step_km={step_km}; max {MAX_CELLS} cells")
+    n_lat, n_lon = int(n_lat), int(n_lon)
+    if bbox is None:
+        min_lat, max_lat = lat - k * dlat, lat + k * dlat
+        min_lon, max_lon = lon - k * dlon, lon + k * dlon
+
+    cells = []
+    for i in range(n_lat):
+        cell_lat = min_lat + i * dlat
+        for j in range(n_lon):
+            cell_lon = min_lon + j * dlon
+            if bbox is None:
+                dy = (cell_lat - lat) * _KM_PER_DEG
+                dx = (cell_lon - lon) * _KM_PER_DEG * math.cos(math.radians(cell_lat))
+                if dx * dx + dy * dy > radius_km * radius_km:
+                    continue
+            cells.append((round(cell_lat, 6), round(cell_lon, 6)))
+    if len(cells) > MAX_CELLS:
+        raise ValueError(f"Scan area too large for step_km={step_km}; max {MAX_CELLS} cells")
+    return cells
+
+
+def _check_lat_lon(lat: float, lon: float) -> None:
+    if not (math.isfinite(lat) and -90 <= lat <= 90):
+        raise ValueError("Latitudes must be finite and within [-90, 90]")
+    if not (math.isfinite(lon) and -180 <= lon <= 180):
+        raise ValueError("Longitudes must be finite and within [-180, 180]")
+
+
+async def scan_area(cells: list[tuple[float, float]], fast: bool = False) -> list[dict]:
+    """
+    Fetch + score every cell (distilled forest if fast). Runs before the response starts, so an
+    unknown model or a full inference pool surfaces as an HTTP error rather than a cut-off stream.
+    """
+    X, _ = await fetch_feature_matrix(cells)
+    # Scoring blocks (in-process or waiting on the inference pool), so keep it off the event loop
+    return await asyncio.to_thread(predict_features, X, fast=fast)
+
+
+def scan_geojson(cells: list[tuple[float, float]], predictions: list[dict], step_km: float) -> Iterator[str]:
+    """
+    Scored cells as a GeoJSON FeatureCollection, in chunks. A feature that fails to encode ends
+    the collection early with an "error" member, so the body is always well-formed JSON.
+    """
+    yield '{"type":"FeatureCollection","properties":' + json.dumps(
+        {"cells": len(cells), "step_km": step_km}
+    ) + ',"features":['
+    try:
+        for i, ((cell_lat, cell_lon), pred) in enumerate(zip(cells, predictions)):
+            feature = {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [cell_lon, cell_lat]},
+                "properties": {
+                    "survivability": pred["survivability"],
+                    "label": pred["label"],
+                    "confidence": pred["confidence"],
+                    "probabilities": pred["probabilities"],
+                },
+            }
+            yield ("," if i else "") + json.dumps(feature)
+    except Exception as e:
+        yield '],"error":' + json.dumps({"detail": str(e)}) + "}"
+        return
+    yield "]}"
+
+
+async def scan_area_table(cells: list[tuple[float, float]], fast: bool = False) -> dict[str, object]:
+    """Fetch + score every cell, as columns: lat, lon (float64) then the predict_features_table columns."""
+    X, _ = await fetch_feature_matrix(cells)
+    coords = np.asarray(cells, dtype=np.float64).reshape(-1, 2)
+    scored = await asyncio.to_thread(predict_features_table, X, fast=fast)
+    return {"lat": coords[:, 0], "lon": coords[:, 1], **scored}
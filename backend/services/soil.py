@@ -0,0 +1,133 @@
+"""
+Soil provider: SoilGrids parsing helpers and an offline grid store of precomputed,
+depth-averaged nitrogen and SOC means (built by backend/ingest_soilgrids.py).
+
+Grid directory layout:
+    meta.json      {"min_lat", "min_lon", "step_deg", "shape": [n_lat, n_lon]}
+    nitrogen.npy   float32 depth-averaged nitrogen mean (cg/kg), NaN = no data
+    soc.npy        float32 depth-averaged SOC mean (dg/kg), NaN = no data
+    done.npy       uint8, 1 where the cell has been queried (lets ingest resume)
+Row 0 is min_lat, column 0 is min_lon; cell (i, j) is centred on
+(min_lat + i * step_deg, min_lon + j * step_deg).
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+def soil_layer_means(data: dict) -> tuple[float | None, float | None]:
+    """Depth-averaged (nitrogen cg/kg, SOC dg/kg) means from a SoilGrids properties/query response."""
+    nitrogen = None
+    soc = None
+    props = data.get("properties") or {}
+    layers = props.get("layers") or []
+    for layer in layers:
+        name = (layer.get("name") or "").lower()
+        depths = layer.get("depths") or []
+        vals = []
+        for d in depths:
+            values = d.get("values") or {}
+            v = values.get("mean") or values.get("Q0.5")
+            if v is not None:
+                vals.append(float(v))
+        if not vals:
+            continue
+        mean_val = sum(vals) / len(vals)
+        if "nitrogen" in name or "n_total" in name:
+            nitrogen = mean_val
+        elif "soc" in name or "organic_carbon" in name:
+            soc = mean_val
+    return nitrogen, soc
+
+
+def soil_features_from_means(nitrogen: float | None, soc: float | None) -> tuple[dict, float | None]:
+    """Map SoilGrids means to model soil features; return (out dict, soc_g_kg for fallbacks)."""
+    out = {"soil_tn": None, "soil_tp": None, "soil_ap": None, "soil_an": None}
+    soc_g_kg = None
+    if nitrogen is not None:
+        # SoilGrids N is cg/kg; mean_val/100 = g/kg. Map to training range [0.01, 0.25].
+        # Training soil_TN ~0.01–0.22; 100 cg/kg ≈ 0.1 in training scale.
+        raw_g_kg = nitrogen / 100.0
+        soil_tn = min(0.25, max(0.01, raw_g_kg * 0.12))
+        out["soil_tn"] = round(soil_tn, 4)
+        out["soil_an"] = round(soil_tn * 0.033, 4)  # AN/TN ~0.033 from training
+    if soc is not None:
+        soc_g_kg = soc / 10.0
+        soil_p = min(1.0, max(0.05, soc_g_kg * 0.012))
+        out["soil_tp"] = round(soil_p, 4)
+        out["soil_ap"] = round(soil_p * 0.95, 4)
+    if out["soil_tn"] is None and soc_g_kg is not None and soc_g_kg > 0:
+        # SOC g/kg; C:N ~10:1 so N ≈ soc/10 g/kg. Map to training range [0.01, 0.25].
+        soil_tn_proxy = min(0.25, max(0.01, soc_g_kg * 0.002))
+        out["soil_tn"] = round(soil_tn_proxy, 4)
+        out["soil_an"] = round(soil_tn_proxy * 0.033, 4)
+    return out, soc_g_kg
+
+
+class SoilGridStore:
+    """Precomputed SoilGrids means on a regular lat/lon grid, memory-mapped from .npy files."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        meta = json.loads((self.directory / "meta.json").read_text())
+        self.min_lat = float(meta["min_lat"])
+        self.min_lon = float(meta["min_lon"])
+        self.step_deg = float(meta["step_deg"])
+        self.shape = tuple(meta["shape"])
+        self.nitrogen = np.load(self.directory / "nitrogen.npy", mmap_mode="r")
+        self.soc = np.load(self.directory / "soc.npy", mmap_mode="r")
+        self.done = np.load(self.directory / "done.npy", mmap_mode="r")
+
+    def lookup(self, lats: np.ndarray, lons: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Nearest-cell (nitrogen, soc, covered) for each point. covered is False outside the grid
+        or for cells not yet ingested; covered cells may still be NaN where SoilGrids has no data.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        i = np.rint((lats - self.min_lat) / self.step_deg).astype(np.int64)
+        j = np.rint((lons - self.min_lon) / self.step_deg).astype(np.int64)
+        inside = (i >= 0) & (i < self.shape[0]) & (j >= 0) & (j < self.shape[1])
+        nitrogen = np.full(lats.shape, np.nan)
+        soc = np.full(lats.shape, np.nan)
+        covered = np.zeros(lats.shape, dtype=bool)
+        nitrogen[inside] = self.nitrogen[i[inside], j[inside]]
+        soc[inside] = self.soc[i[inside], j[inside]]
+        covered[inside] = self.done[i[inside], j[inside]] == 1
+        return nitrogen, soc, covered
+
+
+_SOIL_DIR = os.getenv("SOIL_GRID_DIR")
+_store: SoilGridStore | None = None
+
+
+def _get_store() -> SoilGridStore | None:
+    """Open the grid on first use; None when SOIL_GRID_DIR is unset or not ingested yet."""
+    global _store
+    if _store is None and _SOIL_DIR and (Path(_SOIL_DIR) / "meta.json").exists():
+        _store = SoilGridStore(_SOIL_DIR)
+    return _store
+
+
+def local_soil(points: list[tuple[float, float]]) -> list[dict[str, float | None] | None]:
+    """
+    Soil features from the offline grid (SOIL_GRID_DIR) for each (lat, lon); None where the grid
+    does not cover the point. Covered cells without SoilGrids data give all-None features.
+    """
+    store = _get_store()
+    if store is None or not points:
+        return [None] * len(points)
+    lats, lons = zip(*points)
+    nitrogen, soc, covered = store.lookup(np.array(lats), np.array(lons))
+    out = []
+    for n, c, ok in zip(nitrogen, soc, covered):
+        if not ok:
+            out.append(None)
+            continue
+        features, _ = soil_features_from_means(
+            None if np.isnan(n) else float(n), None if np.isnan(c) else float(c)
+        )
+        out.append(features)
+    return out
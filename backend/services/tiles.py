@@ -0,0 +1,92 @@
+"""
+Precomputed survivability tiles (written by build_tiles.py): XYZ slippy-map tiles read from
+TILES_DIR with a content-hash ETag, so map clients revalidate with If-None-Match and get a
+304 instead of the tile once they have it.
+
+Layers:
+- survivability/{z}/{x}/{y}.png: 256×256 RGBA, survivability colour bands, transparent off-lattice.
+- data/{z}/{x}/{y}.bin: 5×256×256 uint8 (survivability, then P(unhealthy), P(subhealthy),
+  P(healthy), P(very_healthy)); value = byte / 254, 255 = no data. Stored gzip-compressed and
+  sent with Content-Encoding: gzip, so browsers hand fetch() the raw bytes.
+"""
+import gzip
+import hashlib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+TILES_DIR = Path(os.getenv("TILES_DIR", str(_BACKEND_DIR / "tiles")))
+# Browser cache lifetime for tiles; after it, clients revalidate with If-None-Match
+TILE_MAX_AGE = int(os.getenv("TILE_MAX_AGE", "3600"))
+
+TILE_SIZE = 256
+# Byte value meaning "no data" in data tiles; data values are round(p * DATA_SCALE)
+NO_DATA = 255
+DATA_SCALE = 254
+DATA_CHANNELS = ["survivability", "unhealthy", "subhealthy", "healthy", "very_healthy"]
+
+# layer -> (file extension, media type, stored content encoding)
+LAYERS = {
+    "survivability": ("png", "image/png", None),
+    "data": ("bin", "application/octet-stream", "gzip"),
+}
+METADATA_FILE = "metadata.json"
+
+
+class Tile:
+    __slots__ = ("body", "etag", "media_type", "encoding")
+
+    def __init__(self, body: bytes, etag: str, media_type: str, encoding: str | None):
+        self.body = body
+        self.etag = etag
+        self.media_type = media_type
+        self.encoding = encoding
+
+
+def tile_path(root: Path, layer: str, z: int, x: int, y: int) -> Path:
+    return root / layer / str(z) / str(x) / f"{y}.{LAYERS[layer][0]}"
+
+
+@lru_cache(maxsize=4096)
+def _etag(path: str, mtime_ns: int, size: int) -> str:
+    # Keyed by mtime and size so a rebuilt tile is re-hashed; unchanged content keeps its ETag
+    with open(path, "rb") as f:
+        return '"' + hashlib.blake2b(f.read(), digest_size=12).hexdigest() + '"'
+
+
+def read_tile(layer: str, z: int, x: int, y: int, accept_encoding: str = "") -> Tile | None:
+    """
+    The stored tile, or None when it was not built (outside coverage or zoom range).
+    Raises KeyError for an unknown layer. Gzip-stored tiles are decompressed for clients
+    that do not accept gzip (with their own ETag, as a different representation).
+    """
+    _, media_type, encoding = LAYERS[layer]
+    path = tile_path(TILES_DIR, layer, z, x, y)
+    try:
+        stat = path.stat()
+        body = path.read_bytes()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    etag = _etag(str(path), stat.st_mtime_ns, stat.st_size)
+    if encoding == "gzip" and "gzip" not in accept_encoding.lower():
+        return Tile(gzip.decompress(body), etag[:-1] + '-raw"', media_type, None)
+    return Tile(body, etag, media_type, encoding)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def metadata() -> dict | None:
+    """Build metadata (bounds, zoom range, model, lattice step) or None when no tiles are built."""
+    try:
+        return json.loads((TILES_DIR / METADATA_FILE).read_text())
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,232 @@
+"""
+Per-upstream request scheduling: token-bucket rate limit, bounded concurrency, jittered
+retries for 429/5xx, and a circuit breaker that fails fast while a host is unhealthy
+(callers then fall back to proxy/default values instead of waiting out timeouts).
+"""
+import asyncio
+import random
+import time
+
+import httpx
+
+try:
+    from backend.services.http_client import upstream_timeout
+    from backend.services.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY, record_timing
+except ImportError:
+    from services.http_client import upstream_timeout
+    from services.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY, record_timing
+
+
+class UpstreamError(Exception):
+    """Upstream call failed, was rate limited, or was short-circuited by an open breaker."""
+
+
+class TokenBucket:
+    """Refills `rate` tokens/s up to `burst`. Callers reserve a token and sleep off any deficit."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self, max_wait: float) -> float | None:
+        """Take a token; return seconds to wait before using it, or None if that exceeds max_wait."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+
+class CircuitBreaker:
+    """
+    closed: calls flow. After `threshold` consecutive failures -> open: calls fail fast.
+    After `reset_after` seconds -> half_open: one trial call; success closes, failure re-opens.
+    """
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Give back a half-open trial slot when the trial ended without a success or failure."""
+        self._trial = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+def _error_kind(e: httpx.HTTPError) -> str:
+    if isinstance(e, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(e, httpx.ConnectError):
+        return "connect"
+    return "error"
+
+
+def _status_kind(status: int) -> str | None:
+    if status == 429:
+        return "http_429"
+    if status >= 500:
+        return "http_5xx"
+    if status >= 400:
+        return "http_4xx"
+    return None
+
+
+class Upstream:
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        concurrency: int,
+        retries: int = 2,
+        max_queue_wait: float = 2.0,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+        self.retries = retries
+        self.max_queue_wait = max_queue_wait
+        self.breaker = breaker or CircuitBreaker()
+        self._slot: asyncio.Semaphore | None = None
+        self._slot_loop: asyncio.AbstractEventLoop | None = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # A semaphore binds to the loop that first waits on it; UPSTREAMS outlives loops (TestClient
+        # instances, benchmarks, CLIs calling asyncio.run more than once), so replace it per loop
+        loop = asyncio.get_running_loop()
+        if self._slot is None or self._slot_loop is not loop:
+            self._slot = asyncio.Semaphore(self.concurrency)
+            self._slot_loop = loop
+        return self._slot
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Full jitter: uniform in [0, 0.25 * 2^attempt]
+        return random.uniform(0, 0.25 * (2 ** attempt))
+
+    async def get(self, client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+        """GET through the rate limiter and breaker; returns a 2xx response or raises UpstreamError."""
+        trial = self.breaker.state == "half_open"
+        if not self.breaker.allow():
+            UPSTREAM_ERRORS.inc(upstream=self.name, kind="circuit_open")
+            raise UpstreamError(f"{self.name}: circuit open")
+        settled = False
+        try:
+            for attempt in range(self.retries + 1):
+                wait = self.bucket.reserve(self.max_queue_wait)
+                if wait is None:
+                    UPSTREAM_ERRORS.inc(upstream=self.name, kind="rate_limited")
+                    raise UpstreamError(f"{self.name}: rate limited")
+                if wait:
+                    await asyncio.sleep(wait)
+                start = time.perf_counter()
+                try:
+                    async with self._semaphore():
+                        r = await client.get(url, timeout=upstream_timeout(self.name), **kwargs)
+                except httpx.HTTPError as e:
+                    # Timeouts/connection errors are not retried: each one already cost a full timeout
+                    self._observe(start, _error_kind(e))
+                    self.breaker.record_failure()
+                    settled = True
+                    raise UpstreamError(f"{self.name}: {type(e).__name__}") from e
+                self._observe(start, _status_kind(r.status_code))
+                if r.status_code == 429 or r.status_code >= 500:
+                    delay = self._backoff(attempt, r)
+                    if attempt < self.retries and delay <= self.max_queue_wait:
+                        await asyncio.sleep(delay)
+                        continue
+                    self.breaker.record_failure()
+                    settled = True
+                    raise UpstreamError(f"{self.name}: HTTP {r.status_code}")
+                # Host answered; a 4xx is our request's fault, not an unhealthy upstream
+                self.breaker.record_success()
+                settled = True
+                if r.status_code >= 400:
+                    raise UpstreamError(f"{self.name}: HTTP {r.status_code}")
+                return r
+        finally:
+            # A half-open trial that ends without a verdict (cancelled, e.g. by location_card's
+            # _first_hit, or rate limited before its retry) frees the slot for the next caller
+            if trial and not settled:
+                self.breaker.release()
+        raise UpstreamError(f"{self.name}: retries exhausted")
+
+    def _observe(self, start: float, error_kind: str | None) -> None:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_LATENCY.observe(elapsed, upstream=self.name)
+        record_timing(self.name, elapsed)
+        if error_kind is not None:
+            UPSTREAM_ERRORS.inc(upstream=self.name, kind=error_kind)
+
+    def status(self) -> dict:
+        breaker = self.breaker
+        retry_in = None
+        if breaker.opened_at is not None:
+            retry_in = round(max(0.0, breaker.opened_at + breaker.reset_after - time.monotonic()), 1)
+        return {
+            "state": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "retry_in_s": retry_in,
+        }
+
+
+# Quotas: Open-Meteo free tier ~600/min; Open-Elevation is a small public box; SoilGrids 5/min
+UPSTREAMS = {
+    "open_meteo": Upstream("open_meteo", rate=10.0, burst=10, concurrency=8),
+    "open_elevation": Upstream("open_elevation", rate=5.0, burst=5, concurrency=4, retries=1),
+    "soilgrids": Upstream(
+        "soilgrids",
+        rate=5 / 60,
+        burst=5,
+        concurrency=2,
+        retries=1,
+        breaker=CircuitBreaker(threshold=3, reset_after=60.0),
+    ),
+    # Location card: up to 6 concurrent place-type queries per card
+    "google_places": Upstream("google_places", rate=50.0, burst=60, concurrency=24, retries=0),
+}
+
+
+def upstream_status() -> dict[str, dict]:
+    return {name: upstream.status() for name, upstream in UPSTREAMS.items()}
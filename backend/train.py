@@ -0,0 +1,352 @@
+"""
+Train and compare the RandomForest, XGBoost and LogisticRegression models in one run:
+cross-validated hyperparameter search for all three families in parallel, then fit time,
+inference latency (one row and per row in a batch), serving artifact size and accuracy for
+every candidate, so models can be picked on the accuracy/latency trade-off.
+
+Features&Labels.csv is parsed once into .npy files in --cache-dir (reused until the CSV
+changes); pool workers memory-map them instead of each re-reading the CSV. Splits match the
+per-model scripts (60/20/20 stratified, random_state=42): the search runs k-fold CV on the
+train split, and each candidate is then refit on train and scored on validation and test.
+Latency is measured in the parent process, one candidate at a time, on the form the backend
+serves (compiled forest for rf).
+
+Usage (from project root):
+    python -m backend.train                          # full grid, report only
+    python -m backend.train --quick --jobs 4
+    python -m backend.train --save                   # write the best model per family
+    python -m backend.train --save --max-row-latency-ms 0.5
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import pickle
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+try:
+    from backend.export_forest import check_parity
+    from backend.services.forest import CompiledForest, compile_forest
+except ImportError:
+    from export_forest import check_parity
+    from services.forest import CompiledForest, compile_forest
+
+BACKEND_DIR = Path(__file__).resolve().parent
+FEATURES = ["elevation", "temperature", "humidity", "soil_TN", "soil_TP", "soil_AP", "soil_AN"]
+LABEL = "health_class"
+RANDOM_STATE = 42
+
+# Artifacts read by services/registry.py
+ARTIFACTS = {
+    "rf": BACKEND_DIR / "tree_health_rf_model.pkl",
+    "xgb": BACKEND_DIR / "tree_health_xgb_model.json",
+    "logreg": BACKEND_DIR / "tree_health_logreg_model.pkl",
+}
+COMPILED_RF = BACKEND_DIR / "tree_health_rf_compiled.joblib"
+
+# Search grids; the per-model scripts' settings are included in each
+GRIDS = {
+    "rf": {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [6, 10, 16],
+        "min_samples_leaf": [2, 5],
+    },
+    "xgb": {
+        "n_estimators": [100, 300],
+        "max_depth": [3, 4, 6],
+        "learning_rate": [0.05, 0.1],
+    },
+    "logreg": {
+        "C": [0.1, 1.0, 10.0],
+    },
+}
+QUICK_GRIDS = {
+    "rf": {"n_estimators": [50, 200], "max_depth": [10]},
+    "xgb": {"n_estimators": [100], "max_depth": [4], "learning_rate": [0.05, 0.1]},
+    "logreg": {"C": [1.0]},
+}
+
+# Rows per batch-latency measurement, and repeats (best-of for batch, median for single rows)
+BATCH_ROWS = 1000
+BATCH_REPEATS = 5
+SINGLE_ROW_CALLS = 200
+
+
+def load_dataset(csv: Path, cache_dir: Path) -> tuple[Path, Path]:
+    """Paths of cached X (float64 N×7) and y .npy files, (re)built from the CSV when it is newer."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    x_path = cache_dir / f"{csv.stem}.X.npy"
+    y_path = cache_dir / f"{csv.stem}.y.npy"
+    csv_mtime = csv.stat().st_mtime
+    if not (x_path.exists() and y_path.exists() and x_path.stat().st_mtime >= csv_mtime):
+        import pandas as pd
+
+        df = pd.read_csv(csv)
+        np.save(y_path, df[LABEL].to_numpy(dtype=np.int64))
+        np.save(x_path, df[FEATURES].to_numpy(dtype=np.float64))
+    return x_path, y_path
+
+
+def split_indices(y: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(train, val, test) row indices: 60/20/20 stratified, as in the per-model scripts."""
+    from sklearn.model_selection import train_test_split
+
+    idx = np.arange(len(y))
+    train, temp = train_test_split(idx, test_size=0.4, random_state=RANDOM_STATE, stratify=y)
+    val, test = train_test_split(temp, test_size=0.5, random_state=RANDOM_STATE, stratify=y[temp])
+    return train, val, test
+
+
+def build_model(family: str, params: dict):
+    # n_jobs=1: parallelism comes from the process pool
+    if family == "rf":
+        from sklearn.ensemble import RandomForestClassifier
+
+        return RandomForestClassifier(min_samples_split=5, random_state=RANDOM_STATE, n_jobs=1, **params)
+    if family == "xgb":
+        from xgboost import XGBClassifier
+
+        return XGBClassifier(random_state=RANDOM_STATE, n_jobs=1, **params)
+    if family == "logreg":
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        return make_pipeline(
+            StandardScaler(), LogisticRegression(solver="lbfgs", max_iter=1000, random_state=RANDOM_STATE, **params)
+        )
+    raise ValueError(f"Unknown model family '{family}'")
+
+
+def candidates(grids: dict[str, dict]) -> list[tuple[str, dict]]:
+    out = []
+    for family, grid in grids.items():
+        names = list(grid)
+        for values in itertools.product(*(grid[n] for n in names)):
+            out.append((family, dict(zip(names, values))))
+    return out
+
+
+def _frame(X: np.ndarray):
+    # Named columns, as the serving code selects features by feature_names_in_
+    import pandas as pd
+
+    return pd.DataFrame(X, columns=FEATURES)
+
+
+def _fit(family: str, params: dict, X: np.ndarray, y: np.ndarray):
+    model = build_model(family, params)
+    model.fit(_frame(X), y)
+    return model
+
+
+def _predict(model, X: np.ndarray) -> np.ndarray:
+    return np.asarray(model.predict(_frame(X))).reshape(-1)
+
+
+def evaluate_candidate(family: str, params: dict, x_path: str, y_path: str, folds: int) -> dict:
+    """Pool worker: k-fold CV accuracy on the train split, then refit on train; returns scores + model."""
+    from sklearn.model_selection import StratifiedKFold
+
+    X = np.load(x_path, mmap_mode="r")
+    y = np.load(y_path, mmap_mode="r")
+    train, val, test = split_indices(np.asarray(y))
+    X_train, y_train = np.asarray(X[train]), np.asarray(y[train])
+
+    scores = []
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+    for fit_idx, score_idx in cv.split(X_train, y_train):
+        model = _fit(family, params, X_train[fit_idx], y_train[fit_idx])
+        scores.append(float((_predict(model, X_train[score_idx]) == y_train[score_idx]).mean()))
+
+    start = time.perf_counter()
+    model = _fit(family, params, X_train, y_train)
+    fit_s = time.perf_counter() - start
+    return {
+        "family": family,
+        "params": params,
+        "cv_accuracy": round(float(np.mean(scores)), 4),
+        "cv_std": round(float(np.std(scores)), 4),
+        "fit_s": round(fit_s, 3),
+        "val_accuracy": round(float((_predict(model, np.asarray(X[val])) == y[val]).mean()), 4),
+        "test_accuracy": round(float((_predict(model, np.asarray(X[test])) == y[test]).mean()), 4),
+        "model": model,
+    }
+
+
+def serving_form(family: str, model):
+    """What the registry would load for this model (rf is served compiled)."""
+    return CompiledForest(compile_forest(model)) if family == "rf" else model
+
+
+def artifact_bytes(family: str, model) -> int:
+    """Size of the artifact the registry loads (compiled arrays for rf, native JSON for xgb)."""
+    if family == "rf":
+        buf = io.BytesIO()
+        joblib.dump(compile_forest(model), buf)
+        return buf.tell()
+    if family == "xgb":
+        return len(model.get_booster().save_raw(raw_format="json"))
+    return len(pickle.dumps(model))
+
+
+def measure_latency(served, X: np.ndarray) -> dict:
+    """Median ms per single-row predict_proba, and best-of per-row µs in a BATCH_ROWS batch."""
+    with warnings.catch_warnings():
+        # The backend passes plain arrays; sklearn warns that they lack the fitted feature names
+        warnings.simplefilter("ignore", UserWarning)
+        return _measure_latency(served, X)
+
+
+def _measure_latency(served, X: np.ndarray) -> dict:
+    rows = X[:SINGLE_ROW_CALLS]
+    served.predict_proba(rows[:1])
+    single = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        served.predict_proba(rows[i:i + 1])
+        single.append(time.perf_counter() - start)
+    batch = X[np.arange(BATCH_ROWS) % len(X)]
+    best = min(_timed(served.predict_proba, batch) for _ in range(BATCH_REPEATS))
+    return {
+        "row_latency_ms": round(float(np.median(single)) * 1000, 4),
+        "batch_row_us": round(best / BATCH_ROWS * 1e6, 3),
+    }
+
+
+def _timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def mark_pareto(results: list[dict]) -> None:
+    """pareto=True for candidates no other candidate beats on both CV accuracy and row latency."""
+    for r in results:
+        r["pareto"] = not any(
+            o["cv_accuracy"] >= r["cv_accuracy"] and o["row_latency_ms"] <= r["row_latency_ms"]
+            and (o["cv_accuracy"] > r["cv_accuracy"] or o["row_latency_ms"] < r["row_latency_ms"])
+            for o in results
+        )
+
+
+def select(results: list[dict], max_row_latency_ms: float | None) -> dict[str, dict]:
+    """Best candidate per family by CV accuracy (ties: faster), within the latency budget if given."""
+    best: dict[str, dict] = {}
+    for r in results:
+        if max_row_latency_ms is not None and r["row_latency_ms"] > max_row_latency_ms:
+            continue
+        current = best.get(r["family"])
+        if current is None or (r["cv_accuracy"], -r["row_latency_ms"]) > (
+            current["cv_accuracy"], -current["row_latency_ms"]
+        ):
+            best[r["family"]] = r
+    return best
+
+
+def save(family: str, model, X: np.ndarray) -> list[Path]:
+    """Write the model where the registry loads it from (rf also exported compiled, parity-checked)."""
+    path = ARTIFACTS[family]
+    if family == "xgb":
+        model.save_model(path)
+        return [path]
+    joblib.dump(model, path)
+    if family != "rf":
+        return [path]
+    arrays = compile_forest(model)
+    check_parity(model, CompiledForest(arrays), _frame(X))
+    joblib.dump(arrays, COMPILED_RF)
+    return [path, COMPILED_RF]
+
+
+def print_table(results: list[dict], chosen: dict[str, dict]) -> None:
+    print(
+        f"{'model':<8}{'params':<52}{'cv acc':>8}{'±':>7}{'val':>8}{'test':>8}"
+        f"{'fit s':>8}{'row ms':>9}{'batch µs':>10}{'size KB':>10}"
+    )
+    for r in sorted(results, key=lambda r: (r["family"], -r["cv_accuracy"])):
+        params = ",".join(f"{k}={v}" for k, v in r["params"].items())
+        flags = ("*" if chosen.get(r["family"]) is r else "") + ("P" if r["pareto"] else "")
+        print(
+            f"{r['family']:<8}{params[:50]:<52}{r['cv_accuracy']:>8.4f}{r['cv_std']:>7.4f}"
+            f"{r['val_accuracy']:>8.4f}{r['test_accuracy']:>8.4f}{r['fit_s']:>8.2f}"
+            f"{r['row_latency_ms']:>9.3f}{r['batch_row_us']:>10.2f}{r['size_bytes'] / 1024:>10.0f} {flags}"
+        )
+    print("* selected per family   P on the accuracy/row-latency Pareto front")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", type=Path, default=BACKEND_DIR / "Features&Labels.csv")
+    parser.add_argument("--cache-dir", type=Path, default=BACKEND_DIR / ".train_cache")
+    parser.add_argument("--families", nargs="+", choices=sorted(GRIDS), default=list(GRIDS))
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--quick", action="store_true", help="small grid, for a smoke run")
+    parser.add_argument("--out", type=Path, default=None, help="report JSON (default <cache-dir>/report.json)")
+    parser.add_argument("--save", action="store_true", help="write the selected model per family")
+    parser.add_argument(
+        "--max-row-latency-ms", type=float, default=None,
+        help="only select candidates at or below this single-row latency",
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    x_path, y_path = load_dataset(args.data, args.cache_dir)
+    grids = QUICK_GRIDS if args.quick else GRIDS
+    todo = candidates({f: grids[f] for f in args.families})
+    print(f"{len(todo)} candidates, {args.folds}-fold CV, {args.jobs} workers", file=sys.stderr)
+
+    fitted = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [
+            pool.submit(evaluate_candidate, family, params, str(x_path), str(y_path), args.folds)
+            for family, params in todo
+        ]
+        for future in as_completed(futures):
+            r = future.result()
+            fitted.append(r)
+            print(f"  {r['family']} {r['params']} cv={r['cv_accuracy']:.4f} fit={r['fit_s']:.2f}s", file=sys.stderr)
+
+    # Latency in this process, one model at a time, so candidates do not compete for CPU
+    X = np.load(x_path)
+    y = np.load(y_path)
+    _, val, _ = split_indices(y)
+    for r in fitted:
+        r.update(measure_latency(serving_form(r["family"], r["model"]), X[val]))
+        r["size_bytes"] = artifact_bytes(r["family"], r["model"])
+    mark_pareto(fitted)
+    chosen = select(fitted, args.max_row_latency_ms)
+    print_table(fitted, chosen)
+
+    if args.save:
+        for family, r in chosen.items():
+            for path in save(family, r["model"], X):
+                print(f"Saved {family} {r['params']} to {path}")
+        missing = set(args.families) - set(chosen)
+        if missing:
+            print(f"No candidate within the latency budget for: {', '.join(sorted(missing))}", file=sys.stderr)
+
+    out = args.out or args.cache_dir / "report.json"
+    report = {
+        "data": str(args.data),
+        "rows": len(y),
+        "folds": args.folds,
+        "elapsed_s": round(time.perf_counter() - start, 1),
+        "selected": {family: r["params"] for family, r in chosen.items()},
+        "candidates": [{k: v for k, v in r.items() if k != "model"} for r in fitted],
+    }
+    out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Wrote {out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
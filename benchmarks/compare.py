@@ -0,0 +1,62 @@
+"""
+Diff two benchmark result files (from benchmarks/run.py): p50, p99 and throughput per case,
+as percentage change from OLD to NEW.
+
+Usage (from project root):
+    python -m benchmarks.compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+    python -m benchmarks.compare OLD.json NEW.json --fail-above 10   # exit 1 on >10% p50 regression
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _change(old: float | None, new: float | None) -> float | None:
+    if old is None or new is None or old == 0:
+        return None
+    return (new - old) / old * 100
+
+
+def _fmt(change: float | None) -> str:
+    return "     n/a" if change is None else f"{change:+7.1f}%"
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--fail-above", type=float, default=None, help="p50 regression %% that fails the run")
+    args = parser.parse_args(argv)
+
+    old = json.loads(args.old.read_text())
+    new = json.loads(args.new.read_text())
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    sources = (old["meta"].get("fixtures", "synthetic"), new["meta"].get("fixtures", "synthetic"))
+    if sources[0] != sources[1]:
+        print(f"note: fixtures differ ({sources[0]} -> {sources[1]}); fetch cases are not comparable")
+    print(f"{'case':<24}{'p50 ms':>20}{'p50':>9}{'p99':>9}{'throughput':>12}")
+
+    regressions = []
+    for name, n in new["results"].items():
+        o = old["results"].get(name)
+        if o is None:
+            print(f"{name:<24}{'(new)':>20}")
+            continue
+        p50 = _change(o["p50_ms"], n["p50_ms"])
+        print(
+            f"{name:<24}{o['p50_ms']:>9.3f} ->{n['p50_ms']:>9.3f}"
+            f"{_fmt(p50):>9}{_fmt(_change(o['p99_ms'], n['p99_ms'])):>9}"
+            f"{_fmt(_change(o['throughput_per_s'], n['throughput_per_s'])):>12}"
+        )
+        if args.fail_above is not None and p50 is not None and p50 > args.fail_above:
+            regressions.append(name)
+    for name in old["results"].keys() - new["results"].keys():
+        print(f"{name:<24}{'(removed)':>20}")
+
+    if regressions:
+        sys.exit(f"p50 regressed more than {args.fail_above}% in: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
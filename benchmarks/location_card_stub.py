@@ -0,0 +1,136 @@
+"""
+Local stub-server harness for /api/location-card.
+
+Starts a stub Google Places Nearby Search server on localhost (fixed latency, results only for
+--hit-types), points the backend at it via PLACES_NEARBY_URL, swaps the Gemini call for a
+fixed-latency stub, then requests cards for --points distinct locations concurrently (cold)
+and again (cached). Checks every card picked the highest-priority hit type and reports latency
+and how many Places requests were made.
+
+Usage (from project root):
+    python -m benchmarks.location_card_stub --latency-ms 150 --hit-types tourist_attraction
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+
+def make_stub_app(latency_s: float, hit_types: set[str], counter: dict) -> FastAPI:
+    stub = FastAPI()
+
+    @stub.get("/maps/api/place/nearbysearch/json")
+    async def nearbysearch(location: str, radius: int, type: str, key: str):
+        counter["requests"] += 1
+        await asyncio.sleep(latency_s)
+        if type not in hit_types:
+            return {"status": "ZERO_RESULTS", "results": []}
+        return {
+            "status": "OK",
+            "results": [{
+                "name": f"Stub {type}",
+                "place_id": f"stub-{type}-{location}",
+                "photos": [{"photo_reference": f"ref-{type}"}],
+            }],
+        }
+
+    return stub
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stub_server(app: FastAPI) -> tuple[uvicorn.Server, str]:
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}/maps/api/place/nearbysearch/json"
+
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+async def _run(args, expected: str | None) -> int:
+    from backend import main
+    from backend.services import location_card
+
+    async def fake_description(location_for_prompt: str, gemini_key: str) -> str:
+        await asyncio.sleep(args.gemini_ms / 1000)
+        return f"Stub description of {location_for_prompt}."
+
+    location_card._generate_description = fake_description
+    main.MAPS_KEY = main.GEMINI_KEY = "stub"
+
+    rng = random.Random(args.seed)
+    points = [(rng.uniform(25, 49), rng.uniform(-124, -67)) for _ in range(args.points)]
+    transport = httpx.ASGITransport(app=main.app)
+    failures = 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        async def one(lat: float, lon: float) -> float:
+            nonlocal failures
+            start = time.perf_counter()
+            r = await client.get("/api/location-card", params={"lat": lat, "lon": lon})
+            elapsed = time.perf_counter() - start
+            # With no hit anywhere the card falls back to the formatted coordinates
+            if r.status_code != 200 or r.json()["placeName"] != (expected or f"{lat:.5f}, {lon:.5f}"):
+                failures += 1
+                print(f"  unexpected card for {lat:.3f},{lon:.3f}: {r.status_code} {r.text[:200]}")
+            return elapsed
+
+        for phase in ("cold", "cached"):
+            before = args.counter["requests"]
+            latencies = await asyncio.gather(*(one(lat, lon) for lat, lon in points))
+            ms = [t * 1000 for t in latencies]
+            print(
+                f"{phase:>6}: {len(ms)} cards  p50 {statistics.median(ms):7.1f} ms  "
+                f"p99 {_percentile(ms, 0.99):7.1f} ms  places requests {args.counter['requests'] - before}"
+            )
+    await location_card.get_client().aclose()
+    return failures
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="stub Places latency per request")
+    parser.add_argument("--gemini-ms", type=float, default=800.0, help="stub Gemini latency per description")
+    parser.add_argument("--hit-types", default="tourist_attraction", help="comma-separated types that return a place")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    args.counter = {"requests": 0}
+    hit_types = {t for t in args.hit_types.split(",") if t}
+    server, url = start_stub_server(make_stub_app(args.latency_ms / 1000, hit_types, args.counter))
+    # Must be set before the backend is imported (read once at import)
+    os.environ["PLACES_NEARBY_URL"] = url
+
+    from backend.services.location_card import PLACE_TYPES
+
+    first = next((t for t in PLACE_TYPES if t in hit_types), None)
+    expected = f"Stub {first}" if first else None
+    try:
+        failures = asyncio.run(_run(args, expected))
+    finally:
+        server.should_exit = True
+    if failures:
+        sys.exit(f"{failures} cards did not match the expected place")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Re-record the upstream fixtures replayed by the benchmarks (benchmarks/fixtures/) from the
+live Open-Meteo, Open-Elevation and SoilGrids APIs at SAMPLE_POINTS, using the same query
+parameters as backend/services/fetch.py. SoilGrids allows 5 requests/min, so this pauses
+between points. Marks fixtures/source.json "recorded" once every file is written.
+
+Usage (from project root):
+    python -m benchmarks.record_fixtures
+"""
+import json
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from backend.services.fetch import _OPEN_ELEVATION_URL, _OPEN_METEO_URL, _open_meteo_params
+from benchmarks.mock_upstreams import FIXTURES_DIR, SAMPLE_POINTS, SOURCE_FILE
+
+SOILGRIDS_URL = "https://rest.isric.org/soilgrids/v2.0/properties/query"
+
+
+def main() -> None:
+    with httpx.Client(timeout=30.0) as client:
+        lats = ",".join(str(la) for la, _ in SAMPLE_POINTS)
+        lons = ",".join(str(lo) for _, lo in SAMPLE_POINTS)
+        r = client.get(_OPEN_METEO_URL, params=_open_meteo_params(lats, lons))
+        r.raise_for_status()
+        (FIXTURES_DIR / "open_meteo.json").write_text(json.dumps(r.json(), indent=1, ensure_ascii=False))
+
+        locations = "|".join(f"{la},{lo}" for la, lo in SAMPLE_POINTS)
+        r = client.get(_OPEN_ELEVATION_URL, params={"locations": locations})
+        r.raise_for_status()
+        (FIXTURES_DIR / "open_elevation.json").write_text(json.dumps(r.json(), indent=1))
+
+        soil = []
+        for i, (lat, lon) in enumerate(SAMPLE_POINTS):
+            if i:
+                time.sleep(15)
+            r = client.get(SOILGRIDS_URL, params={"lat": lat, "lon": lon, "property": ["nitrogen", "soc"]})
+            r.raise_for_status()
+            soil.append(r.json())
+        (FIXTURES_DIR / "soilgrids.json").write_text(json.dumps(soil, indent=1))
+    recorded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    SOURCE_FILE.write_text(json.dumps({"source": "recorded", "recorded_at": recorded_at}, indent=1) + "\n")
+    print(f"Recorded fixtures for {len(SAMPLE_POINTS)} points in {FIXTURES_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Benchmark the fetch and predict hot paths against replayed upstream fixtures (synthetic until
+benchmarks/record_fixtures.py has been run; see mock_upstreams.py).
+
+Cases (latency p50/p99 per call, throughput from a concurrent or batched run):
+    fetch_cold / fetch_warm   fetch_features_for_point on new / already-cached points
+    predict_single            predict() on one row
+    predict_batch             predict_batch() on --batch-size rows (throughput in rows/s)
+    api_*                     FastAPI endpoints through an in-process ASGI client
+
+Results go to stdout and, as JSON, to --out (default benchmarks/results/<commit>.json);
+compare two runs with `python -m benchmarks.compare OLD.json NEW.json`.
+
+Usage (from project root):
+    python -m benchmarks.run
+    python -m benchmarks.run --quick --upstream-latency-ms 0
+    python -m benchmarks.run --inference-workers 4     # predict through the process pool
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Isolate from local settings: in-memory cache only, no local DEM/soil grid, no shadow model
+for _var in ("FEATURE_CACHE_PATH", "ELEVATION_DEM_DIR", "SOIL_GRID_DIR", "SHADOW_MODEL", "DEFAULT_MODEL"):
+    os.environ.pop(_var, None)
+os.environ["PREFETCH_TOP_K"] = "0"
+
+import httpx  # noqa: E402
+
+from benchmarks.mock_upstreams import DEFAULT_LATENCY_MS, UpstreamReplay, fixtures_source, install  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Continental US, where the training data and fixture points are
+_LAT_RANGE = (25.0, 49.0)
+_LON_RANGE = (-124.0, -67.0)
+
+
+def random_points(rng: random.Random, n: int) -> list[tuple[float, float]]:
+    return [(round(rng.uniform(*_LAT_RANGE), 4), round(rng.uniform(*_LON_RANGE), 4)) for _ in range(n)]
+
+
+def random_rows(rng: random.Random, n: int) -> list[dict]:
+    return [
+        {
+            "elevation": rng.uniform(0, 3500),
+            "temperature": rng.uniform(-5, 40),
+            "humidity": rng.uniform(5, 95),
+            "soil_tn": rng.uniform(0.01, 0.25),
+            "soil_tp": rng.uniform(0.05, 1.0),
+            "soil_ap": rng.uniform(0.05, 1.0),
+            "soil_an": rng.uniform(0.0, 0.01),
+        }
+        for _ in range(n)
+    ]
+
+
+def summarize(latencies: list[float], ops: int | None = None, wall: float | None = None) -> dict:
+    """p50/p99/mean in ms from per-call seconds; throughput = ops / wall (defaults: sequential calls)."""
+    ms = np.asarray(latencies) * 1000
+    ops = len(latencies) if ops is None else ops
+    wall = float(np.sum(latencies)) if wall is None else wall
+    return {
+        "n": len(latencies),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+        "throughput_per_s": round(ops / wall, 2) if wall > 0 else None,
+    }
+
+
+async def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    await fn(*args)
+    return time.perf_counter() - start
+
+
+async def concurrent_wall(calls: list, concurrency: int) -> float:
+    """Wall time to run all awaitables with at most `concurrency` in flight."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def run(coro):
+        async with sem:
+            await coro
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(c) for c in calls))
+    return time.perf_counter() - start
+
+
+async def bench_fetch(args, rng: random.Random) -> dict:
+    from backend.services import fetch
+
+    fetch._feature_cache.clear()
+    points = random_points(rng, args.fetch_points)
+    # Sequential calls give clean per-call latency; the concurrent pass (fresh points) gives throughput
+    cold = [await timed(fetch.fetch_features_for_point, la, lo) for la, lo in points]
+    more = random_points(rng, args.fetch_points)
+    cold_wall = await concurrent_wall([fetch.fetch_features_for_point(la, lo) for la, lo in more], args.concurrency)
+
+    warm = [await timed(fetch.fetch_features_for_point, la, lo) for la, lo in points * args.warm_repeat]
+    warm_calls = [fetch.fetch_features_for_point(la, lo) for la, lo in points * args.warm_repeat]
+    warm_wall = await concurrent_wall(warm_calls, args.concurrency)
+    return {
+        "fetch_cold": summarize(cold, ops=len(more), wall=cold_wall),
+        "fetch_warm": summarize(warm, ops=len(warm_calls), wall=warm_wall),
+    }
+
+
+def bench_predict(args, rng: random.Random) -> dict:
+    from backend.services.predict import predict, predict_batch, warm_up
+
+    warm_up()
+    rows = random_rows(rng, args.predict_iterations)
+    single = []
+    for row in rows:
+        start = time.perf_counter()
+        predict(row)
+        single.append(time.perf_counter() - start)
+
+    batch_rows = random_rows(rng, args.batch_size)
+    predict_batch(batch_rows)
+    batch = []
+    for _ in range(args.batch_repeat):
+        start = time.perf_counter()
+        predict_batch(batch_rows)
+        batch.append(time.perf_counter() - start)
+    return {
+        "predict_single": summarize(single),
+        "predict_batch": summarize(batch, ops=len(batch) * args.batch_size, wall=float(np.sum(batch))),
+    }
+
+
+async def bench_api(args, rng: random.Random) -> dict:
+    from backend.main import app
+
+    points = random_points(rng, 20)
+    rows = random_rows(rng, 100)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm the cache so api_fetch_features measures the service, not replayed upstream latency
+        for la, lo in points:
+            await client.get("/api/fetch-features", params={"lat": la, "lon": lo})
+
+        cases = {
+            "api_fetch_features": lambda i: client.get(
+                "/api/fetch-features", params={"lat": points[i % len(points)][0], "lon": points[i % len(points)][1]}
+            ),
+            "api_predict": lambda i: client.post("/api/predict", json={"features": rows[i % len(rows)]}),
+            "api_predict_batch_100": lambda i: client.post("/api/predict/batch", json={"rows": rows}),
+            "api_scan_area": lambda i: client.post(
+                "/api/scan-area", json={"lat": points[0][0], "lon": points[0][1], "radius_km": 3, "step_km": 1}
+            ),
+            "api_health": lambda i: client.get("/health"),
+        }
+        for name, call in cases.items():
+            await call(0)
+            latencies = []
+            for i in range(args.api_iterations):
+                start = time.perf_counter()
+                r = await call(i)
+                latencies.append(time.perf_counter() - start)
+                if r.status_code != 200:
+                    raise RuntimeError(f"{name}: HTTP {r.status_code} {r.text[:200]}")
+            wall = await concurrent_wall([call(i) for i in range(args.api_iterations)], args.concurrency)
+            results[name] = summarize(latencies, ops=args.api_iterations, wall=wall)
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+        return sha + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=None, help="results JSON (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke run")
+    parser.add_argument(
+        "--upstream-latency-ms", type=float, default=None,
+        help="replayed latency for every upstream (default: per-upstream typical values)",
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--inference-workers", type=int, default=0,
+        help="score through the inference process pool with this many workers (default: in-process)",
+    )
+    args = parser.parse_args(argv)
+
+    scale = 0.1 if args.quick else 1.0
+    args.fetch_points = max(10, int(200 * scale))
+    args.warm_repeat = 5
+    args.predict_iterations = max(50, int(2000 * scale))
+    args.batch_size = 1000
+    args.batch_repeat = max(5, int(50 * scale))
+    args.api_iterations = max(20, int(200 * scale))
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    rng = random.Random(args.seed)
+    latency = (
+        None if args.upstream_latency_ms is None
+        else {name: args.upstream_latency_ms for name in DEFAULT_LATENCY_MS}
+    )
+    replay = UpstreamReplay(latency_ms=latency, seed=args.seed)
+    install(replay)
+
+    async def run_async() -> dict:
+        return {**await bench_fetch(args, rng), **await bench_api(args, rng)}
+
+    from backend.services import inference
+
+    # The in-process ASGI client skips the app lifespan, so the pool is started here
+    inference.start(args.inference_workers)
+    try:
+        results = bench_predict(args, rng)
+        results.update(asyncio.run(run_async()))
+    finally:
+        inference.stop()
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "seed": args.seed,
+            "quick": args.quick,
+            "concurrency": args.concurrency,
+            "inference_workers": args.inference_workers,
+            "fixtures": fixtures_source(),
+            "upstream_latency_ms": replay.latency_ms,
+            "upstream_requests": replay.requests,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    print(f"{'case':<24}{'n':>6}{'p50 ms':>11}{'p99 ms':>11}{'throughput/s':>15}")
+    for name, r in results.items():
+        print(f"{name:<24}{r['n']:>6}{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{r['throughput_per_s']:>15.1f}")
+
+    out = args.out or RESULTS_DIR / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Wrote {out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the app the way uvicorn does (backend.main / backend.services.*), from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+from backend.services.cache import MISS, FeatureCache
+
+
+def _rows(path) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def test_restarted_cache_comes_up_warm(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = FeatureCache(max_entries=100, path=path)
+    cache.set("soil", "abc", {"soil_tn": 0.1}, ttl=60)
+    cache.set("soil", "old", {"soil_tn": 0.2}, ttl=-1)
+    cache.close()
+
+    restarted = FeatureCache(max_entries=100, path=path)
+    assert restarted.get("soil", "abc") == {"soil_tn": 0.1}
+    assert restarted.get("soil", "old") is MISS
+    restarted.close()
+
+
+def test_database_is_trimmed_to_max_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = FeatureCache(max_entries=50, shards=1, path=path)
+    for i in range(1_000):
+        cache.set("weather", i, {"temperature": i}, ttl=60)
+    cache.flush()
+    assert _rows(path) <= 55
+    cache.close()
+
+    restarted = FeatureCache(max_entries=50, shards=1, path=path)
+    assert restarted.get("weather", 999) == {"temperature": 999}
+    assert restarted.get("weather", 0) is MISS
+    restarted.close()
+
+
+def test_clear_empties_the_database(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = FeatureCache(max_entries=100, path=path)
+    cache.set("soil", "abc", {"soil_tn": 0.1}, ttl=60)
+    cache.clear()
+    cache.flush()
+    assert _rows(path) == 0
+    cache.close()
+
+
+def test_counters_are_summed_across_shards():
+    cache = FeatureCache(max_entries=4, shards=2)
+    for i in range(10):
+        cache.set("soil", i, {"soil_tn": i}, ttl=60)
+    cache.get("soil", 9)
+    cache.get("soil", "absent")
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 10 - len(cache))
+
+
+def test_close_releases_the_database(tmp_path):
+    cache = FeatureCache(max_entries=100, path=str(tmp_path / "cache.db"))
+    db = cache._db
+    cache.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        db.execute("SELECT 1")
+    # The in-memory cache keeps working after close
+    cache.set("soil", "abc", {"soil_tn": 0.1}, ttl=60)
+    assert cache.get("soil", "abc") == {"soil_tn": 0.1}
@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+import pytest
+
+from backend.services.elevation import _VOID, DemTileStore, tile_name, write_tile
+
+# 3×3 tile (row 0 = north edge) covering lat 10..11, lon 20..21; nodes every 0.5°
+GRID = np.array([
+    [0, 10, 20],
+    [30, 40, 50],
+    [60, 70, _VOID],
+])
+
+
+@pytest.fixture
+def store(tmp_path):
+    write_tile(tmp_path, 10, 20, GRID)
+    return DemTileStore(tmp_path)
+
+
+def test_tile_name():
+    assert tile_name(37, -122) == "N37W122.hgt"
+    assert tile_name(-5, 7) == "S05E007.hgt"
+
+
+def test_write_tile_layout(tmp_path):
+    path = write_tile(tmp_path, 10, 20, GRID)
+    assert path.name == "N10E020.hgt"
+    assert path.stat().st_size == GRID.size * 2
+    assert np.array_equal(np.fromfile(path, dtype=">i2").reshape(3, 3), GRID)
+
+
+def test_write_tile_rejects_non_square(tmp_path):
+    with pytest.raises(ValueError):
+        write_tile(tmp_path, 10, 20, np.zeros((2, 3)))
+
+
+@pytest.mark.parametrize(
+    "lat, lon, expected",
+    [
+        (10.75, 20.25, 20.0),    # centre of the NW cell: mean of 0, 10, 30, 40
+        (10.5, 20.25, 35.0),     # on the middle row, between 30 and 40
+        (10.875, 20.125, 10.0),  # quarter of the way into the NW cell: 0.75·(0.75·0 + 0.25·10) + 0.25·(0.75·30 + 0.25·40)
+        (10.0, 20.0, 60.0),      # south-west corner
+        (10.9999999, 20.0, 0.0),  # north edge (lat 11 itself belongs to the N11 tile)
+        (10.0, 20.5, 70.0),      # south edge, middle column
+        (10.5, 20.5, 40.0),      # node next to the void: the void corner has zero weight
+        (10.75, 20.9999999, 35.0),  # east edge, between 20 and 50
+    ],
+)
+def test_bilinear_sample(store, lat, lon, expected):
+    value = store.sample(np.array([lat]), np.array([lon]))[0]
+    assert value == pytest.approx(expected, abs=1e-4)
+
+
+def test_void_and_uncovered_are_nan(store):
+    values = store.sample(np.array([10.25, 10.1, 40.0]), np.array([20.75, 20.9, 20.5]))
+    assert math.isnan(values[0])  # SE cell, void corner contributes
+    assert math.isnan(values[1])
+    assert math.isnan(values[2])  # no tile
+
+
+def test_batch_across_tiles(tmp_path):
+    write_tile(tmp_path, 10, 20, GRID)
+    write_tile(tmp_path, 10, 21, np.full((2, 2), 500))
+    store = DemTileStore(tmp_path)
+    values = store.sample(np.array([10.75, 10.3, 10.75]), np.array([20.25, 21.6, 20.25]))
+    assert values.tolist() == pytest.approx([20.0, 500.0, 20.0])
+
+
+def test_truncated_tile_is_ignored(tmp_path):
+    (tmp_path / tile_name(10, 20)).write_bytes(b"\x00" * 7)
+    assert math.isnan(DemTileStore(tmp_path).sample(np.array([10.5]), np.array([20.5]))[0])
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from backend.services import encoding
+from backend.services.encoding import ARROW, GEOJSON, JSON, MSGPACK, Categorical, encode_table, negotiate
+
+
+@pytest.fixture
+def all_formats(monkeypatch):
+    monkeypatch.setattr(encoding, "available_media_types", lambda: [JSON, ARROW, MSGPACK])
+
+
+@pytest.fixture
+def json_only(monkeypatch):
+    monkeypatch.setattr(encoding, "available_media_types", lambda: [JSON])
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON),
+        ("", JSON),
+        ("*/*", JSON),
+        ("application/*", JSON),
+        ("application/json", JSON),
+        ("application/msgpack", MSGPACK),
+        ("application/x-msgpack", MSGPACK),
+        ("application/vnd.apache.arrow.stream", ARROW),
+        ("application/msgpack, */*", MSGPACK),
+        ("application/json;q=0.5, application/msgpack", MSGPACK),
+        ("application/msgpack;q=0.2, application/vnd.apache.arrow.stream;q=0.9", ARROW),
+        ("application/json;q=0, */*", ARROW),
+        ("application/json;q=0, application/vnd.apache.arrow.stream;q=0, */*", MSGPACK),
+        ("application/json;q=0, application/*;q=0.5", ARROW),
+        ("text/csv", None),
+        ("application/vnd.apache.arrow.file", None),
+        ("*/*;q=0", None),
+    ],
+)
+def test_negotiate(all_formats, accept, expected):
+    assert negotiate(accept) == expected
+
+
+@pytest.mark.parametrize("accept", ["application/json;q=0, */*", "application/msgpack", "application/*;q=0"])
+def test_negotiate_json_only_server(json_only, accept):
+    assert negotiate(accept) is None
+
+
+def test_negotiate_geojson(all_formats):
+    assert negotiate(GEOJSON, geojson=True) == JSON
+    assert negotiate(f"{GEOJSON};q=0.5, application/msgpack", geojson=True) == MSGPACK
+    # Only endpoints that serve GeoJSON accept it
+    assert negotiate(GEOJSON) is None
+
+
+def test_msgpack_roundtrip():
+    msgpack = pytest.importorskip("msgpack")
+    table = {
+        "label": Categorical(np.array([1, 0, 1], dtype=np.uint8), ["unhealthy", "healthy"]),
+        "survivability": np.array([0.9, 0.1, 0.75], dtype=np.float32),
+    }
+    body = msgpack.unpackb(encode_table(table, MSGPACK))
+    assert body["count"] == 3
+    column = body["columns"]["survivability"]
+    assert np.array_equal(np.frombuffer(column["data"], column["dtype"]), table["survivability"])
+    label = body["columns"]["label"]
+    assert label["categories"] == ["unhealthy", "healthy"]
+    assert np.frombuffer(label["codes"]["data"], label["codes"]["dtype"]).tolist() == [1, 0, 1]
+
+
+def test_arrow_stream_roundtrip():
+    pa = pytest.importorskip("pyarrow")
+    table = {
+        "label": Categorical(np.array([1, 0], dtype=np.uint8), ["unhealthy", "healthy"]),
+        "survivability": np.array([0.9, 0.1], dtype=np.float32),
+    }
+    batch = pa.ipc.open_stream(encode_table(table, ARROW)).read_all()
+    assert batch.column("label").to_pylist() == ["healthy", "unhealthy"]
+    assert batch.column("survivability").type == pa.float32()
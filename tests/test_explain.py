@@ -0,0 +1,93 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.services import explain
+
+FEATURES = explain._INDEX_FEATURES
+LABELS = {0: "unhealthy", 1: "subhealthy", 2: "healthy", 3: "very_healthy"}
+
+
+@pytest.fixture
+def index(monkeypatch, tmp_path):
+    """Neighbor index over a small synthetic training CSV (same columns as Features&Labels.csv)."""
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        "elevation": rng.uniform(0, 4000, n),
+        "temperature": rng.uniform(-30, 50, n),
+        "humidity": rng.uniform(5, 100, n),
+        "soil_TN": rng.uniform(0.01, 0.2, n),
+        "soil_TP": rng.uniform(0.01, 0.1, n),
+        "soil_AP": rng.uniform(0.0005, 0.003, n),
+        "soil_AN": rng.uniform(0.001, 0.008, n),
+        "health_class": rng.integers(0, 4, n),
+    })
+    csv = tmp_path / "Features&Labels.csv"
+    df.to_csv(csv, index=False)
+    monkeypatch.setattr(explain, "_TRAINING_CSV", csv)
+    monkeypatch.setattr(explain, "_INDEX_PATH", tmp_path / "neighbors.joblib")
+    monkeypatch.setattr(explain, "_index", None)
+    monkeypatch.setattr(explain, "NEIGHBORS_MAX_DISTANCE", None)
+    return df
+
+
+def _similar(rows: np.ndarray) -> list[list[dict]]:
+    return explain.similar_samples(rows, FEATURES, LABELS)
+
+
+def test_out_of_range_feature_does_not_pick_the_neighbors(index):
+    warm = index.loc[index["temperature"].idxmax(), FEATURES].to_numpy(dtype=float, copy=True)
+    cold = index.loc[index["temperature"].idxmin(), FEATURES].to_numpy(dtype=float, copy=True)
+    # Live soil_AP proxies are ~100× the training maximum
+    warm[FEATURES.index("soil_AP")] = 0.247
+    cold[FEATURES.index("soil_AP")] = 0.247
+    warm_similar, cold_similar = _similar(np.array([warm, cold]))
+    assert warm_similar and cold_similar
+    assert {s["features"]["temperature"] for s in warm_similar}.isdisjoint(
+        s["features"]["temperature"] for s in cold_similar
+    )
+
+
+def test_rows_far_from_all_training_samples_get_none(index):
+    near = index.loc[0, FEATURES].to_numpy(dtype=float, copy=True)
+    # Every feature at the corner of the training box: clipped, but nothing is close to it
+    corner = index[FEATURES].max().to_numpy(dtype=float) * 10
+    near_similar, corner_similar = _similar(np.array([near, corner]))
+    assert len(near_similar) == explain.NEIGHBORS_K
+    assert near_similar[0]["distance"] == 0
+    assert corner_similar == []
+
+
+def test_configured_distance_limit(index, monkeypatch):
+    monkeypatch.setattr(explain, "NEIGHBORS_MAX_DISTANCE", 1e9)
+    corner = index[FEATURES].max().to_numpy(dtype=float) * 10
+    assert len(_similar(corner[None, :])[0]) == explain.NEIGHBORS_K
+
+
+def test_stale_index_cache_is_rebuilt(index, monkeypatch):
+    joblib.dump({"features": FEATURES}, explain._INDEX_PATH)
+    loaded = explain._load_index()
+    assert loaded["version"] == explain._INDEX_VERSION
+    assert joblib.load(explain._INDEX_PATH)["version"] == explain._INDEX_VERSION
+
+
+def test_corrupt_index_cache_is_rebuilt(index):
+    explain._INDEX_PATH.write_bytes(b"not a joblib file")
+    loaded = explain._load_index()
+    assert loaded["version"] == explain._INDEX_VERSION
+    assert joblib.load(explain._INDEX_PATH)["version"] == explain._INDEX_VERSION
+    assert list(explain._INDEX_PATH.parent.glob("*.tmp")) == []
+
+
+def test_key_factors_label_imputed_values():
+    X = np.array([[30.0, 0.511]])
+    contrib = np.array([[0.2, 0.1]])
+    imputed = np.array([[False, True]])
+    factors = explain.key_factors(X, contrib, ["temperature", "soil_TN"], imputed)[0]
+    assert factors == [
+        "Temperature 30 °C raises survivability (+20 pts)",
+        "Soil total nitrogen (not given; default 0.511) raises survivability (+10 pts)",
+    ]
+    assert explain.key_factors(X, contrib, ["temperature", "soil_TN"])[0][1].startswith("Soil total nitrogen 0.511")
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from backend.services import features
+from backend.services.features import FEATURE_NAMES, MEDIANS, SOURCE_LABELS
+
+# ---- Per-point rules as they were in services/fetch.py before the columnar rewrite (reference) ----
+
+
+def _scalar_climate_nitrogen_proxy(elevation, temperature, humidity):
+    elev = elevation if elevation is not None else MEDIANS["Elevation"]
+    temp = temperature if temperature is not None else MEDIANS["Temperature"]
+    humid = humidity if humidity is not None else MEDIANS["Humidity"]
+    elev = max(0, min(5000, elev))
+    temp = max(-20, min(50, temp))
+    humid = max(0, min(100, humid))
+    soil_tn = 0.08 + 0.003 * (temp - 15) + 0.001 * (humid - 50) - 0.00001 * elev
+    soil_tn = round(min(0.22, max(0.01, soil_tn)), 4)
+    soil_an = round(soil_tn * 0.033, 4)
+    return (soil_tn, soil_an)
+
+
+def _scalar_amplify_nitrogen(raw_tn):
+    diff = raw_tn - 0.51
+    amplified = 0.51 + diff * 10
+    return round(min(1.0, max(0.1, amplified)), 4)
+
+
+def _scalar_fire_risk_proxy(temperature, humidity):
+    if temperature is None:
+        temperature = MEDIANS["Temperature"]
+    if humidity is None:
+        humidity = MEDIANS["Humidity"]
+    h = max(0, min(100, humidity)) / 100.0
+    t = max(0, min(50, temperature)) / 40.0
+    raw = (1.0 - h) * min(1.0, t)
+    return round(min(1.0, max(0.0, raw)), 4)
+
+
+def _scalar_row(elevation, temp, humidity, soil):
+    """(feature values in FEATURE_NAMES order, source label per feature) as _build_response made them."""
+    soil = dict(soil)
+    climate = soil.get("soil_tn") is None
+    if climate:
+        soil["soil_tn"], soil["soil_an"] = _scalar_climate_nitrogen_proxy(elevation, temp, humidity)
+    if soil.get("soil_tn") is not None:
+        soil["soil_an"] = round(soil["soil_tn"] * 0.033, 4)
+    values = dict(MEDIANS)
+    for name, value in (("Elevation", elevation), ("Temperature", temp), ("Humidity", humidity)):
+        if value is not None:
+            values[name] = value
+    values["Fire_Risk_Index"] = _scalar_fire_risk_proxy(temp, humidity)
+    for key, name in (("soil_tn", "Soil_TN"), ("soil_tp", "Soil_TP"), ("soil_ap", "Soil_AP"), ("soil_an", "Soil_AN")):
+        if soil.get(key) is not None:
+            values[name] = soil[key]
+    sources = []
+    for name in FEATURE_NAMES:
+        if name in ("Elevation", "Temperature", "Humidity"):
+            raw = {"Elevation": elevation, "Temperature": temp, "Humidity": humidity}[name]
+            sources.append("api" if raw is not None else "default")
+        elif name in ("Soil_TN", "Soil_AN") and climate:
+            sources.append("proxy")
+        elif name.startswith("Soil_"):
+            sources.append("api" if soil.get(name.lower()) is not None else "default")
+        elif name == "Fire_Risk_Index":
+            sources.append("proxy")
+        else:
+            sources.append("default")
+    return [values[name] for name in FEATURE_NAMES], sources
+
+
+def _random_raw(rng: np.random.Generator, n: int, missing: float = 0.2) -> list[np.ndarray]:
+    """Raw upstream columns spanning (and exceeding) each clip range, with NaN for missing cells."""
+    columns = [
+        rng.uniform(-500, 6000, n),  # elevation
+        rng.uniform(-40, 60, n),  # temperature
+        rng.uniform(-10, 110, n),  # humidity
+        rng.uniform(0, 1.5, n),  # soil_tn
+        rng.uniform(0, 0.5, n),  # soil_tp
+        rng.uniform(0, 0.5, n),  # soil_ap
+    ]
+    for column in columns:
+        column[rng.random(n) < missing] = np.nan
+    return columns
+
+
+def _none(x: float):
+    return None if np.isnan(x) else float(x)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_assemble_features_matches_scalar_rules(seed):
+    raw = _random_raw(np.random.default_rng(seed), 5000)
+    X, sources = features.assemble_features(*raw)
+
+    expected_X, expected_sources = [], []
+    for elevation, temp, humidity, tn, tp, ap in zip(*raw):
+        soil = {"soil_tn": _none(tn), "soil_tp": _none(tp), "soil_ap": _none(ap)}
+        row, labels = _scalar_row(_none(elevation), _none(temp), _none(humidity), soil)
+        expected_X.append(row)
+        expected_sources.append(labels)
+    expected_X = np.array(expected_X)
+
+    np.testing.assert_array_equal(X, expected_X)
+    # assert_array_equal treats -0.0 == 0.0; the responses must not flip the sign either
+    np.testing.assert_array_equal(np.signbit(X), np.signbit(expected_X))
+    np.testing.assert_array_equal(np.array(SOURCE_LABELS)[sources], np.array(expected_sources))
+
+
+def test_proxies_match_scalar_rules():
+    rng = np.random.default_rng(3)
+    elevation, temperature, humidity, tn, _, _ = _random_raw(rng, 5000)
+
+    tn_proxy, an_proxy = features.climate_nitrogen_proxy(elevation, temperature, humidity)
+    expected = [_scalar_climate_nitrogen_proxy(*map(_none, row)) for row in zip(elevation, temperature, humidity)]
+    np.testing.assert_array_equal(np.column_stack([tn_proxy, an_proxy]), np.array(expected))
+
+    np.testing.assert_array_equal(
+        features.fire_risk_proxy(temperature, humidity),
+        [_scalar_fire_risk_proxy(_none(t), _none(h)) for t, h in zip(temperature, humidity)],
+    )
+
+    present = tn[~np.isnan(tn)]
+    np.testing.assert_array_equal(
+        features.amplify_nitrogen(present), [_scalar_amplify_nitrogen(float(x)) for x in present]
+    )
+
+
+def test_round4_matches_python_round_on_ties():
+    rng = np.random.default_rng(4)
+    # k.5e-4 sits on (or one ulp off) a rounding tie, where np.round and round() can disagree
+    values = np.concatenate([(rng.integers(-10**5, 10**5, 5000) + 0.5) / 1e4, rng.uniform(-10, 10, 5000)])
+    np.testing.assert_array_equal(features.round4(values), [round(float(x), 4) for x in values])
@@ -0,0 +1,15 @@
+from collections import Counter
+
+from backend.services import fetch
+
+
+def test_access_counts_stay_bounded_without_prefetch(monkeypatch):
+    monkeypatch.setattr(fetch, "_access_counts", Counter())
+    monkeypatch.setattr(fetch, "_MAX_TRACKED_CELLS", 100)
+    for i in range(1_000):
+        fetch._record_access(f"cell{i}")
+        if i % 10 == 0:
+            fetch._record_access("hot")
+        assert len(fetch._access_counts) <= 100
+    # Decay keeps the most-requested cell ahead of one-off lookups
+    assert fetch._access_counts.most_common(1)[0][0] == "hot"
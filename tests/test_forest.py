@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.export_forest import check_parity
+from backend.services import explain
+from backend.services.forest import CompiledForest, compile_forest
+
+SURV_CLASSES = [2, 3]
+
+
+@pytest.fixture(scope="module")
+def forest():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 5))
+    y = np.digitize(X[:, 0] + 0.5 * X[:, 1] - 0.3 * X[:, 2] + rng.normal(scale=0.5, size=600), [-1.0, 0.0, 1.0])
+    model = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(X, y)
+    X_test = rng.normal(size=(300, 5))
+    # Rows exactly on split thresholds exercise the float32 comparison sklearn uses
+    X_test[:20, 0] = model.estimators_[0].tree_.threshold[0]
+    return model, CompiledForest(compile_forest(model)), X_test
+
+
+def test_predict_proba_parity(forest):
+    model, compiled, X = forest
+    assert check_parity(model, compiled, X) <= 1e-9
+    assert np.allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    assert np.array_equal(compiled.predict(X), model.predict(X))
+
+
+def test_apply_matches_sklearn(forest):
+    model, compiled, X = forest
+    assert np.array_equal(compiled.apply(X), model.apply(X.astype(np.float32)).T)
+
+
+def test_contributions_sum_to_survivability_minus_base_rate(forest):
+    model, compiled, X = forest
+    node_score = compiled.value[..., SURV_CLASSES].sum(axis=-1).reshape(-1)
+    path = compiled.path_contributions(node_score)
+    contrib = compiled.contributions(X, path)
+    base_rate = node_score[compiled._roots.reshape(-1)].mean()
+    survivability = model.predict_proba(X)[:, SURV_CLASSES].sum(axis=1)
+    assert contrib.shape == (len(X), X.shape[1])
+    assert np.allclose(contrib.sum(axis=1), survivability - base_rate, atol=1e-9)
+
+
+def test_explain_contributions_for_sklearn_and_compiled(forest):
+    model, compiled, X = forest
+    explain._attribution.clear()
+    from_sklearn = explain.contributions(model, "test_sklearn", X, SURV_CLASSES)
+    from_compiled = explain.contributions(compiled, "test_compiled", X, SURV_CLASSES)
+    explain._attribution.clear()
+    assert np.allclose(from_sklearn, from_compiled, atol=1e-12)
@@ -0,0 +1,47 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.services import location_card
+from backend.services.cache import FeatureCache
+
+
+@pytest.fixture
+def places(monkeypatch):
+    """Answer every Nearby Search with the body set on the returned dict; record cache TTLs."""
+    state = {"body": {"status": "ZERO_RESULTS", "results": []}, "ttls": []}
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=state["body"])))
+    cache = FeatureCache(max_entries=100)
+    original_set = cache.set
+
+    def recording_set(namespace, key, value, ttl):
+        state["ttls"].append(ttl)
+        original_set(namespace, key, value, ttl)
+
+    cache.set = recording_set
+    monkeypatch.setattr(location_card, "get_client", lambda: client)
+    monkeypatch.setattr(location_card, "_card_cache", cache)
+    return state
+
+
+@pytest.mark.parametrize("status", ["REQUEST_DENIED", "OVER_QUERY_LIMIT", "INVALID_REQUEST", "UNKNOWN_ERROR"])
+def test_error_status_is_cached_briefly(places, status):
+    places["body"] = {"status": status, "results": [], "error_message": "nope"}
+    assert asyncio.run(location_card._find_place(45.0, -122.0, "key")) is None
+    assert places["ttls"] == [location_card.FAILURE_TTL]
+
+
+def test_zero_results_is_cached_for_place_ttl(places):
+    assert asyncio.run(location_card._find_place(45.0, -122.0, "key")) is None
+    assert places["ttls"] == [location_card.PLACE_TTL]
+
+
+def test_hit_is_summarized(places):
+    places["body"] = {
+        "status": "OK",
+        "results": [{"name": "Forest Park", "place_id": "abc", "photos": [{"photo_reference": "p1"}]}],
+    }
+    place = asyncio.run(location_card._find_place(45.0, -122.0, "key"))
+    assert place == {"name": "Forest Park", "place_id": "abc", "photo_refs": ["p1"]}
+    assert places["ttls"] == [location_card.PLACE_TTL]
@@ -0,0 +1,68 @@
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pytest
+
+from backend.services import registry
+
+
+@pytest.fixture
+def rf_artifacts(monkeypatch, tmp_path):
+    teacher = tmp_path / "rf.pkl"
+    student = tmp_path / "rf_fast.joblib"
+    teacher.write_bytes(b"")
+    student.write_bytes(b"")
+    monkeypatch.setattr(registry, "_MODEL_PATH", teacher)
+    monkeypatch.setattr(registry, "_FAST_PATH", student)
+    monkeypatch.setattr(registry, "_REGISTRY", {
+        **registry._REGISTRY,
+        "rf": (registry._load_rf, (teacher,)),
+        "rf_fast": (registry._load_rf_fast, (student,)),
+    })
+    monkeypatch.setattr(registry, "_models", {})
+    return teacher, student
+
+
+def test_fast_serves_the_distilled_forest(rf_artifacts):
+    assert registry.resolve_name("rf", fast=True) == "rf_fast"
+
+
+def test_fast_falls_back_after_a_retrain(rf_artifacts):
+    teacher, student = rf_artifacts
+    mtime = student.stat().st_mtime
+    os.utime(teacher, (mtime + 60, mtime + 60))
+    assert registry.resolve_name("rf", fast=True) == "rf"
+    assert "rf_fast" not in registry.available_models()
+    with pytest.raises(registry.UnknownModelError, match="older than"):
+        registry.get_model("rf_fast")
+
+
+def test_logreg_predicts_without_warnings(monkeypatch, tmp_path):
+    pd = pytest.importorskip("pandas")
+    from fastapi.testclient import TestClient
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    from backend import main
+    from backend.services.explain import _INDEX_FEATURES
+
+    # Fitted on a DataFrame, as LogisticRegressionModel.py and train.py do
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, len(_INDEX_FEATURES))), columns=_INDEX_FEATURES)
+    pipeline = make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))
+    pipeline.fit(X, rng.integers(0, 4, len(X)))
+    path = tmp_path / "logreg.pkl"
+    joblib.dump(pipeline, path)
+    monkeypatch.setattr(registry, "_LOGREG_PATH", path)
+    monkeypatch.setattr(registry, "_REGISTRY", {**registry._REGISTRY, "logreg": (registry._load_logreg, (path,))})
+    monkeypatch.setattr(registry, "_models", {})
+
+    row = {name: 1.0 for name in _INDEX_FEATURES}
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        response = TestClient(main.app).post("/api/predict?model=logreg&explain=false", json={"features": row})
+    assert response.status_code == 200
+    assert set(response.json()["probabilities"]) == {"unhealthy", "subhealthy", "healthy", "very_healthy"}
@@ -0,0 +1,69 @@
+import json
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.services import scan
+from backend.services.features import FEATURE_NAMES
+
+
+@pytest.fixture
+def scored_offline(monkeypatch):
+    """Scan cells without upstream calls or a trained model."""
+    async def features(cells):
+        return np.zeros((len(cells), len(FEATURE_NAMES))), {}
+
+    def predict(X, fast=False):
+        return [
+            {"survivability": 0.5, "label": "healthy", "confidence": 0.6, "probabilities": {"healthy": 0.6}}
+            for _ in range(len(X))
+        ]
+
+    monkeypatch.setattr(scan, "fetch_feature_matrix", features)
+    monkeypatch.setattr(scan, "predict_features", predict)
+
+
+def test_scan_area_accepts_geojson(scored_offline):
+    response = TestClient(main.app).post(
+        "/api/scan-area",
+        json={"lat": 45.0, "lon": -75.0, "radius_km": 1.0},
+        headers={"Accept": "application/geo+json"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/geo+json")
+    body = json.loads(response.content)
+    assert body["type"] == "FeatureCollection"
+    assert len(body["features"]) == body["properties"]["cells"] > 0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"lat": math.nan, "lon": -75.0, "radius_km": 1.0},
+        {"lat": 45.0, "lon": -75.0, "radius_km": math.inf},
+        {"lat": 45.0, "lon": -75.0, "radius_km": 1.0, "step_km": math.nan},
+        {"lat": 45.0, "lon": -75.0, "radius_km": 1.0, "step_km": 1e-300},
+        {"lat": 45.0, "lon": -75.0, "radius_km": 1e308, "step_km": 1e-300},
+        {"lat": 95.0, "lon": -75.0, "radius_km": 1.0},
+        {"bbox": [-75.0, 45.0, -74.0, math.inf]},
+        {"bbox": [-75.0, math.nan, -74.0, 46.0]},
+        {"bbox": [-200.0, 45.0, -74.0, 46.0]},
+        {"bbox": [-75.0, -95.0, -74.0, 46.0]},
+    ],
+)
+def test_grid_cells_rejects_non_finite_and_out_of_range_input(kwargs):
+    with pytest.raises(ValueError):
+        scan.grid_cells(**kwargs)
+
+
+def test_scan_area_rejects_nan_with_422():
+    # Starlette's JSON parser accepts the NaN literal
+    response = TestClient(main.app).post(
+        "/api/scan-area",
+        content='{"lat": NaN, "lon": -75.0, "radius_km": 1.0}',
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
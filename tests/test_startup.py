@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.services import registry, scan
+from backend.services.features import FEATURE_NAMES
+
+# A complete, valid feature row (snake_case keys, as the frontend sends)
+ROW = {
+    "elevation": 350.0,
+    "temperature": 12.5,
+    "humidity": 70.0,
+    "soil_tn": 0.1,
+    "soil_tp": 0.05,
+    "soil_ap": 0.002,
+    "soil_an": 0.005,
+    "fire_risk_index": 0.3,
+    "slope": 8.0,
+    "menhinick_index": 1.5,
+    "gleason_index": 3.0,
+    "disturbance_level": 0.2,
+}
+
+
+@pytest.fixture
+def no_models(monkeypatch, tmp_path):
+    missing = (Path(tmp_path) / "missing",)
+    monkeypatch.setattr(registry, "_REGISTRY", {name: (loader, missing) for name, (loader, _) in registry._REGISTRY.items()})
+    monkeypatch.setattr(registry, "_models", {})
+    monkeypatch.setattr(main, "start_inference", lambda: None)
+    monkeypatch.setattr(main, "PREFETCH_TOP_K", 0)
+
+
+@pytest.fixture
+def offline_features(monkeypatch):
+    async def features(cells):
+        return np.zeros((len(cells), len(FEATURE_NAMES))), {}
+
+    monkeypatch.setattr(scan, "fetch_feature_matrix", features)
+
+
+def test_app_starts_without_a_trained_model(no_models):
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        response = client.post("/api/predict", json={"features": ROW})
+    assert response.status_code == 422
+    assert response.json()["detail"] == f"Model '{registry.DEFAULT_MODEL}' has no artifact; train it first"
+
+
+def test_columnar_scan_without_a_model_is_a_client_error(no_models, offline_features):
+    pytest.importorskip("msgpack")
+    with TestClient(main.app) as client:
+        response = client.post(
+            "/api/scan-area",
+            json={"lat": 45.0, "lon": -75.0, "radius_km": 1.0},
+            headers={"Accept": "application/msgpack"},
+        )
+    assert response.status_code == 422
+
+
+def test_geojson_scan_without_a_model_is_a_client_error(no_models, offline_features):
+    with TestClient(main.app) as client:
+        response = client.post("/api/scan-area", json={"lat": 45.0, "lon": -75.0, "radius_km": 1.0})
+    assert response.status_code == 422
@@ -0,0 +1,108 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.services.upstream import CircuitBreaker, Upstream, UpstreamError
+
+
+def _half_open_upstream(handler, **kwargs) -> tuple[Upstream, httpx.AsyncClient]:
+    breaker = CircuitBreaker(threshold=1, reset_after=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    upstream = Upstream("google_places", rate=1000, burst=1000, concurrency=4, breaker=breaker, **kwargs)
+    return upstream, httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_cancelled_trial_frees_the_slot():
+    async def scenario():
+        started = asyncio.Event()
+
+        async def slow(request):
+            started.set()
+            await asyncio.sleep(10)
+            return httpx.Response(200)
+
+        upstream, client = _half_open_upstream(slow)
+        task = asyncio.create_task(upstream.get(client, "http://upstream.test/"))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert upstream.breaker.state == "half_open"
+        # The next call becomes the trial instead of failing with "circuit open" forever
+        assert upstream.breaker.allow()
+
+    asyncio.run(scenario())
+
+
+def test_trial_rate_limited_on_retry_frees_the_slot():
+    async def scenario():
+        async def throttled(request):
+            return httpx.Response(429, headers={"Retry-After": "0"})
+
+        upstream, client = _half_open_upstream(throttled, retries=1)
+        # One token: the retry after the 429 cannot be scheduled within max_queue_wait
+        upstream.bucket.tokens = 1
+        upstream.bucket.rate = 0.001
+        with pytest.raises(UpstreamError, match="rate limited"):
+            await upstream.get(client, "http://upstream.test/")
+        assert upstream.breaker.allow()
+
+    asyncio.run(scenario())
+
+
+def test_trial_success_closes_and_failure_reopens():
+    async def scenario():
+        upstream, client = _half_open_upstream(lambda request: httpx.Response(200))
+        await upstream.get(client, "http://upstream.test/")
+        assert upstream.breaker.state == "closed"
+
+        upstream, client = _half_open_upstream(lambda request: httpx.Response(503), retries=0)
+        with pytest.raises(UpstreamError, match="HTTP 503"):
+            await upstream.get(client, "http://upstream.test/")
+        upstream.breaker.reset_after = 60.0
+        assert upstream.breaker.state == "open"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_call_does_not_release_another_callers_trial():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def held(request):
+            await release.wait()
+            return httpx.Response(200)
+
+        breaker = CircuitBreaker(threshold=1, reset_after=0.0)
+        upstream = Upstream("google_places", rate=1000, burst=1000, concurrency=4, breaker=breaker)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(held))
+        # Started while closed, then the breaker trips and another caller takes the trial
+        closed_call = asyncio.create_task(upstream.get(client, "http://upstream.test/"))
+        await asyncio.sleep(0)
+        breaker.record_failure()
+        assert breaker.allow()
+        closed_call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await closed_call
+        assert not breaker.allow()
+
+    asyncio.run(scenario())
+
+
+def test_upstream_is_usable_from_successive_event_loops():
+    upstream = Upstream("google_places", rate=1000, burst=1000, concurrency=1)
+
+    async def scenario():
+        async def slow(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(slow))
+        # Two calls for one slot: the second waits on the semaphore, binding it to this loop
+        responses = await asyncio.gather(*(upstream.get(client, "http://upstream.test/") for _ in range(2)))
+        assert [r.status_code for r in responses] == [200, 200]
+
+    asyncio.run(scenario())
+    asyncio.run(scenario())